@@ -1 +1,30 @@
+import importlib
 
+# Entry points are resolved on first access so importing the package does not load
+# requests, pyodbc or chardet until the matching backend is actually used.
+_LAZY_ATTRIBUTES: dict[str, str] = {
+    "DocLinkData": "doclink_py.doclink_data",
+    "DocLinkSQL": "doclink_py.sql.doclink_sql",
+    "DocLinkSQLCredentials": "doclink_py.sql.doclink_sql",
+    "AsyncDocLinkSQL": "doclink_py.sql.async_doclink_sql",
+    "DocLinkAPI": "doclink_py.dapi.doclink_api",
+    "DocLinkAPICredentails": "doclink_py.dapi.doclink_api",
+    "DocLinkFleet": "doclink_py.fleet",
+    "DocumentExportRunner": "doclink_py.export_runner",
+    "AIReindexDriver": "doclink_py.reindex",
+    "DocLinkDataSnapshot": "doclink_py.snapshot",
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
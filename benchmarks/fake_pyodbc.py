@@ -0,0 +1,223 @@
+import re
+import sys
+import time
+import types
+
+from typing import Callable
+
+from .synthetic import SyntheticSite, Table
+
+# (substring of the statement, table name). Checked in order, first match wins.
+TABLE_ROUTES: list[tuple[str, str]] = [
+    ("FROM [dbo].[Propertys]", "Propertys"),
+    ("FROM [dbo].[DocumentTypes]", "DocumentTypes"),
+    ("FROM [dbo].[DocumentTypePropertys]", "DocumentTypePropertys"),
+    ("from [dbo].[Workflows]", "Workflows"),
+    ("from [dbo].[WorkflowActivities]", "WorkflowActivities"),
+    ("FROM [dbo].[WorkflowNextActivity]", "WorkflowNextActivity"),
+    ("FROM DynamicUIField", "DynamicUIField"),
+    ("FROM DynamicUI", "DynamicUI"),
+    ("SELECT ProfileName FROM AIProfiles", "AIProfiles"),
+    ("SELECT Name FROM EventAutomatedTasks", "EventAutomatedTasks"),
+    ("FROM [dbo].[RISchedules];", "RISchedules"),
+]
+
+_SPROC_EXISTS = re.compile(r"OBJECT_ID\(N'\[dbo\]\.\[(\w+)\]'\)")
+_EXISTING_SPROCS = re.compile(r"FROM sys\.procedures .* AND name IN \((.*)\)")
+_HELPTEXT = re.compile(r"sp_helptext (\w+)")
+_OUTPUT_PROFILE_NAMES = re.compile(r"-1 , '([^']*)' , 10000")
+_OUTPUT_DOC_TYPE_AI = re.compile(r"\(GETDATE\(\),GETDATE\(\),\d+,-1,-1,\d+,(\d+),")
+
+
+class Row(tuple):
+    """Tuple that exposes cursor_description like pyodbc.Row."""
+
+    cursor_description: tuple = ()
+
+
+class Cursor:
+    """Serves synthetic result sets for the statements DocLinkSQL issues."""
+
+    def __init__(self, connection: "Connection") -> None:
+        self.connection = connection
+        self.description: tuple = None
+        self.fast_executemany = False
+        self._rows: list[Row] = []
+
+    def execute(self, query: str, *params) -> "Cursor":
+        self.connection.statements += 1
+        if self.connection.latency:
+            time.sleep(self.connection.latency)
+
+        table = self.connection.respond(query)
+        if table is None:
+            self.description = None
+            self._rows = []
+            return self
+
+        self.description = tuple(
+            (column, str, None, None, None, None, True) for column in table.columns
+        )
+        rows = []
+        for values in table.rows:
+            row = Row(values)
+            row.cursor_description = self.description
+            rows.append(row)
+        self._rows = rows
+
+        return self
+
+    def executemany(self, query: str, params: list) -> None:
+        if "#WorkflowMoves" in query:
+            self.connection.workflow_moves = [tuple(row) for row in params]
+
+        # fast_executemany sends the whole parameter array in one round trip
+        if self.fast_executemany:
+            self.execute(query)
+            return
+        for _ in params:
+            self.execute(query)
+
+    def fetchall(self) -> list[Row]:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchone(self) -> Row:
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size: int = 1) -> list[Row]:
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def nextset(self) -> bool:
+        return False
+
+    def cancel(self) -> None:
+        self.connection.cancels += 1
+
+    def close(self) -> None:
+        pass
+
+
+class Connection:
+    """In memory stand in for pyodbc.Connection backed by a SyntheticSite."""
+
+    def __init__(self, site: SyntheticSite, latency: float = 0.0) -> None:
+        self.site = site
+        self.latency = latency
+        self.autocommit = False
+
+        self.statements = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.cancels = 0
+        self.workflow_moves: list[tuple] = []
+        self._identity = 1000
+
+    def cursor(self) -> Cursor:
+        return Cursor(self)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def rollback(self) -> None:
+        self.rollbacks += 1
+
+    def close(self) -> None:
+        pass
+
+    def _next_identity(self) -> int:
+        self._identity += 1
+        return self._identity
+
+    def respond(self, query: str) -> Table | None:
+        """Returns the result set for query, or None for statements with no results."""
+
+        if "FROM #WorkflowMoves ORDER BY RowId" in query:
+            return Table(
+                ["DocumentID", "WorkflowActivityID", "Succeeded", "ErrorMessage"],
+                [(*move, True, None) for move in self.workflow_moves],
+            )
+
+        for fragment, table_name in TABLE_ROUTES:
+            if fragment in query:
+                return self.site.tables[table_name]
+
+        if match := _SPROC_EXISTS.search(query):
+            exists = match.group(1) in self.site.sprocs
+            return Table(["name"], [(match.group(1),)] if exists else [])
+
+        if match := _EXISTING_SPROCS.search(query):
+            names = re.findall(r"N'(\w+)'", match.group(1))
+            return Table(["name"], [(name,) for name in names if name in self.site.sprocs])
+
+        if match := _HELPTEXT.search(query):
+            text = self.site.sproc_text(match.group(1)).format(ACTION="CREATE")
+            return Table(["Text"], [(line,) for line in text.splitlines(keepends=True)])
+
+        if "SCOPE_IDENTITY()" in query:
+            return Table([""], [(self._identity,)])
+
+        if "INSERTED.ProfileName" in query:
+            return Table(
+                ["", "ProfileName"],
+                [
+                    (self._next_identity(), name)
+                    for name in _OUTPUT_PROFILE_NAMES.findall(query)
+                ],
+            )
+
+        if "INSERTED.AIProfileID" in query:
+            return Table(
+                ["", "AIProfileID"],
+                [
+                    (self._next_identity(), int(profile_id))
+                    for profile_id in _OUTPUT_DOC_TYPE_AI.findall(query)
+                ],
+            )
+
+        if "COUNT(*)" in query:
+            if "GROUP BY" in query:
+                return Table(["ParentId", ""], [])
+            return Table([""], [(0,)])
+
+        if "SELECT EventConfigurationID" in query:
+            return Table(["EventConfigurationID"], [(str(self._identity),)])
+
+        if query.lstrip().upper().startswith(("INSERT", "SET NOCOUNT")):
+            self._next_identity()
+
+        return None
+
+
+def connect_factory(
+    site: SyntheticSite, latency: float = 0.0
+) -> Callable[..., Connection]:
+    """Returns a pyodbc.connect replacement that serves site."""
+
+    def connect(*args, **kwargs) -> Connection:
+        return Connection(site, latency)
+
+    return connect
+
+
+def install(force: bool = False) -> types.ModuleType:
+    """Registers this fake as the pyodbc module when the real driver can't be imported."""
+
+    if not force:
+        try:
+            import pyodbc
+
+            return pyodbc
+        except ImportError:
+            pass
+
+    module = types.ModuleType("pyodbc")
+    module.Connection = Connection
+    module.Cursor = Cursor
+    module.Row = Row
+    module.Error = Exception
+    module.connect = connect_factory(SyntheticSite())
+    sys.modules["pyodbc"] = module
+
+    return module
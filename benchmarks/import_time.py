@@ -0,0 +1,111 @@
+import argparse
+import os
+import subprocess
+import sys
+
+from dataclasses import dataclass
+
+PACKAGE_NAME: str = "doclink_py"
+PACKAGE_PARENT: str = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+DEFAULT_MODULES: list[str] = [
+    "doclink_py",
+    "doclink_py.doclink_data",
+    "doclink_py.sql.doclink_sql",
+    "doclink_py.dapi.doclink_api",
+]
+
+# Third party modules that should only load when the matching backend is used
+HEAVY_MODULES: list[str] = ["pyodbc", "requests", "chardet"]
+
+# Heavy modules each entry point legitimately needs at import time
+ALLOWED_HEAVY_MODULES: dict[str, list[str]] = {}
+
+
+@dataclass
+class ImportTiming:
+    """Dataclass to store the python -X importtime result for one module."""
+
+    module: str
+    total_us: int
+    package_us: int
+    heavy_modules: list[str]
+
+
+def measure_import(module: str, python: str = sys.executable) -> ImportTiming:
+    """Imports module in a fresh interpreter and parses the -X importtime report."""
+
+    completed = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PACKAGE_PARENT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total_us = 0
+    package_us = 0
+    imported: set[str] = set()
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = [
+            part.strip() for part in line[len("import time:") :].split("|", 2)
+        ]
+        if not self_us.isdigit():
+            continue
+
+        imported.add(name.split(".")[0])
+        total_us += int(self_us)
+        if name == PACKAGE_NAME or name.startswith(f"{PACKAGE_NAME}."):
+            package_us += int(self_us)
+
+    return ImportTiming(
+        module=module,
+        total_us=total_us,
+        package_us=package_us,
+        heavy_modules=sorted(imported & set(HEAVY_MODULES)),
+    )
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Track python -X importtime for doclink_py entry points."
+    )
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="Fail if any entry point takes longer than this to import.",
+    )
+    args = parser.parse_args(argv)
+
+    failures = []
+    for module in args.modules:
+        timing = measure_import(module)
+        print(
+            f"{timing.module:<32} {timing.total_us / 1000:>8.2f} ms total "
+            f"{timing.package_us / 1000:>8.2f} ms in {PACKAGE_NAME} "
+            f"heavy: {', '.join(timing.heavy_modules) or '-'}"
+        )
+
+        unexpected = set(timing.heavy_modules) - set(
+            ALLOWED_HEAVY_MODULES.get(module, [])
+        )
+        if unexpected:
+            failures.append(f"{module} eagerly imports {', '.join(sorted(unexpected))}")
+        if args.max_ms is not None and timing.total_us / 1000 > args.max_ms:
+            failures.append(f"{module} took {timing.total_us / 1000:.2f} ms")
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,479 @@
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from dataclasses import dataclass, asdict
+from typing import Callable
+
+from . import fake_pyodbc
+
+# Lets pyodbc resolve on hosts without the ODBC driver libraries installed
+fake_pyodbc.install()
+
+from doclink_py import doclink_sprocs  # noqa: E402
+from doclink_py.dapi.doclink_api import DocLinkAPI, DocLinkAPICredentails  # noqa: E402
+from doclink_py.doclink_data import (  # noqa: E402
+    CreationType,
+    DocLinkData,
+    StagingTableColumType,
+)
+from doclink_py.sql.doclink_sql import AIProvisionSpec, DocLinkSQL  # noqa: E402
+from doclink_py.sql.sql_handler import SQLHandler  # noqa: E402
+from doclink_py.tracing import trace_round_trips  # noqa: E402
+
+from .stub_api_server import StubDocLinkServer  # noqa: E402
+from .synthetic import SyntheticSite  # noqa: E402
+
+BASELINE_PATH: str = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_SCALE: int = 500
+DEFAULT_REPEAT: int = 5
+DEFAULT_TOLERANCE: float = 2.0
+# Seconds; sub-millisecond benchmarks can double from scheduler noise alone
+DEFAULT_NOISE_FLOOR: float = 0.001
+
+SPROC_NAMES: list[str] = [
+    doclink_sprocs.INSERT_WFM_DATA_SPROC,
+    doclink_sprocs.AUDIT_WF_MOVE_SPROC,
+    doclink_sprocs.MOVE_WF_DOC_SPROC,
+    doclink_sprocs.ADD_STICKY_SPROC,
+    doclink_sprocs.DOC_EXPORT_FROM_PROP_SPROC,
+    doclink_sprocs.DOC_EXPORT_FROM_DIST_SPROC,
+    doclink_sprocs.DOC_EXPORT_MONITOR_TABLE_SPROC,
+    doclink_sprocs.DOC_EXPORT_AI_INDEX_SPROC,
+]
+
+
+@dataclass
+class BenchmarkResult:
+    """Dataclass to store the timing of one benchmark."""
+
+    name: str
+    seconds: float
+    best_seconds: float
+    round_trips: int
+
+
+class BenchmarkContext:
+    """Fake SQL connection, stub API server and populated data shared by benchmarks."""
+
+    def __init__(
+        self, site: SyntheticSite, sql_latency: float = 0.0, api_latency: float = 0.0
+    ) -> None:
+        self.site = site
+        self.sql_latency = sql_latency
+        self.api_server = StubDocLinkServer(site, api_latency)
+
+        self.sql: DocLinkSQL = None
+        self.api: DocLinkAPI = None
+        self.data: DocLinkData = None
+        self.doc_type_id: int = None
+
+    def connect_sql(self) -> DocLinkSQL:
+        """Returns a DocLinkSQL wired to a fresh fake pyodbc connection."""
+
+        connection = fake_pyodbc.Connection(self.site, self.sql_latency)
+
+        sql = DocLinkSQL()
+        sql.sql_handler = SQLHandler()
+        sql.sql_handler.connection = connection
+        sql.sql_handler.cursor = connection.cursor()
+
+        return sql
+
+    def connect_api(self) -> DocLinkAPI:
+        api = DocLinkAPI()
+        api.connect(
+            DocLinkAPICredentails(
+                URL=self.api_server.url,
+                UserId="bench",
+                Password="bench",
+                SiteCode="BENCH",
+            )
+        )
+
+        return api
+
+    def __enter__(self) -> "BenchmarkContext":
+        self.api_server.start()
+        self.sql = self.connect_sql()
+        self.api = self.connect_api()
+
+        self.data = DocLinkData()
+        self.data.populate_data_types(self.sql)
+        self.doc_type_id = self.data.document_types[0].DocumentTypeId
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.api_server.stop()
+
+
+def _sql_lazy_select_doc_type(context: BenchmarkContext) -> None:
+    data = DocLinkData()
+    data.populate_data_types(context.sql, lazy=True)
+    data.set_selected_doc_by_id(context.doc_type_id)
+
+
+def _workflow_route_checks(context: BenchmarkContext) -> None:
+    data = context.data
+    data.refresh_collection("workflow_next_activities")
+    graph = data.workflow_graph
+    for activity_ids in graph.activity_ids_by_workflow.values():
+        for staging_id in activity_ids:
+            for staged_id in activity_ids:
+                graph.is_chain_reachable(staging_id, staged_id, activity_ids[-1])
+                graph.shortest_path(staging_id, staged_id)
+
+
+def _metadata_search(context: BenchmarkContext) -> None:
+    data = context.data
+    data.refresh_collection("properties")
+    for prompt in ("p", "pr", "prompt 1", "prompt 12", "promtp 12#", "caption 3"):
+        data.search_metadata(prompt)
+
+
+def _staging_ddl_doc_type(context: BenchmarkContext) -> None:
+    data = context.data
+    data.staging_table_columns = {}
+    # Compiled fragments are memoized; time the compile, not the cache hit
+    data._staging_ddl_compilers.clear()
+    doc_type = data.get_document_type_by_id(context.doc_type_id)
+    for doc_type_prop in doc_type.DocumentTypeProperties:
+        column_type = (
+            StagingTableColumType.HEADER
+            if doc_type_prop.PropertyType == 1
+            else StagingTableColumType.DETAIL
+        )
+        data.add_staging_table_columns(column_type, [doc_type_prop.Name])
+
+    for column_type in StagingTableColumType:
+        data.create_prompt_type_string(CreationType.DOC_TYPE, column_type)
+        data.create_prompt_string(CreationType.DOC_TYPE, column_type)
+        data.create_id_string(CreationType.DOC_TYPE, column_type)
+
+
+def _staging_ddl_dist_stamp(context: BenchmarkContext) -> None:
+    data = context.data
+    data.staging_table_columns = {}
+    data._staging_ddl_compilers.clear()
+    stamp_fields = data.distribution_stamps[-1].DistributionStampFields
+    half = len(stamp_fields) // 2
+    data.add_staging_table_columns(
+        StagingTableColumType.HEADER, [field.Caption for field in stamp_fields[:half]]
+    )
+    data.add_staging_table_columns(
+        StagingTableColumType.DETAIL, [field.Caption for field in stamp_fields[half:]]
+    )
+
+    for column_type in StagingTableColumType:
+        data.create_prompt_type_string(CreationType.DIST_STAMP, column_type)
+        data.create_prompt_string(CreationType.DIST_STAMP, column_type)
+        data.create_id_string(CreationType.DIST_STAMP, column_type)
+
+
+def _sql_cached_repopulate(context: BenchmarkContext) -> None:
+    sql = context.connect_sql()
+    sql.sql_handler.query_cache = sql.query_cache
+    DocLinkData().populate_data_types(sql)
+    sql.create_auto_index("Bench Cached AI", "exec Bench")
+    sql.get_ai_profiles()
+    DocLinkData().populate_data_types(sql)
+
+
+def _sql_sproc_comparison(context: BenchmarkContext) -> None:
+    data = DocLinkData()
+    data.populate_sproc_info(context.sql, SPROC_NAMES)
+    data.identical_sproc_check(context.sql, SPROC_NAMES)
+
+
+def _api_sproc_check(context: BenchmarkContext) -> None:
+    # The listing is cached across clients; measure the cold download
+    context.api.invalidate_accessible_items()
+    DocLinkData().populate_sproc_info(context.api, SPROC_NAMES)
+
+
+def _provision_event_flow(context: BenchmarkContext) -> None:
+    sql = context.sql
+    activity_id = context.data.workflow_activities[0].WorkflowActivityID
+
+    task_id = sql.create_triggered_event("Bench Export", activity_id, False)
+    db_action_id = sql.add_event_database_action(
+        task_id, "Bench Export", doclink_sprocs.MOVE_WF_DOC_SPROC
+    )
+    for param_name in ("@Staged", "@ImportSuccess", "@ImportFailed"):
+        sql.add_event_db_action_param(db_action_id, param_name, str(activity_id))
+
+    scheduled_task_id = sql.create_scheduled_event("Bench Monitor", False)
+    sql.add_schedule_for_event_by_task_id(scheduled_task_id, 5, 1)
+
+
+def _ai_specs(context: BenchmarkContext) -> list[AIProvisionSpec]:
+    return [
+        AIProvisionSpec(
+            doc_type_id=doc_type.DocumentTypeId,
+            ai_name=f"Bench AI {doc_type.DocumentTypeId}",
+            ai_script="exec Custom_DocumentExport_AI_IndexProperties @DocId=%DocumentID%",
+            return_properties=[
+                (doc_type_prop.PropertyId, doc_type_prop.Name)
+                for doc_type_prop in doc_type.DocumentTypeProperties[:3]
+            ],
+        )
+        for doc_type in context.data.document_types
+    ]
+
+
+def _provision_ai_per_doc_type(context: BenchmarkContext) -> None:
+    sql = context.sql
+    for spec in _ai_specs(context):
+        sql.enable_ai_for_document_type(spec.doc_type_id)
+        ai_profile_id = sql.create_auto_index(spec.ai_name, spec.ai_script)
+        sql.attach_auto_index_to_doc_type(spec.doc_type_id, ai_profile_id)
+        for prop_id, column_name in spec.return_properties:
+            sql.add_auto_index_return_property(ai_profile_id, prop_id, column_name)
+
+
+def _provision_ai_unit_of_work(context: BenchmarkContext) -> None:
+    with context.sql.unit_of_work(batch=True):
+        _provision_ai_per_doc_type(context)
+
+
+def _provision_ai_bulk(context: BenchmarkContext) -> None:
+    context.sql.bulk_provision_auto_indexes(_ai_specs(context), enable_ai=True)
+
+
+def _workflow_moves(context: BenchmarkContext) -> list[tuple[int, int]]:
+    activity_ids = [
+        activity.WorkflowActivityID for activity in context.data.workflow_activities
+    ]
+    return [
+        (document_id, activity_ids[document_id % len(activity_ids)])
+        for document_id in range(1, 2001)
+    ]
+
+
+def _move_documents_per_document(context: BenchmarkContext) -> None:
+    sql = context.sql
+    for document_id, activity_id in _workflow_moves(context):
+        sql.run_query(
+            f"EXEC [dbo].[{doclink_sprocs.MOVE_WF_DOC_SPROC}] {document_id}, {activity_id}"
+        )
+        sql.run_query(
+            f"EXEC [dbo].[{doclink_sprocs.AUDIT_WF_MOVE_SPROC}] {document_id}, {activity_id}"
+        )
+
+
+def _move_documents_bulk(context: BenchmarkContext) -> None:
+    context.sql.bulk_move_workflow_documents(_workflow_moves(context))
+
+
+def _provision_ri_per_doc_type(context: BenchmarkContext) -> None:
+    sql = context.sql
+    for doc_type in context.data.document_types:
+        if sql.doc_ri_schedule_exists(doc_type.DocumentTypeId):
+            sql.get_doc_ri_schedule_attributes(doc_type.DocumentTypeId)
+            sql.update_doc_ri_schedule(doc_type.DocumentTypeId, 30, 1)
+        else:
+            sql.create_doc_ri_schedule(doc_type.DocumentTypeId, 30, 1)
+
+
+def _provision_ri_bulk(context: BenchmarkContext) -> None:
+    sql = context.sql
+    sql.get_ri_schedules(refresh=True)
+    sql.upsert_doc_ri_schedules(
+        {doc_type.DocumentTypeId: (30, 1) for doc_type in context.data.document_types}
+    )
+
+
+BENCHMARKS: dict[str, Callable[[BenchmarkContext], None]] = {
+    "sql_populate_data_types": lambda context: DocLinkData().populate_data_types(
+        context.sql
+    ),
+    "api_populate_data_types": lambda context: DocLinkData().populate_data_types(
+        context.api
+    ),
+    "sql_lazy_select_doc_type": _sql_lazy_select_doc_type,
+    "workflow_route_checks": _workflow_route_checks,
+    "metadata_search": _metadata_search,
+    "staging_ddl_doc_type": _staging_ddl_doc_type,
+    "staging_ddl_dist_stamp": _staging_ddl_dist_stamp,
+    "sql_cached_repopulate": _sql_cached_repopulate,
+    "sql_sproc_comparison": _sql_sproc_comparison,
+    "api_sproc_check": _api_sproc_check,
+    "provision_event_flow": _provision_event_flow,
+    "provision_ai_per_doc_type": _provision_ai_per_doc_type,
+    "provision_ai_unit_of_work": _provision_ai_unit_of_work,
+    "provision_ai_bulk": _provision_ai_bulk,
+    "move_documents_per_document": _move_documents_per_document,
+    "move_documents_bulk": _move_documents_bulk,
+    "provision_ri_per_doc_type": _provision_ri_per_doc_type,
+    "provision_ri_bulk": _provision_ri_bulk,
+}
+
+
+def _write_sproc_files(site: SyntheticSite, directory: str) -> None:
+    sproc_dir = os.path.join(directory, doclink_sprocs.SQLDAT_DIR)
+    os.makedirs(sproc_dir, exist_ok=True)
+    for sproc_name in site.sprocs:
+        with open(os.path.join(sproc_dir, f"{sproc_name}.sqldat"), "w") as f:
+            f.write(site.sproc_text(sproc_name))
+
+
+def run_benchmarks(
+    scale: int = DEFAULT_SCALE,
+    repeat: int = DEFAULT_REPEAT,
+    sql_latency: float = 0.0,
+    api_latency: float = 0.0,
+    only: list[str] = None,
+) -> list[BenchmarkResult]:
+    """Runs the selected benchmarks offline and returns the median timings."""
+
+    site = SyntheticSite.from_scale(scale, sprocs=SPROC_NAMES)
+    names = only or list(BENCHMARKS)
+    results: list[BenchmarkResult] = []
+
+    start_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        # DocLinkSQL reads sproc_data/ and writes transactions.txt relative to the cwd
+        os.chdir(work_dir)
+        try:
+            _write_sproc_files(site, work_dir)
+            with BenchmarkContext(site, sql_latency, api_latency) as context:
+                for name in names:
+                    benchmark = BENCHMARKS[name]
+                    timings = []
+                    round_trips = 0
+                    for _ in range(repeat):
+                        with trace_round_trips(name) as report:
+                            start = time.perf_counter()
+                            benchmark(context)
+                            timings.append(time.perf_counter() - start)
+                        # The first (cold cache) run usually makes the most round trips
+                        round_trips = max(round_trips, report.count)
+
+                    results.append(
+                        BenchmarkResult(
+                            name=name,
+                            seconds=statistics.median(timings),
+                            best_seconds=min(timings),
+                            round_trips=round_trips,
+                        )
+                    )
+                    logging.info(
+                        f"{name}: {results[-1].seconds:.4f}s, {round_trips} round trips"
+                    )
+        finally:
+            os.chdir(start_dir)
+
+    return results
+
+
+def compare_to_baseline(
+    results: list[BenchmarkResult],
+    baseline: dict,
+    tolerance: float = DEFAULT_TOLERANCE,
+    noise_floor: float = DEFAULT_NOISE_FLOOR,
+) -> list[str]:
+    """Returns a description of every benchmark that regressed against baseline.
+
+    Round trip counts are deterministic and must not grow. Timings may exceed the
+    baseline by the tolerance factor to absorb machine to machine variance, and
+    slowdowns under noise_floor seconds are ignored.
+    """
+
+    regressions = []
+    for result in results:
+        expected = baseline.get("results", {}).get(result.name)
+        if expected is None:
+            continue
+
+        if result.round_trips > expected["round_trips"]:
+            regressions.append(
+                f"{result.name}: {result.round_trips} round trips "
+                f"(baseline {expected['round_trips']})"
+            )
+        slower_by = result.seconds - expected["seconds"]
+        if result.seconds > expected["seconds"] * tolerance and slower_by > noise_floor:
+            regressions.append(
+                f"{result.name}: {result.seconds:.4f}s "
+                f"(baseline {expected['seconds']:.4f}s x {tolerance})"
+            )
+
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Run the offline doclink_py benchmarks against fake SQL and API backends."
+    )
+    parser.add_argument("--scale", type=int, default=DEFAULT_SCALE)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--sql-latency", type=float, default=0.0)
+    parser.add_argument("--api-latency", type=float, default=0.0)
+    parser.add_argument("--only", nargs="*", choices=list(BENCHMARKS))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--noise-floor", type=float, default=DEFAULT_NOISE_FLOOR)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        scale=args.scale,
+        repeat=args.repeat,
+        sql_latency=args.sql_latency,
+        api_latency=args.api_latency,
+        only=args.only,
+    )
+
+    for result in results:
+        print(
+            f"{result.name:<30} {result.seconds * 1000:>10.2f} ms "
+            f"{result.round_trips:>6} round trips"
+        )
+
+    parameters = {
+        "scale": args.scale,
+        "repeat": args.repeat,
+        "sql_latency": args.sql_latency,
+        "api_latency": args.api_latency,
+    }
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {
+                    "parameters": parameters,
+                    "results": {result.name: asdict(result) for result in results},
+                },
+                f,
+                indent=2,
+            )
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    if baseline.get("parameters") != parameters:
+        print(f"Baseline parameters {baseline.get('parameters')} differ; not comparing.")
+        return 0
+
+    regressions = compare_to_baseline(
+        results, baseline, args.tolerance, args.noise_floor
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+from uuid import UUID
+
+from .synthetic import SyntheticSite
+
+AUTH_CODE: str = "stub-auth-code"
+
+# Tables DocLinkAPI.query_table may read; everything else is reported as not whitelisted
+QUERYABLE_TABLES: list[str] = [
+    "Workflows",
+    "WorkflowActivities",
+    "WorkflowNextActivity",
+    "DynamicUI",
+    "DynamicUIField",
+    "AIProfiles",
+    "EventAutomatedTasks",
+]
+
+
+def _json_default(value):
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"{type(value)} is not JSON serializable")
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: "_StubHTTPServer"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send(self, payload, status: int = 200) -> None:
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        body = b"" if payload is None else json.dumps(
+            payload, default=_json_default
+        ).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _endpoint(self) -> str:
+        return urlparse(self.path).path.rsplit("/", 1)[-1]
+
+    def _authorized(self) -> bool:
+        if self.headers.get("AuthCode") == AUTH_CODE:
+            return True
+        self._send({"Message": "Not authenticated"}, 401)
+        return False
+
+    def do_GET(self) -> None:
+        site = self.server.site
+        endpoint = self._endpoint()
+        self.server.requests += 1
+
+        if not self._authorized():
+            return
+
+        if endpoint == "Properties":
+            self._send(site.tables["Propertys"].as_dicts())
+        elif endpoint == "DocumentTypes":
+            self._send(site.document_types_with_props())
+        elif endpoint == "AccessibleItems":
+            self._send(
+                {
+                    "Tables": [{"Name": table} for table in QUERYABLE_TABLES],
+                    "Procedures": [{"Name": sproc} for sproc in site.sprocs],
+                }
+            )
+        else:
+            self._send({"Message": f"Unknown endpoint {endpoint}"}, 404)
+
+    def do_POST(self) -> None:
+        site = self.server.site
+        endpoint = self._endpoint()
+        self.server.requests += 1
+
+        length = int(self.headers.get("Content-Length") or 0)
+        data = json.loads(self.rfile.read(length) or b"{}")
+
+        if endpoint in ("LoginCloud", "LoginOnPremise"):
+            self._send(AUTH_CODE)
+            return
+
+        if not self._authorized():
+            return
+
+        if endpoint == "Logout":
+            self._send(None)
+        elif endpoint == "QueryTable":
+            table_name = data.get("TableName")
+            if table_name not in QUERYABLE_TABLES:
+                self._send({"Message": f"{table_name} not whitelisted"}, 403)
+                return
+            table = site.tables[table_name]
+            self._send(
+                {
+                    "Columns": [{"Name": column} for column in table.columns],
+                    "Rows": [list(row) for row in table.rows],
+                }
+            )
+        else:
+            self._send({"Message": f"Unknown endpoint {endpoint}"}, 404)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, site: SyntheticSite, latency: float) -> None:
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.site = site
+        self.latency = latency
+        self.requests = 0
+
+
+class StubDocLinkServer:
+    """Local DocLink API stand in. Use as a context manager; url is the credentials URL."""
+
+    def __init__(self, site: SyntheticSite, latency: float = 0.0) -> None:
+        self.site = site
+        self.latency = latency
+
+        self._server: _StubHTTPServer = None
+        self._thread: threading.Thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def requests(self) -> int:
+        return self._server.requests
+
+    def start(self) -> None:
+        self._server = _StubHTTPServer(self.site, self.latency)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> "StubDocLinkServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
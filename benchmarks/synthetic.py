@@ -0,0 +1,263 @@
+from dataclasses import dataclass, fields, MISSING
+from typing import Any
+from uuid import UUID, uuid5, NAMESPACE_URL
+
+from doclink_py.doclink_types.documents import DocumentType, DocumentTypeProperty
+from doclink_py.doclink_types.propertys import Property
+from doclink_py.doclink_types.stamps import DistributionStamp, DistributionStampField
+from doclink_py.doclink_types.workflows import (
+    Workflow,
+    WorkflowActivity,
+    WorkflowNextActivity,
+)
+
+TIMESTAMP: str = "2024-01-01 00:00:00.000"
+PROPS_PER_DOC_TYPE: int = 20
+ACTIVITIES_PER_WORKFLOW: int = 6
+FIELDS_PER_STAMP: int = 40
+
+
+def _uuid(name: str, index: int) -> UUID:
+    return uuid5(NAMESPACE_URL, f"doclink-bench/{name}/{index}")
+
+
+def _columns(dataclass_type: type) -> list[str]:
+    """Returns the columns a loader passes to dataclass_type (required fields only)."""
+
+    return [
+        dataclass_field.name
+        for dataclass_field in fields(dataclass_type)
+        if dataclass_field.default is MISSING
+    ]
+
+
+def _row(dataclass_type: type, index: int, **overrides: Any) -> tuple:
+    """Builds a row for dataclass_type using type appropriate placeholder values."""
+
+    values = []
+    for dataclass_field in fields(dataclass_type):
+        if dataclass_field.default is not MISSING:
+            continue
+
+        name = dataclass_field.name
+        if name in overrides:
+            values.append(overrides[name])
+        elif name in ("Created", "Modified"):
+            values.append(TIMESTAMP)
+        elif dataclass_field.type is bool:
+            values.append(False)
+        elif dataclass_field.type is int:
+            values.append(index)
+        elif dataclass_field.type is UUID:
+            values.append(_uuid(name, index))
+        else:
+            values.append(f"{name} {index}")
+
+    return tuple(values)
+
+
+@dataclass
+class Table:
+    """Dataclass storing a synthetic result set."""
+
+    columns: list[str]
+    rows: list[tuple]
+
+    def as_dicts(self) -> list[dict]:
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+
+class SyntheticSite:
+    """Generates a consistent set of DocLink metadata at a configurable scale."""
+
+    def __init__(
+        self,
+        properties: int = 500,
+        document_types: int = 25,
+        workflows: int = 10,
+        distribution_stamps: int = 10,
+        sprocs: list[str] = None,
+    ) -> None:
+        self.property_count = properties
+        self.document_type_count = document_types
+        self.workflow_count = workflows
+        self.distribution_stamp_count = distribution_stamps
+        self.sprocs: list[str] = sprocs or []
+
+        self.tables: dict[str, Table] = {}
+        self._build()
+
+    @classmethod
+    def from_scale(cls, scale: int, sprocs: list[str] = None) -> "SyntheticSite":
+        """Sizes every collection relative to scale (the number of properties)."""
+
+        return cls(
+            properties=scale,
+            document_types=max(1, scale // PROPS_PER_DOC_TYPE),
+            workflows=max(1, scale // 50),
+            distribution_stamps=max(1, scale // 50),
+            sprocs=sprocs,
+        )
+
+    def _build(self) -> None:
+        self.tables["Propertys"] = Table(
+            _columns(Property),
+            [
+                _row(
+                    Property,
+                    index,
+                    UserPrompt=f"Prompt {index}#",
+                    PropertyName=f"Property{index}",
+                    DataType=index % 5,
+                )
+                for index in range(1, self.property_count + 1)
+            ],
+        )
+
+        self.tables["DocumentTypes"] = Table(
+            _columns(DocumentType),
+            [
+                _row(DocumentType, index, Name=f"Document Type {index}")
+                for index in range(1, self.document_type_count + 1)
+            ],
+        )
+
+        doc_type_props = []
+        for doc_type_index in range(1, self.document_type_count + 1):
+            for offset in range(PROPS_PER_DOC_TYPE):
+                property_id = (doc_type_index * PROPS_PER_DOC_TYPE + offset) % (
+                    self.property_count
+                ) + 1
+                doc_type_props.append(
+                    _row(
+                        DocumentTypeProperty,
+                        len(doc_type_props) + 1,
+                        ParentId=doc_type_index,
+                        PropertyId=property_id,
+                        SequenceNumber=offset,
+                        PropertyType=1 + offset % 2,
+                    )
+                )
+        self.tables["DocumentTypePropertys"] = Table(
+            _columns(DocumentTypeProperty), doc_type_props
+        )
+
+        self.tables["Workflows"] = Table(
+            _columns(Workflow),
+            [
+                _row(Workflow, index, Title=f"Workflow {index}")
+                for index in range(1, self.workflow_count + 1)
+            ],
+        )
+
+        activities = []
+        for workflow_index in range(1, self.workflow_count + 1):
+            for offset in range(ACTIVITIES_PER_WORKFLOW):
+                activity_index = len(activities) + 1
+                activities.append(
+                    _row(
+                        WorkflowActivity,
+                        activity_index,
+                        WorkflowID=workflow_index,
+                        Title=f"Activity {workflow_index}.{offset}",
+                        Seq=offset,
+                    )
+                )
+        self.tables["WorkflowActivities"] = Table(
+            _columns(WorkflowActivity), activities
+        )
+
+        # Each activity routes to the next by default; the first can also skip to the last
+        routes = []
+        for workflow_index in range(self.workflow_count):
+            first = workflow_index * ACTIVITIES_PER_WORKFLOW + 1
+            last = first + ACTIVITIES_PER_WORKFLOW - 1
+            edges = [(index, index + 1, True) for index in range(first, last)]
+            edges.append((first, last, False))
+            for source, target, default in edges:
+                routes.append(
+                    _row(
+                        WorkflowNextActivity,
+                        len(routes) + 1,
+                        WorkflowActivityID=source,
+                        NextWorkflowActivityKey=_uuid("WorkflowActivityKey", target),
+                        DefaultNextActivity=default,
+                    )
+                )
+        self.tables["WorkflowNextActivity"] = Table(
+            _columns(WorkflowNextActivity), routes
+        )
+
+        self.tables["DynamicUI"] = Table(
+            _columns(DistributionStamp),
+            [
+                _row(
+                    DistributionStamp,
+                    index,
+                    DynamicUiId=_uuid("DynamicUI", index),
+                    Name=f"Stamp {index}",
+                )
+                for index in range(1, self.distribution_stamp_count + 1)
+            ],
+        )
+
+        stamp_fields = []
+        for stamp_index in range(1, self.distribution_stamp_count + 1):
+            for offset in range(FIELDS_PER_STAMP):
+                field_index = len(stamp_fields) + 1
+                stamp_fields.append(
+                    _row(
+                        DistributionStampField,
+                        field_index,
+                        DynamicUIId=_uuid("DynamicUI", stamp_index),
+                        Caption=f"Caption {field_index}#",
+                        DataType=field_index % 5,
+                        LabelFont="Microsoft Sans Serif",
+                    )
+                )
+        self.tables["DynamicUIField"] = Table(
+            _columns(DistributionStampField), stamp_fields
+        )
+
+        self.tables["AIProfiles"] = Table(
+            ["ProfileName"],
+            [(f"AI Profile {index}",) for index in range(1, self.document_type_count + 1)],
+        )
+        self.tables["EventAutomatedTasks"] = Table(
+            ["Name"],
+            [(f"Event Task {index}",) for index in range(1, self.workflow_count + 1)],
+        )
+        self.tables["RISchedules"] = Table(
+            ["ParentId", "ScheduleType", "ProcessingInterval", "ProcessingIntervalType"],
+            [
+                (index, 2, 15, 1)
+                for index in range(1, self.document_type_count + 1, 2)
+            ],
+        )
+
+    def sproc_text(self, sproc_name: str) -> str:
+        """Returns the synthetic body of a stored procedure, as stored in its .sqldat."""
+
+        lines = [f"{{ACTION}} PROCEDURE [dbo].[{sproc_name}]\r\n", "AS\r\nBEGIN\r\n"]
+        lines += [f"    SELECT {index} AS Col{index};\r\n" for index in range(200)]
+        lines.append("END\r\n")
+
+        return "".join(lines)
+
+    def document_types_with_props(self) -> list[dict]:
+        """Returns the DocumentTypes API payload with nested DocumentTypeProperties."""
+
+        props_by_doc_type: dict[int, list[dict]] = {}
+        for doc_type_prop in self.tables["DocumentTypePropertys"].as_dicts():
+            props_by_doc_type.setdefault(doc_type_prop["ParentId"], []).append(
+                doc_type_prop
+            )
+
+        doc_types = []
+        for doc_type in self.tables["DocumentTypes"].as_dicts():
+            doc_type["DocumentTypeProperties"] = props_by_doc_type.get(
+                doc_type["DocumentTypeId"], []
+            )
+            doc_types.append(doc_type)
+
+        return doc_types
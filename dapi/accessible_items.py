@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+
+from dataclasses import dataclass, field
+
+DEFAULT_TTL: float = 300.0
+
+
+@dataclass(frozen=True)
+class AccessibleItems:
+    """Dataclass to store the table and sproc names the API exposes to a user."""
+
+    tables: frozenset[str]
+    procedures: frozenset[str]
+    fetched_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_response(cls, response: dict) -> "AccessibleItems":
+        # Pull names out of inner dicts for ease of processing
+        return cls(
+            frozenset(table["Name"] for table in response["Tables"]),
+            frozenset(sproc["Name"] for sproc in response["Procedures"]),
+        )
+
+
+class AccessibleItemsCache:
+    """AccessibleItems listings keyed by site and user, each kept for ttl seconds.
+
+    One instance (ACCESSIBLE_ITEMS_CACHE) is shared by every DocLinkAPI, so
+    clients of the same site and user reuse one download. Call invalidate(key)
+    after creating or dropping tables or sprocs; clear_all() drops every site.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL) -> None:
+        self.ttl = ttl
+        self._items: dict[tuple, AccessibleItems] = {}
+        self._lock = threading.Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key: tuple) -> AccessibleItems | None:
+        """Returns the listing for key, or None if it is missing or expired."""
+
+        with self._lock:
+            items = self._items.get(key)
+            if items is None or time.monotonic() - items.fetched_at >= self.ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return items
+
+    def put(self, key: tuple, items: AccessibleItems) -> None:
+        with self._lock:
+            self._items[key] = items
+
+    def invalidate(self, key: tuple) -> None:
+        """Drops the listing for key."""
+
+        logging.debug(f"Invalidating accessible items for {key}")
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear_all(self) -> None:
+        """Drops the listings of every site and user."""
+
+        logging.debug("Clearing accessible items for all sites")
+        with self._lock:
+            self._items.clear()
+
+
+ACCESSIBLE_ITEMS_CACHE = AccessibleItemsCache()
@@ -3,7 +3,9 @@ import json
 
 from dataclasses import dataclass, asdict
 
+from .accessible_items import ACCESSIBLE_ITEMS_CACHE, AccessibleItems, AccessibleItemsCache
 from .http_handler import HTTPHandler
+from ..interning import ValueInterner
 
 from doclink_py.doclink_types.propertys import Property  
 from doclink_py.doclink_types.documents import DocumentType, DocumentTypeProperty
@@ -25,6 +27,7 @@ QUERY_TABLE_URL: str = "QueryTable"
 
 WORKFLOW_TABLE_NAME: str = "Workflows"
 WORKFLOW_ACTIVITIES_TABLE_NAME: str = "WorkflowActivities"
+WORKFLOW_NEXT_ACTIVITY_TABLE_NAME: str = "WorkflowNextActivity"
 DIST_STAMP_TABLE_NAME: str = "DynamicUI"
 DIST_STAMP_FIELD_TABLE_NAME: str = "DynamicUIField"
 AI_PROFILE_TABLE_NAME: str = "AIProfiles"
@@ -46,13 +49,26 @@ class DocLinkAPI:
     def __init__(self, base_url: str = BASE_URL) -> None:
         self.http_handler: HTTPHandler = None
 
-        self._gai_has_run = False
-        self.gai_cache: dict[str, list] = {}
+        # Shared by every DocLinkAPI; keyed by site and user once connected
+        self.accessible_items_cache: AccessibleItemsCache = ACCESSIBLE_ITEMS_CACHE
+        self._accessible_items_key: tuple = None
+
+        # Seconds per request, None waits forever
+        self.timeout: float | None = None
+
+        # Shares repeated values across loaded rows; see interner.summary()
+        self.interner: ValueInterner = ValueInterner()
 
     def connect(self, credentials: DocLinkAPICredentails) -> None:
         "Automatically logs into cloud or on prem depending on site code"
 
         self.http_handler = HTTPHandler(credentials.URL)
+        self.http_handler.timeout = self.timeout
+        self._accessible_items_key = (
+            credentials.URL,
+            credentials.SiteCode,
+            credentials.UserId,
+        )
 
         if credentials.SiteCode:
             logging.debug("Site code found, logging into cloud")
@@ -104,7 +120,7 @@ class DocLinkAPI:
         for doc_type in response:
             # Convert inner properties to dataclass
             doc_type["DocumentTypeProperties"] = [
-                DocumentTypeProperty(**prop)
+                DocumentTypeProperty(**self.interner.intern_dict(prop))
                 for prop in doc_type["DocumentTypeProperties"]
             ]
             for doc_type_property in doc_type["DocumentTypeProperties"]:
@@ -114,7 +130,7 @@ class DocLinkAPI:
                     for prop in properties
                     if prop.PropertyId == doc_type_property.PropertyId
                 )
-            doc_types.append(DocumentType(**doc_type))
+            doc_types.append(DocumentType(**self.interner.intern_dict(doc_type)))
 
         return doc_types
 
@@ -124,7 +140,7 @@ class DocLinkAPI:
         logging.info("Sending get all properties request")
         response: dict = self.http_handler.get_request(GET_ALL_PROPERTIES_URL)
 
-        propertys = [Property(**prop) for prop in response]
+        propertys = [Property(**self.interner.intern_dict(prop)) for prop in response]
 
         return propertys
 
@@ -153,27 +169,38 @@ class DocLinkAPI:
         logging.debug("Get_doc_type_propertys not implemented by API")
         raise NotImplementedError("Support by SQL but not API")
 
-    def check_if_sproc_exists(self, sproc_name: str) -> int:
-        """Checks if a sproc exists in the database"""
+    def check_if_sproc_exists(self, sproc_name: str, refresh: bool = False) -> int:
+        """Checks if a sproc exists in the database, refresh skips the cached listing"""
 
         logging.info(f"Checking if sproc {sproc_name} exists")
-        response: dict = self._get_accessable_items(refresh=True)
 
-        exists = 0
-        if sproc_name in response["Procedures"]:
-            exists = 1
+        return int(sproc_name in self._get_accessable_items(refresh).procedures)
 
-        return exists
+    def existing_sprocs(self, sproc_names: list[str], refresh: bool = False) -> set[str]:
+        """Returns the given sprocs that exist in the database, from one listing"""
 
-    def does_table_exist(self, table_name: str) -> bool:
-        """Checks if a table exists in the database"""
+        return set(sproc_names) & self._get_accessable_items(refresh).procedures
 
-        # self._get_accessable_items()
+    def does_table_exist(self, table_name: str, refresh: bool = False) -> bool:
+        """Checks if a table exists in the database, refresh skips the cached listing"""
 
         logging.info(f"Checking if table {table_name} exists")
-        response: dict = self._get_accessable_items(True)
 
-        return table_name in response["Tables"]
+        return table_name in self._get_accessable_items(refresh).tables
+
+    def existing_tables(self, table_names: list[str], refresh: bool = False) -> set[str]:
+        """Returns the given tables that exist in the database, from one listing"""
+
+        return set(table_names) & self._get_accessable_items(refresh).tables
+
+    def invalidate_accessible_items(self) -> None:
+        """Forces the next existence check to download AccessibleItems again."""
+
+        # Not connected yet, so nothing has been cached for this client
+        if self._accessible_items_key is None:
+            return
+
+        self.accessible_items_cache.invalidate(self._accessible_items_key)
 
     def commit_sproc_from_file(self, sproc_name: str, action: str) -> None:
         raise NotImplementedError("Not implemented by API")
@@ -184,10 +211,16 @@ class DocLinkAPI:
         logging.info("drop_staging_tables not implemented")
         raise NotImplementedError("drop_staging_tables not implemented by API")
 
+    def migrate_staging_tables(self, ddl, droppable_columns: set[str] = frozenset()):
+        """Brings the staging tables to the columns of ddl without rebuilding them."""
+
+        logging.info("migrate_staging_tables not implemented")
+        raise NotImplementedError("'migrate_staging_tables' Not implemented by API")
+
     def query_table(self, table_name: str) -> None:
         """Get a specific property."""
 
-        if table_name not in self._get_accessable_items()["Tables"]:
+        if table_name not in self._get_accessable_items().tables:
             logging.debug(f"Table {table_name} not found")
             raise Exception(
                 "TABLE_NOT_WHITELISTED", f"Table {table_name} not whitelisted"
@@ -211,6 +244,9 @@ class DocLinkAPI:
         with open("StagingFromProp.sql", "w") as f:
             f.write(query)
 
+        # The script is run by hand; don't answer from the listing taken before it
+        self.invalidate_accessible_items()
+
     def get_table_schema(self, table_name: str) -> None:
         """Get a specific property."""
 
@@ -234,7 +270,7 @@ class DocLinkAPI:
 
         workflows = [
             doclink_types.workflows.Workflow(
-                **utilities.api_row_to_json(row, response["Columns"])
+                **utilities.api_row_to_json(row, response["Columns"], self.interner)
             )
             for row in response["Rows"]
         ]
@@ -255,13 +291,36 @@ class DocLinkAPI:
 
         workflow_activities = [
             doclink_types.workflows.WorkflowActivity(
-                **utilities.api_row_to_json(row, response["Columns"])
+                **utilities.api_row_to_json(row, response["Columns"], self.interner)
             )
             for row in response["Rows"]
         ]
 
         return workflow_activities
 
+    def get_workflow_next_activities(
+        self,
+    ) -> list[doclink_types.workflows.WorkflowNextActivity]:
+        """Get all workflow next activity routes."""
+
+        logging.info("Getting workflow next activities from API")
+        try:
+            response: dict = self.query_table(WORKFLOW_NEXT_ACTIVITY_TABLE_NAME)
+        except Exception as e:
+            if e.args[0] == "TABLE_NOT_WHITELISTED":
+                logging.debug("Workflow next activity table not whitelisted")
+                return []
+            raise e
+
+        workflow_next_activities = [
+            doclink_types.workflows.WorkflowNextActivity(
+                **utilities.api_row_to_json(row, response["Columns"], self.interner)
+            )
+            for row in response["Rows"]
+        ]
+
+        return workflow_next_activities
+
     def get_dist_stamps(self) -> list[doclink_types.stamps.DistributionStamp]:
         """Get all distribution stamps."""
 
@@ -276,15 +335,17 @@ class DocLinkAPI:
 
         dist_stamps = [
             doclink_types.stamps.DistributionStamp(
-                **utilities.api_row_to_json(row, response["Columns"])
+                **utilities.api_row_to_json(row, response["Columns"], self.interner)
             )
             for row in response["Rows"]
         ]
 
         return dist_stamps
 
-    def get_dist_stamp_fields(self) -> list[doclink_types.stamps.DistributionStampField]:
-        """Get all distribution stamp fields."""
+    def get_dist_stamp_fields(
+        self, lazy: bool = True
+    ) -> list[doclink_types.stamps.DistributionStampField]:
+        """Get all distribution stamp fields. lazy=True decodes columns on use."""
 
         logging.info("Getting distribution stamp fields from API")
         try:
@@ -295,9 +356,16 @@ class DocLinkAPI:
                 return []
             raise e
 
+        if lazy:
+            return doclink_types.stamps.lazy_stamp_fields(
+                response["Rows"],
+                [column["Name"] for column in response["Columns"]],
+                self.interner,
+            )
+
         dist_stamp_fields = [
             doclink_types.stamps.DistributionStampField(
-                **utilities.api_row_to_json(row, response["Columns"])
+                **utilities.api_row_to_json(row, response["Columns"], self.interner)
             )
             for row in response["Rows"]
         ]
@@ -351,6 +419,8 @@ class DocLinkAPI:
         with open(DOC_EXPORT_BY_PROP_FILE_NAME, "w") as f:
             f.write(query)
 
+        self.invalidate_accessible_items()
+
     def create_basic_sproc(self, sproc_name: str, action: str) -> None:
         """Creates basic sproc."""
 
@@ -359,6 +429,8 @@ class DocLinkAPI:
         with open(f"{sproc_name}.sql", "w") as f:
             f.write(query)
 
+        self.invalidate_accessible_items()
+
     def get_automated_task_sequence_number(self, activity_id: int) -> int:
         """Gets the automated task sequence for the given activity id."""
 
@@ -478,6 +550,29 @@ class DocLinkAPI:
             "'add_auto_index_return_property' Not implemented by API"
         )
 
+    def lock_doc_type_ai_sequences(self, doc_type_ids: list[int]) -> dict[int, int]:
+        """Locks and returns the current auto index count for each document type."""
+
+        logging.info("lock_doc_type_ai_sequences not implemented")
+        raise NotImplementedError(
+            "'lock_doc_type_ai_sequences' Not implemented by API"
+        )
+
+    def bulk_provision_auto_indexes(self, specs: list, enable_ai: bool = False) -> list:
+        """Creates and attaches many auto indexes in a single transaction."""
+
+        logging.info("bulk_provision_auto_indexes not implemented")
+        raise NotImplementedError(
+            "'bulk_provision_auto_indexes' Not implemented by API"
+        )
+
+    # TODO: Implement in API
+    def get_ri_schedules(self, refresh: bool = False) -> dict:
+        """Gets every RI schedule keyed by document type id, cached until refreshed."""
+
+        logging.info("get_ri_schedules not implemented")
+        raise NotImplementedError("'get_ri_schedules' Not implemented by API")
+
     # TODO: Implement in API
     def doc_ri_schedule_exists(self, doc_type_id: int) -> bool:
         """Checks if the doc ri schedule exists for the given document type."""
@@ -516,6 +611,42 @@ class DocLinkAPI:
         logging.info("update_doc_ri_schedule not implemented")
         raise NotImplementedError("'update_doc_ri_schedule' Not implemented by API")
 
+    def upsert_doc_ri_schedules(self, schedules: dict[int, tuple[int, int]]) -> None:
+        """Creates or updates RI schedules, keyed by doc type id, in one batch."""
+
+        logging.info("upsert_doc_ri_schedules not implemented")
+        raise NotImplementedError("'upsert_doc_ri_schedules' Not implemented by API")
+
+    def run_document_export(
+        self,
+        document_id: int,
+        success_activity_id: int,
+        failed_activity_id: int,
+        sproc_name: str = None,
+    ) -> None:
+        """Runs the export sproc for one document, as its AI script would, and commits."""
+
+        logging.info("run_document_export not implemented")
+        raise NotImplementedError("'run_document_export' Not implemented by API")
+
+    def run_ai_index_sproc(
+        self, document_ids: list[int], sproc_name: str = None
+    ) -> dict[int, str]:
+        """Runs the AI index sproc for each document in one transaction."""
+
+        logging.info("run_ai_index_sproc not implemented")
+        raise NotImplementedError("'run_ai_index_sproc' Not implemented by API")
+
+    def bulk_move_workflow_documents(
+        self, moves: list[tuple[int, int]], audit: bool = True, chunk_size: int = 5000
+    ) -> list:
+        """Moves many documents, given as (DocumentID, WorkflowActivityID) pairs."""
+
+        logging.info("bulk_move_workflow_documents not implemented")
+        raise NotImplementedError(
+            "'bulk_move_workflow_documents' Not implemented by API"
+        )
+
     # TODO: TEST
     def get_ai_profiles(self):
         """Gets the ai profiles of the database."""
@@ -546,6 +677,18 @@ class DocLinkAPI:
 
         return [event_task[0] for event_task in response["Rows"]]
 
+    def monitor_poller(self, **kwargs):
+        """Returns a poller for new rows in the export staging (monitor) table."""
+
+        logging.info("monitor_poller not implemented")
+        raise NotImplementedError("'monitor_poller' Not implemented by API")
+
+    def unit_of_work(self, batch: bool = False):
+        """Runs the calls in the block as one transaction, committed once on exit."""
+
+        logging.info("unit_of_work not implemented")
+        raise NotImplementedError("'unit_of_work' Not implemented by API")
+
     def run_query(self, query):
         """Run a query"""
 
@@ -559,21 +702,18 @@ class DocLinkAPI:
         logging.info("compare_sproc_from_file not implemented")
         raise NotImplementedError("'compare_sproc_from_file' Not implemented by API")
 
-    def _get_accessable_items(self, refresh: bool = False) -> dict[str, list]:
-        """Private function do get a dict of lists of available tables and sprocs"""
+    def _get_accessable_items(self, refresh: bool = False) -> AccessibleItems:
+        """Private function to get the available tables and sprocs, cached for a TTL"""
 
-        if self._gai_has_run and not refresh:
-            return self.gai_cache
+        if not refresh:
+            items = self.accessible_items_cache.get(self._accessible_items_key)
+            if items is not None:
+                return items
 
         logging.info("Sending get accessable items request")
         response: dict = self.http_handler.get_request(GET_ACCESSABLE_ITEMS_URL)
 
-        # Pull names out of inner dicts for ease of processing
-        self.gai_cache["Tables"] = [table["Name"] for table in response["Tables"]]
-        self.gai_cache["Procedures"] = [
-            sproc["Name"] for sproc in response["Procedures"]
-        ]
-
-        self._gai_has_run = True
+        items = AccessibleItems.from_response(response)
+        self.accessible_items_cache.put(self._accessible_items_key, items)
 
-        return self.gai_cache
+        return items
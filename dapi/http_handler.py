@@ -1,7 +1,8 @@
-import requests
 import json
 import logging
 
+from ..metrics import DEFAULT_METRICS, MetricsRegistry
+
 DEFAULT_AUTH_CODE: str = "none_yet"
 CLOUD_PREFIX: str = "CloudAPI/"
 ON_PREM_PREFIX: str = "DocLinkAPI/"
@@ -10,7 +11,7 @@ ON_PREM_PREFIX: str = "DocLinkAPI/"
 class HTTPHandler:
     """Class to handle HTTP requests, seperating business logic"""
 
-    def __init__(self, base_url: str) -> None:
+    def __init__(self, base_url: str, metrics: MetricsRegistry = None) -> None:
         """Initialize the HTTPHandler class."""
         self.base_url = base_url
         self.auth_code = DEFAULT_AUTH_CODE
@@ -24,6 +25,11 @@ class HTTPHandler:
 
         self.prefix: str = CLOUD_PREFIX
 
+        # Seconds, None waits forever (the requests default)
+        self.timeout: float | None = None
+
+        self.metrics: MetricsRegistry = metrics or DEFAULT_METRICS
+
     def set_mode_on_prem(self) -> None:
         """Set the prefix for the URL."""
         logging.debug(f"Setting prefix to {ON_PREM_PREFIX}")
@@ -51,15 +57,21 @@ class HTTPHandler:
         requires_auth: bool | None = True,
     ) -> dict | list:
         """Send a GET request to the specified URL."""
+        # Imported on first use to keep package import cheap
+        import requests
+
         logging.debug(f"Sending GET request to {url} with parameters {parameters}")
         self._check_authenticated(requires_auth)
 
-        response: requests.Response = requests.get(
-            self.base_url + self.prefix + url,
-            headers=self.header,
-            params=parameters,
-        )
-        response.raise_for_status()
+        with self.metrics.track("http", f"GET {url}") as sample:
+            response: requests.Response = requests.get(
+                self.base_url + self.prefix + url,
+                headers=self.header,
+                params=parameters,
+                timeout=self.timeout,
+            )
+            sample.bytes = len(response.content)
+            response.raise_for_status()
         logging.debug(f"Response: {json.dumps(response.json(), indent=4)}")
 
         return response.json()
@@ -68,17 +80,22 @@ class HTTPHandler:
         self, url: str, data: dict, requires_auth: bool | None = True
     ) -> dict | list:
         """Send a POST request to the specified URL."""
+        import requests
+
         logging.debug(
             f"Sending POST request to {url} with data {json.dumps(data, indent=4)}"
         )
         self._check_authenticated(requires_auth)
 
-        response: requests.Response = requests.post(
-            self.base_url + self.prefix + url,
-            headers=self.header,
-            data=json.dumps(data),
-        )
-        response.raise_for_status()
+        with self.metrics.track("http", f"POST {url}") as sample:
+            response: requests.Response = requests.post(
+                self.base_url + self.prefix + url,
+                headers=self.header,
+                data=json.dumps(data),
+                timeout=self.timeout,
+            )
+            sample.bytes = len(response.content)
+            response.raise_for_status()
 
         if not response.content:
             return {}
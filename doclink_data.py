@@ -2,6 +2,14 @@ from doclink_py.doclink_types.propertys import Property
 from doclink_py.doclink_types.documents import DocumentType
 from doclink_py.doclink_types.workflows import Workflow, WorkflowActivity
 from doclink_py.doclink_types.stamps import DistributionStamp, DistributionStampField
+from doclink_py.workflow_graph import WorkflowGraph
+from doclink_py import search_index
+from doclink_py.search_index import MetadataSearchIndex, SearchResult
+from doclink_py.staging_ddl import (
+    StagingDDL,
+    StagingDDLCompiler,
+    require_column_list,
+)
 
 import logging
 from dataclasses import dataclass
@@ -10,9 +18,10 @@ from uuid import UUID
 
 from typing import TYPE_CHECKING
 
-# if TYPE_CHECKING:
-from doclink_py.dapi.doclink_api import DocLinkAPI
-from doclink_py.sql.doclink_sql import DocLinkSQL
+# Only needed for annotations; importing them here would load requests and pyodbc
+if TYPE_CHECKING:
+    from doclink_py.dapi.doclink_api import DocLinkAPI
+    from doclink_py.sql.doclink_sql import DocLinkSQL
 
 
 @dataclass
@@ -36,12 +45,69 @@ class CreationType(Enum):
     WENNSOFT = 3
 
 
+def _source_key(*sources: list) -> tuple:
+    # The lists themselves, not id()s, which CPython reuses once a list is freed
+    return tuple((source, len(source)) for source in sources)
+
+
+def _same_sources(key: tuple, *sources: list) -> bool:
+    """Returns True if key was made from these same lists, still at the same lengths."""
+
+    return len(key) == len(sources) and all(
+        cached is source and length == len(source)
+        for (cached, length), source in zip(key, sources)
+    )
+
+
+class _LazyCollection:
+    """Descriptor for a DocLinkData collection that is fetched on first access."""
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        if self.name not in instance._collections:
+            instance._collections[self.name] = instance._load_collection(self.name)
+
+        return instance._collections[self.name]
+
+    def __set__(self, instance, value) -> None:
+        instance._collections[self.name] = value
+        instance._invalidate_derived()
+
+
 class DocLinkData:
+    properties = _LazyCollection()
+    document_types = _LazyCollection()
+    workflows = _LazyCollection()
+    workflow_activities = _LazyCollection()
+    workflow_next_activities = _LazyCollection()
+    distribution_stamps = _LazyCollection()
+    distribution_stamp_fields = _LazyCollection()
+    existing_ai_profiles = _LazyCollection()
+    existing_event_tasks = _LazyCollection()
+
     def __init__(self):
+        self._collections: dict[str, list] = {}
+        self._doclink_handler: "DocLinkAPI | DocLinkSQL" = None
+
+        # Built from the collections; set before them as setting one clears these
+        self._staging_ddl_compilers: dict[
+            CreationType, tuple[tuple, StagingDDLCompiler]
+        ] = {}
+        self._search_index: MetadataSearchIndex = None
+        self._search_index_sources: tuple = ()
+        self._workflow_graph: WorkflowGraph = None
+        self._workflow_graph_sources: tuple = ()
+
         self.properties: list[Property] = []
         self.document_types: list[DocumentType] = []
         self.workflows: list[Workflow] = []
         self.workflow_activities: list[WorkflowActivity] = []
+        # workflow_next_activities is left unset so it is fetched when the graph is first used
         self.distribution_stamps: list[DistributionStamp] = []
         self.distribution_stamp_fields: list[DistributionStampField] = []
 
@@ -62,8 +128,22 @@ class DocLinkData:
         self.sproc_info: dict[str, SPROCInfo] = {}
 
     # Using dependancy injection here as we move to more functional coding
-    def populate_data_types(self, doclink_handler: DocLinkAPI | DocLinkSQL) -> None:
-        """Gets the document types and properties from the server."""
+    def populate_data_types(
+        self, doclink_handler: "DocLinkAPI | DocLinkSQL", lazy: bool = False
+    ) -> None:
+        """Gets the document types and properties from the server.
+
+        With lazy=True nothing is fetched yet; each collection is loaded through the
+        handler on first access and then kept until refresh_collection is called.
+        """
+
+        self._doclink_handler = doclink_handler
+
+        if lazy:
+            logging.info("Document types and properties will be loaded on demand.")
+            self._collections.clear()
+            self._invalidate_derived()
+            return
 
         logging.info("Getting document types and properties...")
         logging.debug("Getting properties...")
@@ -84,14 +164,105 @@ class DocLinkData:
         self.distribution_stamps = doclink_handler.get_dist_stamp_with_fields()
         logging.debug("Document types and properties retrieved.")
 
+        if interner := getattr(doclink_handler, "interner", None):
+            logging.info(interner.summary())
+            interner.clear()
+
+    def refresh_collection(self, name: str) -> list:
+        """Re-fetches a single collection (e.g. "workflows") through the handler."""
+
+        if not isinstance(getattr(type(self), name, None), _LazyCollection):
+            raise Exception("INVALID_COLLECTION", f"Invalid collection name: {name}")
+
+        self._collections.pop(name, None)
+        self._invalidate_derived()
+
+        return getattr(self, name)
+
+    def _invalidate_derived(self) -> None:
+        """Drops everything built from the collections; call after editing one in place."""
+
+        self._staging_ddl_compilers.clear()
+        self._search_index = None
+        self._workflow_graph = None
+
+    def detach_handler(self) -> None:
+        """Loads every collection not fetched yet, then forgets the handler.
+
+        Call before the handler is disconnected; afterwards refresh_collection
+        returns empty lists instead of querying a closed connection.
+        """
+
+        for name, attribute in vars(type(self)).items():
+            if isinstance(attribute, _LazyCollection):
+                getattr(self, name)
+
+        self._doclink_handler = None
+
+    def is_collection_loaded(self, name: str) -> bool:
+        """Returns whether the collection has been fetched (or set) yet."""
+
+        return name in self._collections
+
+    def _load_collection(self, name: str) -> list:
+        """Fetches one collection through the populating handler."""
+
+        collection = self._fetch_collection(name)
+
+        # Each lazy load is a load of its own; don't hold its values until the next
+        if interner := getattr(self._doclink_handler, "interner", None):
+            logging.debug(interner.summary())
+            interner.clear()
+
+        return collection
+
+    def _fetch_collection(self, name: str) -> list:
+        handler = self._doclink_handler
+        if handler is None:
+            return []
+
+        logging.debug(f"Getting {name}...")
+        if name == "properties":
+            return handler.get_properties()
+        if name == "document_types":
+            return handler.get_doc_types_with_props(self.properties)
+        if name == "workflows":
+            return handler.get_workflows()
+        if name == "workflow_activities":
+            return handler.get_workflow_activities()
+        if name == "workflow_next_activities":
+            return handler.get_workflow_next_activities()
+        if name == "existing_ai_profiles":
+            return handler.get_ai_profiles()
+        if name == "existing_event_tasks":
+            return handler.get_event_task_names()
+        if name == "distribution_stamp_fields":
+            return handler.get_dist_stamp_fields()
+        if name == "distribution_stamps":
+            # Reuse the loaded fields instead of fetching DynamicUIField a second time
+            dist_stamps = handler.get_dist_stamps()
+            fields_by_stamp: dict[UUID, list[DistributionStampField]] = {}
+            for dist_stamp_field in self.distribution_stamp_fields:
+                fields_by_stamp.setdefault(dist_stamp_field.DynamicUIId, []).append(
+                    dist_stamp_field
+                )
+            for dist_stamp in dist_stamps:
+                dist_stamp.DistributionStampFields = fields_by_stamp.get(
+                    dist_stamp.DynamicUiId, []
+                )
+            return dist_stamps
+
+        raise Exception("INVALID_COLLECTION", f"Invalid collection name: {name}")
+
     def populate_sproc_info(
-        self, doclink_handler: DocLinkAPI | DocLinkSQL, sproc_names: list[str]
+        self, doclink_handler: "DocLinkAPI | DocLinkSQL", sproc_names: list[str]
     ):
         """Gets the document types and properties from the server."""
 
         logging.info("Getting stored procedure info...")
+        existing = doclink_handler.existing_sprocs(sproc_names)
         for sproc_name in sproc_names:
-            exists = doclink_handler.check_if_sproc_exists(sproc_name) > 0
+            exists = sproc_name in existing
             logging.info(f"{sproc_name} exists: {exists}")
 
             if sproc_name in self.sproc_info:
@@ -104,7 +275,7 @@ class DocLinkData:
             self.sproc_info[sproc_name] = SPROCInfo(sproc_name, exists)
 
     def identical_sproc_check(
-        self, doclink_handler: DocLinkAPI | DocLinkSQL, sproc_names: list[str]
+        self, doclink_handler: "DocLinkAPI | DocLinkSQL", sproc_names: list[str]
     ):
         """Checks if the stored procedures are identical."""
 
@@ -380,6 +551,79 @@ class DocLinkData:
             f"Invalid workflow activity name: {workflow_activity_name}",
         )
 
+    @property
+    def workflow_graph(self) -> WorkflowGraph:
+        """Routing graph over all workflows, recompiled when its source lists are replaced or resized."""
+
+        sources = (self.workflow_activities, self.workflow_next_activities)
+        if self._workflow_graph is None or not _same_sources(
+            self._workflow_graph_sources, *sources
+        ):
+            logging.debug("Compiling workflow graph...")
+            self._workflow_graph = WorkflowGraph(
+                self.workflow_activities, self.workflow_next_activities
+            )
+            self._workflow_graph_sources = _source_key(*sources)
+
+        return self._workflow_graph
+
+    def selected_workflow_route_is_valid(self) -> bool:
+        """Checks the selected staging -> staged -> success/failed activities are routable."""
+
+        graph = self.workflow_graph
+        return graph.is_chain_reachable(
+            self.selected_staging_wf_id,
+            self.selected_staged_wf_id,
+            self.selected_success_wf_id,
+        ) and graph.is_reachable(self.selected_staged_wf_id, self.selected_failed_wf_id)
+
+    @property
+    def search_index(self) -> MetadataSearchIndex:
+        """Name index over the loaded metadata, rebuilt when a source list is replaced or resized."""
+
+        sources = (
+            self.properties,
+            self.document_types,
+            self.workflows,
+            self.workflow_activities,
+            self.distribution_stamps,
+            self.distribution_stamp_fields,
+        )
+        if self._search_index is None or not _same_sources(
+            self._search_index_sources, *sources
+        ):
+            logging.debug("Building metadata search index...")
+            index = MetadataSearchIndex()
+            index.add_all(search_index.PROPERTY, self.properties, "UserPrompt")
+            index.add_all(search_index.DOCUMENT_TYPE, self.document_types, "Name")
+            index.add_all(search_index.WORKFLOW, self.workflows, "Title")
+            index.add_all(
+                search_index.WORKFLOW_ACTIVITY, self.workflow_activities, "Title"
+            )
+            index.add_all(
+                search_index.DISTRIBUTION_STAMP, self.distribution_stamps, "Name"
+            )
+            index.add_all(
+                search_index.DISTRIBUTION_STAMP_FIELD,
+                self.distribution_stamp_fields,
+                "Caption",
+            )
+            index.sort()
+            self._search_index = index
+            self._search_index_sources = _source_key(*sources)
+
+        return self._search_index
+
+    def search_metadata(
+        self, query: str, kinds: list[str] = None, limit: int = 10, fuzzy: bool = True
+    ) -> list[SearchResult]:
+        """Ranked prefix (and optionally fuzzy) lookup for autocomplete."""
+
+        if fuzzy:
+            return self.search_index.search(query, kinds, limit)
+
+        return self.search_index.prefix(query, kinds, limit)
+
     def sprocs_exists(self, sproc_name) -> bool:
         """Returns whether the given sproc exists."""
 
@@ -395,90 +639,112 @@ class DocLinkData:
 
         self.staging_table_columns[column_type] += columns
 
-    def create_prompt_type_string(
-        self, creation_type: CreationType, column_type: StagingTableColumType
-    ) -> str:
-        """Creates the field string for the given staging table."""
+    def staging_ddl_compiler(self, creation_type: CreationType) -> StagingDDLCompiler:
+        """Column fragment compiler, rebuilt when its source list is replaced or resized."""
 
         if creation_type == CreationType.DOC_TYPE:
-            column_str = "".join(
-                [
-                    self.get_property_by_fprompt(column).prompt_type_string
-                    for column in self.staging_table_columns[column_type]
-                ]
-            )
+            source = self.properties
         elif creation_type == CreationType.DIST_STAMP:
-            column_str = "".join(
-                [
-                    self.get_distribution_stamp_field_by_caption(
-                        column
-                    ).prompt_type_string
-                    for column in self.staging_table_columns[column_type]
-                ]
-            )
+            source = self.distribution_stamp_fields
         else:
             raise Exception(
                 "INVALID_CREATION_TYPE",
                 f"Invalid creation type: {creation_type}",
             )
 
-        return column_str[:-3]
+        cached = self._staging_ddl_compilers.get(creation_type)
+        if cached is None or not _same_sources(cached[0], source):
+            logging.debug(f"Compiling staging column fragments for {creation_type}...")
+            if creation_type == CreationType.DOC_TYPE:
+                compiler = StagingDDLCompiler.from_properties(source)
+            else:
+                compiler = StagingDDLCompiler.from_distribution_stamp_fields(source)
+            cached = (_source_key(source), compiler)
+            self._staging_ddl_compilers[creation_type] = cached
+
+        return cached[1]
+
+    def compile_staging_ddl(self, creation_type: CreationType) -> StagingDDL:
+        """Compiles every staging table and export sproc column list for the selection."""
+
+        return self.staging_ddl_compiler(creation_type).compile(
+            self.staging_table_columns.get(StagingTableColumType.HEADER, []),
+            self.staging_table_columns.get(StagingTableColumType.DETAIL, []),
+            strip=creation_type == CreationType.DOC_TYPE,
+        )
 
-    def create_prompt_string(
+    def _compile_for(
         self, creation_type: CreationType, column_type: StagingTableColumType
-    ) -> str:
-        """Creates the field string for the given staging table."""
+    ) -> StagingDDL:
+        """Compiles only the column_type list, so the other one can't fail this call."""
 
-        if creation_type == CreationType.DOC_TYPE:
-            column_str = "".join(
-                [
-                    self.get_property_by_fprompt(column).prompt_string
-                    for column in self.staging_table_columns[column_type]
-                ]
-            )
-        elif creation_type == CreationType.DIST_STAMP:
-            column_str = "".join(
-                [
-                    self.get_distribution_stamp_field_by_caption(column).prompt_string
-                    for column in self.staging_table_columns[column_type]
-                ]
-            )
-        else:
+        compiler = self.staging_ddl_compiler(creation_type)
+        if column_type not in self.staging_table_columns:
             raise Exception(
-                "INVALID_CREATION_TYPE",
-                f"Invalid creation type: {creation_type}",
+                "INVALID_COLUMN_TYPE",
+                f"No {column_type.value} columns selected for the staging table.",
             )
 
-        return column_str[:-3]
+        columns = self.staging_table_columns[column_type]
+        strip = creation_type == CreationType.DOC_TYPE
+        if column_type == StagingTableColumType.HEADER:
+            return compiler.compile(columns, [], strip=strip)
+        return compiler.compile([], columns, strip=strip)
 
-    def create_id_string(
+    def sync_staging_tables(
+        self,
+        doclink_handler: "DocLinkAPI | DocLinkSQL",
+        creation_type: CreationType,
+        drop_unselected: bool = False,
+    ) -> list[str]:
+        """Alters the staging tables to match staging_table_columns, keeping their rows.
+
+        With drop_unselected, columns of other properties (or stamp fields) that are
+        no longer selected are dropped, along with their staged values. Columns of
+        the staging template are never dropped, even if a property shares the name.
+        """
+
+        ddl = self.compile_staging_ddl(creation_type)
+        require_column_list(ddl.header_columns)
+        require_column_list(ddl.detail_columns)
+
+        droppable = (
+            self.staging_ddl_compiler(creation_type).column_names()
+            if drop_unselected
+            else set()
+        )
+
+        return doclink_handler.migrate_staging_tables(ddl, droppable)
+
+    def create_prompt_type_string(
         self, creation_type: CreationType, column_type: StagingTableColumType
     ) -> str:
         """Creates the field string for the given staging table."""
 
-        if creation_type == CreationType.DOC_TYPE:
-            column_str = "".join(
-                [
-                    self.get_property_by_fprompt(column).id_string
-                    for column in self.staging_table_columns[column_type]
-                ]
-            )
-        elif creation_type == CreationType.DIST_STAMP:
-            column_str = "".join(
-                [
-                    self.get_distribution_stamp_field_by_caption(
-                        column
-                    ).select_statement_string
-                    for column in self.staging_table_columns[column_type]
-                ]
-            )
-        else:
-            raise Exception(
-                "INVALID_CREATION_TYPE",
-                f"Invalid creation type: {creation_type}",
-            )
+        ddl = self._compile_for(creation_type, column_type)
+        if column_type == StagingTableColumType.HEADER:
+            return require_column_list(ddl.header_columns)
+        return require_column_list(ddl.detail_columns)
+
+    def create_prompt_string(
+        self, creation_type: CreationType, column_type: StagingTableColumType
+    ) -> str:
+        """Creates the field string for the given staging table."""
+
+        ddl = self._compile_for(creation_type, column_type)
+        if column_type == StagingTableColumType.HEADER:
+            return ddl.header_prompts
+        return ddl.detail_prompts
+
+    def create_id_string(
+        self, creation_type: CreationType, column_type: StagingTableColumType
+    ) -> str:
+        """Creates the field string for the given staging table."""
 
-        return column_str[:-3]
+        ddl = self._compile_for(creation_type, column_type)
+        if column_type == StagingTableColumType.HEADER:
+            return require_column_list(ddl.header_ids)
+        return require_column_list(ddl.detail_ids)
 
     def set_selected_workflow_data(
         self,
@@ -68,3 +68,16 @@ class DocumentType:
             f"Property {property_name} not found in document type {self.Name}",
         )
 
+
+@dataclass
+class RISchedule:
+    """Dataclass to store DocLink RI schedule data for a document type."""
+
+    ParentId: int
+    ScheduleType: int
+    ProcessingInterval: int
+    ProcessingIntervalType: int
+
+    @property
+    def attributes(self) -> tuple[int, int]:
+        return self.ProcessingInterval, self.ProcessingIntervalType
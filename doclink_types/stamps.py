@@ -136,6 +136,64 @@ class DistributionStampField:
         return self.Caption
 
 
+# Columns decoded up front; everything else is read from the row on first access
+EAGER_STAMP_FIELD_COLUMNS: tuple[str, ...] = (
+    "DynamicUIFieldId",
+    "DynamicUIId",
+    "Caption",
+    "DataType",
+)
+
+
+class LazyDistributionStampField(DistributionStampField):
+    """DistributionStampField that keeps the raw row and decodes other columns lazily.
+
+    columns maps column name to row position and is shared by every record of a
+    result set. Decoded values are cached on the instance.
+    """
+
+    def __init__(self, row: tuple, columns: dict[str, int]) -> None:
+        self._row = row
+        self._columns = columns
+        for name in EAGER_STAMP_FIELD_COLUMNS:
+            setattr(self, name, row[columns[name]])
+
+    def __getattr__(self, name: str):
+        # Only called for attributes that haven't been decoded (or set) yet
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            value = self._row[self._columns[name]]
+        except KeyError:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            ) from None
+        setattr(self, name, value)
+
+        return value
+
+    def __reduce__(self):
+        return (type(self), (self._row, self._columns))
+
+
+def lazy_stamp_fields(
+    rows: list[tuple], column_names: list[str], interner=None
+) -> list[LazyDistributionStampField]:
+    """Wraps result set rows as LazyDistributionStampFields sharing one column map.
+
+    interner (a ValueInterner) deduplicates the values held in the kept rows.
+    """
+
+    columns = {name: index for index, name in enumerate(column_names)}
+    if interner is not None:
+        return [
+            LazyDistributionStampField(interner.intern_row(row), columns)
+            for row in rows
+        ]
+
+    return [LazyDistributionStampField(tuple(row), columns) for row in rows]
+
+
 @dataclass
 class DistributionStamp:
     """Dataclass to store DocLink distribution stamp data."""
@@ -0,0 +1,168 @@
+import logging
+import time
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
+
+from doclink_py.doclink_sprocs import DOC_EXPORT_FROM_PROP_SPROC
+from doclink_py.sql.async_doclink_sql import DEFAULT_POOL_SIZE, DocLinkSQLPool
+from doclink_py.sql.doclink_sql import DocLinkSQLCredentials
+
+# Documents submitted but not finished, per connection. Bounds memory and how far
+# the runner reads ahead of a slow source or sink
+DEFAULT_PENDING_PER_CONNECTION: int = 2
+DEFAULT_PROGRESS_INTERVAL: int = 1000
+
+
+@dataclass
+class ExportResult:
+    """Dataclass to store the outcome of exporting one document."""
+
+    document_id: int
+    error: Exception | None = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class ExportReport:
+    """Dataclass to store the totals and throughput of an export run."""
+
+    exported: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return self.exported + self.failed
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.total / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Exported {self.exported}/{self.total} documents, {self.failed} failed, "
+            f"in {self.seconds:.1f}s ({self.documents_per_second:.1f} docs/s)"
+        )
+
+
+class DocumentExportRunner:
+    """Runs the document export sproc for many documents over a pool of connections.
+
+    DocumentIDs are pulled from the source only as workers free up, so at most
+    connections * pending_per_connection documents are in flight; a slow sink
+    (or a slow consumer of stream()) holds the source back too:
+
+        runner = DocumentExportRunner(credentials, success_id, failed_id, connections=8)
+        report = runner.run(document_ids, sink=lambda result: log.write(...))
+
+    Each document is its own transaction. A failed document is reported and its
+    connection replaced; the run continues.
+    """
+
+    def __init__(
+        self,
+        credentials: DocLinkSQLCredentials,
+        success_activity_id: int,
+        failed_activity_id: int,
+        sproc_name: str = DOC_EXPORT_FROM_PROP_SPROC,
+        connections: int = DEFAULT_POOL_SIZE,
+        pending_per_connection: int = DEFAULT_PENDING_PER_CONNECTION,
+        progress_interval: int = DEFAULT_PROGRESS_INTERVAL,
+    ) -> None:
+        self.credentials = credentials
+        self.success_activity_id = success_activity_id
+        self.failed_activity_id = failed_activity_id
+        self.sproc_name = sproc_name
+        self.connections = connections
+        self.max_pending = max(connections, connections * pending_per_connection)
+        self.progress_interval = progress_interval
+
+    def _export(self, pool: DocLinkSQLPool, document_id: int) -> ExportResult:
+        result = ExportResult(document_id)
+        start = time.perf_counter()
+
+        sql = None
+        try:
+            sql = pool.acquire()
+            sql.run_document_export(
+                document_id,
+                self.success_activity_id,
+                self.failed_activity_id,
+                self.sproc_name,
+            )
+        except Exception as error:
+            logging.error(f"Export failed for document {document_id}: {error}")
+            result.error = error
+            # Kept only if it still rolls back; the connection may be what failed
+            if sql is not None:
+                pool.recycle(sql)
+        else:
+            pool.release(sql)
+
+        result.seconds = time.perf_counter() - start
+
+        return result
+
+    def stream(self, document_ids: Iterable[int]) -> Iterator[ExportResult]:
+        """Yields each document's result as it finishes, reading the source as slots free up."""
+
+        pool = DocLinkSQLPool(self.credentials, self.connections)
+        executor = ThreadPoolExecutor(
+            max_workers=self.connections, thread_name_prefix="doclink-export"
+        )
+        source = iter(document_ids)
+        pending: set[Future] = set()
+        try:
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.max_pending:
+                    try:
+                        document_id = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(self._export, pool, document_id))
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            # Stopping early drops queued documents; running ones finish first
+            executor.shutdown(wait=True, cancel_futures=True)
+            pool.close()
+
+    def run(
+        self,
+        document_ids: Iterable[int],
+        sink: Callable[[ExportResult], None] = None,
+    ) -> ExportReport:
+        """Exports every document, passing each result to sink, and returns the totals."""
+
+        report = ExportReport()
+        start = time.perf_counter()
+        for result in self.stream(document_ids):
+            if result.ok:
+                report.exported += 1
+            else:
+                report.failed += 1
+
+            if sink is not None:
+                sink(result)
+
+            if self.progress_interval and report.total % self.progress_interval == 0:
+                report.seconds = time.perf_counter() - start
+                logging.info(report.summary())
+
+        report.seconds = time.perf_counter() - start
+        logging.info(report.summary())
+
+        return report
@@ -0,0 +1,326 @@
+import logging
+import math
+import time
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from doclink_py.dapi.doclink_api import DocLinkAPI, DocLinkAPICredentails
+from doclink_py.doclink_data import DocLinkData
+from doclink_py.sql.doclink_sql import DocLinkSQL, DocLinkSQLCredentials
+
+DEFAULT_MAX_WORKERS: int = 8
+DEFAULT_SITE_TIMEOUT: float = 300.0
+
+FleetCredentials = DocLinkSQLCredentials | DocLinkAPICredentails
+FleetOperation = Callable[[DocLinkSQL | DocLinkAPI], Any]
+
+
+def site_name(credentials: FleetCredentials) -> str:
+    """Returns a readable label for a site: server/database or site code/URL."""
+
+    if isinstance(credentials, DocLinkSQLCredentials):
+        return f"{credentials.server_name}/{credentials.database_name}"
+
+    return credentials.SiteCode or credentials.URL
+
+
+@dataclass
+class SiteResult:
+    """Dataclass to store the outcome of one operation on one site."""
+
+    site: str
+    credentials: FleetCredentials
+    value: Any = None
+    error: Exception | None = None
+    seconds: float = 0.0
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+
+@dataclass
+class FleetReport:
+    """Dataclass to store every site result of a fleet run and its wall clock time."""
+
+    operation: str
+    results: list[SiteResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def succeeded(self) -> list[SiteResult]:
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> list[SiteResult]:
+        return [
+            result
+            for result in self.results
+            if result.error is not None and not result.timed_out
+        ]
+
+    @property
+    def timed_out(self) -> list[SiteResult]:
+        return [result for result in self.results if result.timed_out]
+
+    @property
+    def site_seconds(self) -> float:
+        """Sum of per site time, i.e. roughly how long a serial sweep would take."""
+        return sum(result.seconds for result in self.results)
+
+    def slowest(self, count: int = 5) -> list[SiteResult]:
+        return sorted(self.results, key=lambda result: result.seconds, reverse=True)[
+            :count
+        ]
+
+    def summary(self) -> str:
+        return (
+            f"{self.operation}: {len(self.succeeded)}/{len(self.results)} sites ok, "
+            f"{len(self.failed)} failed, {len(self.timed_out)} timed out in "
+            f"{self.seconds:.1f}s ({self.site_seconds:.1f}s of site time)"
+        )
+
+
+class DocLinkFleet:
+    """Runs one operation across many DocLink sites on a bounded thread pool.
+
+    Each site gets its own DocLinkSQL or DocLinkAPI connection, chosen by the
+    credentials type. Results are streamed as sites finish. A site that runs past
+    timeout is reported as timed out; its driver level timeout (set to the same
+    value) is what eventually frees the worker, since threads can't be killed.
+    """
+
+    def __init__(
+        self,
+        credentials: list[FleetCredentials],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: float = DEFAULT_SITE_TIMEOUT,
+    ) -> None:
+        self.credentials = credentials
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    def _connect(self, credentials: FleetCredentials) -> DocLinkSQL | DocLinkAPI:
+        if isinstance(credentials, DocLinkSQLCredentials):
+            handler = DocLinkSQL(credentials)
+            handler.timeout = math.ceil(self.timeout) if self.timeout else 0
+            handler.connect()
+        elif isinstance(credentials, DocLinkAPICredentails):
+            handler = DocLinkAPI()
+            handler.timeout = self.timeout
+            handler.connect(credentials)
+        else:
+            raise Exception(
+                "INVALID_CREDENTIALS", f"Unsupported credentials: {type(credentials)}"
+            )
+
+        return handler
+
+    def _run_site(
+        self,
+        credentials: FleetCredentials,
+        operation: FleetOperation,
+        started: dict[int, float],
+        index: int,
+    ) -> SiteResult:
+        result = SiteResult(site_name(credentials), credentials)
+        started[index] = time.perf_counter()
+
+        handler = None
+        try:
+            handler = self._connect(credentials)
+            result.value = operation(handler)
+        except Exception as error:
+            logging.error(f"Fleet operation failed on {result.site}: {error}")
+            result.error = error
+        finally:
+            if handler is not None:
+                try:
+                    handler.disconnect()
+                except Exception as error:
+                    logging.warning(f"Disconnect failed on {result.site}: {error}")
+
+        result.seconds = time.perf_counter() - started[index]
+
+        return result
+
+    def stream(self, operation: FleetOperation) -> Iterator[SiteResult]:
+        """Yields each site's result as soon as it finishes or times out."""
+
+        # Written by workers as each site starts, so queueing time doesn't count
+        started: dict[int, float] = {}
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="doclink-fleet"
+        )
+        try:
+            pending: dict[Future, int] = {
+                executor.submit(
+                    self._run_site, credentials, operation, started, index
+                ): index
+                for index, credentials in enumerate(self.credentials)
+            }
+
+            while pending:
+                now = time.perf_counter()
+                deadlines = [
+                    started[index] + self.timeout
+                    for index in pending.values()
+                    if index in started
+                ]
+                wait_seconds = (
+                    max(0.0, min(deadlines) - now) if self.timeout and deadlines else None
+                )
+                # Sites that haven't started yet have no deadline; poll for them
+                if self.timeout and len(deadlines) < len(pending):
+                    wait_seconds = 1.0 if wait_seconds is None else min(wait_seconds, 1.0)
+
+                done, _ = wait(pending, timeout=wait_seconds, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future)
+                    yield future.result()
+
+                if not self.timeout:
+                    continue
+
+                now = time.perf_counter()
+                for future, index in list(pending.items()):
+                    if index in started and now - started[index] > self.timeout:
+                        pending.pop(future)
+                        credentials = self.credentials[index]
+                        logging.error(
+                            f"Fleet operation timed out on {site_name(credentials)}"
+                        )
+                        yield SiteResult(
+                            site_name(credentials),
+                            credentials,
+                            error=TimeoutError(f"Site exceeded {self.timeout}s"),
+                            seconds=now - started[index],
+                            timed_out=True,
+                        )
+        finally:
+            # Don't block on timed out workers; queued sites are dropped if we stop early
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, operation: FleetOperation, name: str = None) -> FleetReport:
+        """Runs operation on every site and returns the collected results."""
+
+        report = FleetReport(name or getattr(operation, "__name__", "operation"))
+        start = time.perf_counter()
+        for result in self.stream(operation):
+            report.results.append(result)
+        report.seconds = time.perf_counter() - start
+        logging.info(report.summary())
+
+        return report
+
+
+def populate(lazy: bool = False) -> FleetOperation:
+    """Operation returning a fully loaded DocLinkData for each site.
+
+    The fleet disconnects each site once the operation returns, so the data is
+    detached from its handler and lazy loading isn't supported.
+    """
+
+    if lazy:
+        raise Exception(
+            "INVALID_ARGUMENT",
+            "Fleet populate can't be lazy; sites are disconnected once it returns.",
+        )
+
+    def populate(handler: DocLinkSQL | DocLinkAPI) -> DocLinkData:
+        data = DocLinkData()
+        data.populate_data_types(handler)
+        data.detach_handler()
+        return data
+
+    return populate
+
+
+def check_sproc_drift(sproc_names: list[str]) -> FleetOperation:
+    """Operation returning {sproc: matches .sqldat} per site; None if the sproc is missing."""
+
+    def check_sproc_drift(handler: DocLinkSQL | DocLinkAPI) -> dict[str, bool | None]:
+        drift: dict[str, bool | None] = {}
+        existing = handler.existing_sprocs(sproc_names)
+        for sproc_name in sproc_names:
+            if sproc_name not in existing:
+                drift[sproc_name] = None
+            else:
+                drift[sproc_name] = handler.compare_sproc_from_file(sproc_name)
+        return drift
+
+    return check_sproc_drift
+
+
+def deploy_sprocs(sproc_names: list[str], only_drifted: bool = True) -> FleetOperation:
+    """Operation creating missing sprocs and altering changed ones; returns those deployed."""
+
+    def deploy_sprocs(handler: DocLinkSQL | DocLinkAPI) -> list[str]:
+        deployed = []
+        existing = handler.existing_sprocs(sproc_names)
+        for sproc_name in sproc_names:
+            exists = sproc_name in existing
+            if exists and only_drifted and handler.compare_sproc_from_file(sproc_name):
+                continue
+            handler.commit_sproc_from_file(sproc_name, "ALTER" if exists else "CREATE")
+            deployed.append(sproc_name)
+        return deployed
+
+    return deploy_sprocs
+
+
+def provision_export_events(
+    task_name: str,
+    sproc_name: str,
+    staged_activity: str,
+    success_activity: str,
+    failed_activity: str,
+    start_active: bool = False,
+) -> FleetOperation:
+    """Operation adding the triggered export event on the staged activity of each site.
+
+    Activities are resolved by title per site. On SQL sites the task, its database
+    action and parameters are created in one transaction, so a failure leaves
+    nothing behind. Sites that already have task_name are skipped (the operation
+    returns None), so a fleet run can be safely repeated.
+    """
+
+    def provision_export_events(handler: DocLinkSQL | DocLinkAPI) -> int | None:
+        if task_name in handler.get_event_task_names():
+            logging.info(f"Event task {task_name} already exists, skipping.")
+            return None
+
+        activity_ids: dict[str, int] = {}
+        for activity in handler.get_workflow_activities():
+            activity_ids.setdefault(activity.Title, activity.WorkflowActivityID)
+
+        for activity_name in (staged_activity, success_activity, failed_activity):
+            if activity_name not in activity_ids:
+                raise Exception(
+                    "INVALID_WORKFLOW_ACTIVITY_NAME",
+                    f"Invalid workflow activity name: {activity_name}",
+                )
+
+        staged_id = activity_ids[staged_activity]
+        unit = handler.unit_of_work() if isinstance(handler, DocLinkSQL) else nullcontext()
+        with unit:
+            task_id = handler.create_triggered_event(task_name, staged_id, start_active)
+            db_action_id = handler.add_event_database_action(
+                task_id, task_name, sproc_name
+            )
+            for param_name, activity_name in (
+                ("@Staged", staged_activity),
+                ("@ImportSuccess", success_activity),
+                ("@ImportFailed", failed_activity),
+            ):
+                handler.add_event_db_action_param(
+                    db_action_id, param_name, str(activity_ids[activity_name])
+                )
+
+        return task_id
+
+    return provision_export_events
@@ -0,0 +1,99 @@
+import logging
+import sys
+
+from typing import Any
+
+# CPython already shares these, so interning them saves nothing
+_SKIPPED_TYPES: tuple[type, ...] = (bool, type(None))
+_SMALL_INT_RANGE = range(-5, 257)
+
+# Repeated values (timestamps, ModifiedBy ids, parent UUIDs, fonts) show up in the first
+# rows, so once the table is this large only already known values are shared
+DEFAULT_MAX_VALUES: int = 50000
+
+
+class ValueInterner:
+    """Deduplicates repeated row values (strings, UUIDs, ids, timestamps) during loads.
+
+    Each distinct value is kept once and every later equal value is swapped for
+    that instance, so tens of thousands of rows share the same few Created/Modified
+    strings, ModifiedBy ids and parent UUIDs. Values are looked up per type, so 1
+    and 1.0 are never merged. The table is capped at max_values; call clear() once
+    a load is done, the loaded records keep the shared values alive.
+    """
+
+    def __init__(self, enabled: bool = True, max_values: int = DEFAULT_MAX_VALUES) -> None:
+        self.enabled = enabled
+        self.max_values = max_values
+        self._values: dict[type, dict[Any, Any]] = {}
+        self._size: int = 0
+
+        self.values_seen: int = 0
+        self.duplicates: int = 0
+        self.bytes_saved: int = 0
+
+    def intern(self, value: Any) -> Any:
+        """Returns the shared instance equal to value."""
+
+        if not self.enabled or isinstance(value, _SKIPPED_TYPES):
+            return value
+        if type(value) is int and value in _SMALL_INT_RANGE:
+            return value
+
+        values = self._values.get(type(value))
+        if values is None:
+            values = self._values[type(value)] = {}
+
+        try:
+            shared = values.get(value)
+        except TypeError:
+            # Unhashable (e.g. a nested list); keep as is
+            return value
+
+        self.values_seen += 1
+        if shared is None:
+            if self._size < self.max_values:
+                values[value] = value
+                self._size += 1
+            return value
+
+        if shared is not value:
+            self.duplicates += 1
+            self.bytes_saved += sys.getsizeof(value)
+
+        return shared
+
+    def intern_row(self, row) -> tuple:
+        """Returns row as a tuple of shared values."""
+
+        if not self.enabled:
+            return tuple(row)
+        return tuple([self.intern(value) for value in row])
+
+    def intern_dict(self, values: dict) -> dict:
+        """Interns the values of a row dict in place (keys are already shared) and returns it."""
+
+        if self.enabled:
+            for key, value in values.items():
+                values[key] = self.intern(value)
+        return values
+
+    def clear(self) -> None:
+        """Drops the shared table; values still referenced by records are unaffected."""
+
+        self._values.clear()
+        self._size = 0
+
+    def reset_stats(self) -> None:
+        self.values_seen = 0
+        self.duplicates = 0
+        self.bytes_saved = 0
+
+    def summary(self) -> str:
+        return (
+            f"Interned {self.values_seen} values: {self._size} shared, "
+            f"{self.duplicates} duplicates, ~{self.bytes_saved / 1024:.1f} KiB saved"
+        )
+
+    def log_summary(self, label: str) -> None:
+        logging.debug(f"{label}: {self.summary()}")
@@ -0,0 +1,223 @@
+import os
+import re
+import threading
+import time
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from .tracing import record_round_trip
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    float("inf"),
+)
+
+METRIC_PREFIX: str = "doclink"
+
+_STRING_LITERAL = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w\]\[])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_REPEATED_GROUPS = re.compile(r"(\((?:[^()]|\([^()]*\))*\))(?:\s*,\s*\1)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint_query(query: str) -> str:
+    """Normalizes a SQL statement so identical statements with different literals match."""
+
+    fingerprint = _STRING_LITERAL.sub("?", query)
+    fingerprint = _NUMBER_LITERAL.sub("?", fingerprint)
+    fingerprint = _WHITESPACE.sub(" ", fingerprint).strip()
+    fingerprint = _PLACEHOLDER_LIST.sub("?, ...", fingerprint)
+    fingerprint = _REPEATED_GROUPS.sub(r"\1, ...", fingerprint)
+
+    return fingerprint
+
+
+@dataclass
+class RoundTripSample:
+    """Dataclass filled in by the caller while a round trip is being timed."""
+
+    kind: str
+    key: str
+    rows: int = 0
+    bytes: int = 0
+    error: bool = False
+    seconds: float = 0.0
+
+
+@dataclass
+class OperationMetrics:
+    """Dataclass to store the aggregated metrics for one fingerprint."""
+
+    count: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    buckets: list[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+
+    def add(self, sample: RoundTripSample) -> None:
+        self.count += 1
+        self.errors += int(sample.error)
+        self.total_seconds += sample.seconds
+        self.max_seconds = max(self.max_seconds, sample.seconds)
+        self.rows += sample.rows
+        self.bytes += sample.bytes
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if sample.seconds <= bound:
+                self.buckets[index] += 1
+                break
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_seconds": self.total_seconds,
+            "mean_seconds": self.mean_seconds,
+            "max_seconds": self.max_seconds,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "buckets": {
+                _format_bound(bound): count
+                for bound, count in zip(LATENCY_BUCKETS, self.buckets)
+            },
+        }
+
+
+class MetricsRegistry:
+    """Thread safe store of round trip metrics keyed by (kind, fingerprint)."""
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._metrics: dict[tuple[str, str], OperationMetrics] = {}
+
+    @contextmanager
+    def track(self, kind: str, key: str) -> Iterator[RoundTripSample]:
+        """Times the wrapped round trip. The caller may set rows/bytes on the sample."""
+
+        sample = RoundTripSample(kind, key)
+        start = time.perf_counter()
+        try:
+            yield sample
+        except BaseException:
+            sample.error = True
+            raise
+        finally:
+            sample.seconds = time.perf_counter() - start
+            self.record(sample)
+
+    def record(self, sample: RoundTripSample) -> None:
+        """Adds a finished sample to the registry and any active round trip traces."""
+
+        record_round_trip(sample)
+
+        if self.enabled:
+            with self._lock:
+                metrics = self._metrics.get((sample.kind, sample.key))
+                if metrics is None:
+                    metrics = self._metrics[(sample.kind, sample.key)] = OperationMetrics()
+                metrics.add(sample)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+    def snapshot(self) -> dict[str, dict[str, dict]]:
+        """Returns a copy of the metrics as {kind: {fingerprint: metrics}}."""
+
+        with self._lock:
+            items = [(key, metrics.to_dict()) for key, metrics in self._metrics.items()]
+
+        snapshot: dict[str, dict[str, dict]] = {}
+        for (kind, key), metrics in items:
+            snapshot.setdefault(kind, {})[key] = metrics
+
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        """Renders the metrics in the Prometheus text exposition format."""
+
+        with self._lock:
+            items = sorted(
+                (key, metrics.to_dict()) for key, metrics in self._metrics.items()
+            )
+
+        name = f"{METRIC_PREFIX}_round_trip"
+        counters = [
+            ("s_total", "count", "Round trips to SQL Server or the DocLink API."),
+            ("_errors_total", "errors", "Round trips that raised an error."),
+            ("_rows_total", "rows", "Rows returned by round trips."),
+            ("_bytes_total", "bytes", "Response bytes returned by round trips."),
+        ]
+
+        lines: list[str] = []
+        for suffix, field_name, help_text in counters:
+            lines += [
+                f"# HELP {name}{suffix} {help_text}",
+                f"# TYPE {name}{suffix} counter",
+            ]
+            for (kind, key), metrics in items:
+                lines.append(f"{name}{suffix}{_labels(kind, key)} {metrics[field_name]}")
+
+        lines += [
+            f"# HELP {name}_seconds Round trip latency in seconds.",
+            f"# TYPE {name}_seconds histogram",
+        ]
+        for (kind, key), metrics in items:
+            cumulative = 0
+            for bound, count in metrics["buckets"].items():
+                cumulative += count
+                labels = _labels(kind, key, le=bound)
+                lines.append(f"{name}_seconds_bucket{labels} {cumulative}")
+            labels = _labels(kind, key)
+            lines.append(f"{name}_seconds_sum{labels} {metrics['total_seconds']}")
+            lines.append(f"{name}_seconds_count{labels} {metrics['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Writes the Prometheus text to path, e.g. for the node exporter textfile collector."""
+
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            f.write(self.to_prometheus())
+
+        # Replace atomically so scrapers never read a half written file
+        os.replace(temp_path, path)
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(kind: str, key: str, le: str = None) -> str:
+    labels = f'kind="{_escape_label(kind)}",key="{_escape_label(key)}"'
+    if le is not None:
+        labels += f',le="{le}"'
+    return "{" + labels + "}"
+
+
+# Shared by every SQLHandler and HTTPHandler unless one is given its own registry
+DEFAULT_METRICS = MetricsRegistry()
@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import time
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from doclink_py.doclink_sprocs import DOC_EXPORT_AI_INDEX_SPROC
+from doclink_py.sql.async_doclink_sql import DEFAULT_POOL_SIZE, DocLinkSQLPool
+from doclink_py.sql.doclink_sql import DocLinkSQLCredentials
+from doclink_py.utilities import chunk_list, read_checkpoint, write_checkpoint
+
+DEFAULT_CHUNK_SIZE: int = 500
+DEFAULT_PROGRESS_INTERVAL: int = 20
+
+
+@dataclass
+class ReindexReport:
+    """Dataclass to store the totals and throughput of an AI re-index run.
+
+    failed_documents includes those recorded by earlier runs of the same checkpoint.
+    """
+
+    documents: int = 0
+    processed: int = 0
+    indexed: int = 0
+    skipped: int = 0
+    failed_documents: dict[int, str] = field(default_factory=dict)
+    failed_chunks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.processed / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Re-indexed {self.indexed}/{self.documents} documents "
+            f"({self.skipped} already done), {len(self.failed_documents)} failed, "
+            f"{self.failed_chunks} chunks failed, in {self.seconds:.1f}s "
+            f"({self.documents_per_second:.1f} docs/s)"
+        )
+
+
+def _fingerprint(document_ids: list[int], chunk_size: int, sproc_name: str) -> str:
+    digest = hashlib.sha1(f"{sproc_name}:{chunk_size}:".encode())
+    digest.update(",".join(map(str, document_ids)).encode())
+    return digest.hexdigest()
+
+
+class AIReindexDriver:
+    """Runs Custom_DocumentExport_AI_IndexProperties over large DocumentID sets.
+
+    The ids are de-duplicated, sorted and split into chunks; each chunk runs
+    server side in one batch and transaction, spread over a pool of connections.
+    With checkpoint_path, finished chunks are recorded as they complete, so
+    running again with the same ids resumes where it stopped. Chunks that failed
+    as a whole are retried on the next run; documents the sproc rejected are
+    reported, not retried.
+    """
+
+    def __init__(
+        self,
+        credentials: DocLinkSQLCredentials,
+        sproc_name: str = DOC_EXPORT_AI_INDEX_SPROC,
+        connections: int = DEFAULT_POOL_SIZE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        checkpoint_path: str = None,
+        progress_interval: int = DEFAULT_PROGRESS_INTERVAL,
+    ) -> None:
+        self.credentials = credentials
+        self.sproc_name = sproc_name
+        self.connections = connections
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path
+        self.progress_interval = progress_interval
+
+    def _run_chunk(self, pool: DocLinkSQLPool, chunk: list[int]) -> dict[int, str]:
+        sql = pool.acquire()
+        try:
+            failed = sql.run_ai_index_sproc(chunk, self.sproc_name)
+        except Exception:
+            # Kept only if it still rolls back; the connection may be what failed
+            pool.recycle(sql)
+            raise
+
+        pool.release(sql)
+
+        return failed
+
+    def _load_checkpoint(self, fingerprint: str) -> tuple[set[int], dict[int, str]]:
+        state = read_checkpoint(self.checkpoint_path) if self.checkpoint_path else None
+        if state is None:
+            return set(), {}
+
+        if state.get("fingerprint") != fingerprint:
+            logging.warning(
+                f"Checkpoint {self.checkpoint_path} is for a different run; starting over."
+            )
+            return set(), {}
+
+        return set(state["completed_chunks"]), {
+            int(document_id): error
+            for document_id, error in state["failed_documents"].items()
+        }
+
+    def _save_checkpoint(
+        self, fingerprint: str, completed: set[int], failed: dict[int, str]
+    ) -> None:
+        if self.checkpoint_path:
+            write_checkpoint(
+                self.checkpoint_path,
+                {
+                    "fingerprint": fingerprint,
+                    "completed_chunks": sorted(completed),
+                    "failed_documents": failed,
+                },
+            )
+
+    def run(self, document_ids: Iterable[int]) -> ReindexReport:
+        """Re-indexes every document and returns the totals."""
+
+        ids = sorted({int(document_id) for document_id in document_ids})
+        chunks = chunk_list(ids, self.chunk_size)
+        fingerprint = _fingerprint(ids, self.chunk_size, self.sproc_name)
+        completed, failed = self._load_checkpoint(fingerprint)
+
+        report = ReindexReport(documents=len(ids))
+        report.failed_documents.update(failed)
+        report.skipped = sum(len(chunks[index]) for index in completed)
+
+        remaining = [index for index in range(len(chunks)) if index not in completed]
+        logging.info(
+            f"Re-indexing {len(ids)} documents in {len(remaining)}/{len(chunks)} chunks "
+            f"over {self.connections} connections"
+        )
+
+        start = time.perf_counter()
+        pool = DocLinkSQLPool(self.credentials, self.connections)
+        executor = ThreadPoolExecutor(
+            max_workers=self.connections, thread_name_prefix="doclink-reindex"
+        )
+        try:
+            pending: dict[Future, int] = {
+                executor.submit(self._run_chunk, pool, chunks[index]): index
+                for index in remaining
+            }
+            finished = 0
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    chunk = chunks[index]
+                    try:
+                        rejected = future.result()
+                    except Exception as error:
+                        logging.error(
+                            f"Re-index chunk {index} ({chunk[0]}-{chunk[-1]}) failed: {error}"
+                        )
+                        report.failed_chunks += 1
+                        continue
+
+                    completed.add(index)
+                    report.failed_documents.update(rejected)
+                    report.processed += len(chunk)
+                    report.indexed += len(chunk) - len(rejected)
+                    self._save_checkpoint(fingerprint, completed, report.failed_documents)
+
+                    finished += 1
+                    if self.progress_interval and finished % self.progress_interval == 0:
+                        report.seconds = time.perf_counter() - start
+                        logging.info(report.summary())
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            pool.close()
+
+        report.seconds = time.perf_counter() - start
+        logging.info(report.summary())
+
+        return report
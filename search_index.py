@@ -0,0 +1,254 @@
+import heapq
+
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+
+PROPERTY: str = "property"
+DOCUMENT_TYPE: str = "document_type"
+WORKFLOW: str = "workflow"
+WORKFLOW_ACTIVITY: str = "workflow_activity"
+DISTRIBUTION_STAMP: str = "distribution_stamp"
+DISTRIBUTION_STAMP_FIELD: str = "distribution_stamp_field"
+
+# Fuzzy candidates are drawn from the rarest query trigrams until this many are collected,
+# so common trigrams ("cap" in every "Caption N") don't force a scan of the whole index
+MAX_FUZZY_CANDIDATES: int = 5000
+# Only the candidates sharing the most trigrams with the query get an exact score
+FUZZY_RESCORE: int = 200
+
+# Prefixes matching more keys than this (short ones, or a word most names share) have
+# their best hits ranked once when the index is sorted instead of on every keystroke
+PREFIX_SCAN_LIMIT: int = 256
+PREFIX_HITS: int = 100
+
+
+@dataclass
+class SearchResult:
+    """Dataclass to store a single ranked metadata search hit."""
+
+    kind: str
+    name: str
+    item: Any
+    score: float
+
+
+def _normalize(text: str) -> str:
+    return " ".join(str(text).lower().split())
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+def _best_hits(ranked_keys: list[tuple[tuple, int]]) -> list[tuple[tuple, int]]:
+    """Returns the PREFIX_HITS best (rank, entry id) pairs, one per entry."""
+
+    # An entry has a key per word, so a few extra cover those matching twice
+    best: dict[int, tuple] = {}
+    for rank, entry_id in heapq.nsmallest(2 * PREFIX_HITS, ranked_keys):
+        best.setdefault(entry_id, rank)
+    if len(best) < PREFIX_HITS and len(ranked_keys) > 2 * PREFIX_HITS:
+        best = {}
+        for rank, entry_id in sorted(ranked_keys):
+            best.setdefault(entry_id, rank)
+
+    return [(rank, entry_id) for entry_id, rank in best.items()][:PREFIX_HITS]
+
+
+class MetadataSearchIndex:
+    """Prefix and trigram index over metadata names for ranked autocomplete.
+
+    Prefix lookups bisect a sorted key list holding every name and every word
+    suffix of a name ("vendor name", "name"), so typing any word start matches.
+    Fuzzy lookups score trigram overlap (Dice coefficient) between query and name.
+    """
+
+    def __init__(self) -> None:
+        self._entries: list[tuple[str, str, Any]] = []
+        self._normalized: list[str] = []
+        self._exact: dict[tuple[str, str], Any] = {}
+
+        self._keys: list[tuple[str, int, int]] = []
+        self._trigrams: list[set[str]] = []
+        self._postings: dict[str, list[int]] = {}
+        self._prefix_hits: dict[str, list[tuple[tuple, int]]] = {}
+        self._sorted = True
+
+    def add(self, kind: str, name: str, item: Any) -> None:
+        """Adds an item under name. Empty names are skipped."""
+
+        if not name:
+            return
+
+        entry_id = len(self._entries)
+        normalized = _normalize(name)
+        self._entries.append((kind, name, item))
+        self._normalized.append(normalized)
+        self._exact.setdefault((kind, normalized), item)
+
+        words = normalized.split(" ")
+        for word_index in range(len(words)):
+            self._keys.append((" ".join(words[word_index:]), word_index, entry_id))
+
+        trigrams = _trigrams(normalized)
+        self._trigrams.append(trigrams)
+        for trigram in trigrams:
+            self._postings.setdefault(trigram, []).append(entry_id)
+
+        self._sorted = False
+
+    def add_all(self, kind: str, items: list, attribute: str) -> None:
+        for item in items:
+            self.add(kind, getattr(item, attribute), item)
+
+    def sort(self) -> None:
+        """Sorts the prefix keys after adds. prefix() does this lazily if it wasn't called."""
+
+        if self._sorted:
+            return
+
+        self._keys.sort()
+        ranked_keys = [
+            (self._rank(key, word_index, entry_id), entry_id)
+            for key, word_index, entry_id in self._keys
+        ]
+
+        # Keys are sorted, so every prefix covers one contiguous run; only runs too
+        # long to scan are ranked, each split again one character longer
+        self._prefix_hits = {}
+        runs = [(0, len(self._keys), 1)]
+        while runs:
+            start, end, length = runs.pop()
+            while start < end:
+                prefix = self._keys[start][0][:length]
+                if len(prefix) < length:
+                    # Keys equal to the shorter prefix sort first; skip past them
+                    start = bisect_left(self._keys, (prefix + "\0",), start, end)
+                    continue
+                run_end = bisect_left(self._keys, (prefix + "\uffff",), start, end)
+                if run_end - start > PREFIX_SCAN_LIMIT:
+                    self._prefix_hits[prefix] = _best_hits(ranked_keys[start:run_end])
+                    runs.append((start, run_end, length + 1))
+                start = run_end
+
+        self._sorted = True
+
+    def _rank(self, key: str, word_index: int, entry_id: int) -> tuple:
+        # Whole name over word match, then shorter names, then alphabetical
+        return (word_index > 0, len(self._normalized[entry_id]), key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, kind: str, name: str) -> Any:
+        """Returns the item named name (case and whitespace insensitive) or None."""
+
+        return self._exact.get((kind, _normalize(name)))
+
+    def prefix(
+        self, query: str, kinds: list[str] = None, limit: int = 10
+    ) -> list[SearchResult]:
+        """Returns names starting with query, whole name matches before word matches."""
+
+        query = _normalize(query)
+        if not query:
+            return []
+
+        self.sort()
+
+        prefix_hits = self._prefix_hits.get(query)
+        if prefix_hits is not None:
+            hits = [
+                (rank, entry_id)
+                for rank, entry_id in prefix_hits
+                if not kinds or self._entries[entry_id][0] in kinds
+            ]
+            complete = len(prefix_hits) < PREFIX_HITS
+            if complete or len(hits) >= limit:
+                return [
+                    self._result(entry_id, len(query) / rank[1])
+                    for rank, entry_id in hits[:limit]
+                ]
+
+        start = bisect_left(self._keys, (query,))
+        end = bisect_left(self._keys, (query + "\uffff",))
+
+        ranked: dict[int, tuple] = {}
+        for key, word_index, entry_id in self._keys[start:end]:
+            if kinds and self._entries[entry_id][0] not in kinds:
+                continue
+            rank = self._rank(key, word_index, entry_id)
+            if entry_id not in ranked or rank < ranked[entry_id]:
+                ranked[entry_id] = rank
+
+        best = heapq.nsmallest(limit, ranked.items(), key=lambda item: item[1])
+        return [self._result(entry_id, len(query) / rank[1]) for entry_id, rank in best]
+
+    def fuzzy(
+        self,
+        query: str,
+        kinds: list[str] = None,
+        limit: int = 10,
+        min_score: float = 0.3,
+    ) -> list[SearchResult]:
+        """Returns names similar to query (typos, reordered words), best first."""
+
+        query = _normalize(query)
+        if not query:
+            return []
+
+        query_trigrams = _trigrams(query)
+        postings_by_size = sorted(
+            (self._postings.get(trigram, []) for trigram in query_trigrams), key=len
+        )
+        # Counting overlaps runs in C; scoring every candidate in Python doesn't scale
+        overlaps: Counter[int] = Counter()
+        for postings in postings_by_size:
+            if overlaps and len(overlaps) + len(postings) > MAX_FUZZY_CANDIDATES:
+                break
+            overlaps.update(postings)
+
+        if kinds:
+            overlaps = Counter(
+                {
+                    entry_id: count
+                    for entry_id, count in overlaps.items()
+                    if self._entries[entry_id][0] in kinds
+                }
+            )
+
+        scored = []
+        for entry_id, _ in overlaps.most_common(max(FUZZY_RESCORE, limit)):
+            trigrams = self._trigrams[entry_id]
+            score = (
+                2 * len(query_trigrams & trigrams) / (len(query_trigrams) + len(trigrams))
+            )
+            if score >= min_score:
+                scored.append((score, entry_id))
+
+        best = heapq.nlargest(limit, scored)
+        return [self._result(entry_id, score) for score, entry_id in best]
+
+    def search(
+        self, query: str, kinds: list[str] = None, limit: int = 10
+    ) -> list[SearchResult]:
+        """Prefix matches first, topped up with fuzzy matches."""
+
+        results = self.prefix(query, kinds, limit)
+        if len(results) < limit:
+            seen = {id(result.item) for result in results}
+            for result in self.fuzzy(query, kinds, limit):
+                if id(result.item) not in seen:
+                    results.append(result)
+                    seen.add(id(result.item))
+                if len(results) >= limit:
+                    break
+
+        return results
+
+    def _result(self, entry_id: int, score: float) -> SearchResult:
+        kind, name, item = self._entries[entry_id]
+        return SearchResult(kind, name, item, score)
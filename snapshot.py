@@ -0,0 +1,623 @@
+import importlib
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+
+from bisect import bisect_left
+from dataclasses import dataclass, fields, is_dataclass
+from multiprocessing import shared_memory
+from typing import Any, Iterator
+from uuid import UUID
+
+from doclink_py.doclink_data import DocLinkData
+from doclink_py.doclink_types.documents import DocumentType
+from doclink_py.doclink_types.propertys import Property
+from doclink_py.doclink_types.stamps import DistributionStamp, DistributionStampField
+from doclink_py.doclink_types.workflows import Workflow, WorkflowActivity
+
+MAGIC: bytes = b"DLSNAP02"
+_HEADER = struct.Struct("<8sQ")
+_OFFSET = struct.Struct("<Q")
+# Prefix of numeric index keys; 0xFF never occurs in UTF-8
+_NUMBER_KEY: bytes = b"\xff"
+
+SNAPSHOT_COLLECTIONS: list[str] = [
+    "properties",
+    "document_types",
+    "workflows",
+    "workflow_activities",
+    "workflow_next_activities",
+    "distribution_stamps",
+    "distribution_stamp_fields",
+    "existing_ai_profiles",
+    "existing_event_tasks",
+]
+
+# (collection, attribute) pairs with a sorted key index in the snapshot
+SNAPSHOT_INDEXES: list[tuple[str, str]] = [
+    ("properties", "PropertyId"),
+    ("properties", "UserPrompt"),
+    ("properties", "FormattedUserPrompt"),
+    ("document_types", "DocumentTypeId"),
+    ("document_types", "Name"),
+    ("workflows", "WorkflowID"),
+    ("workflows", "Title"),
+    ("workflow_activities", "WorkflowActivityID"),
+    ("workflow_activities", "WorkflowID"),
+    ("workflow_activities", "Title"),
+    ("distribution_stamps", "DynamicUISecurityId"),
+    ("distribution_stamps", "DynamicUiId"),
+    ("distribution_stamps", "Name"),
+    ("distribution_stamp_fields", "Name"),
+    ("distribution_stamp_fields", "Caption"),
+]
+
+
+def _index_key(attribute: str, value: Any) -> bytes:
+    # Keys are compared as UTF-8 bytes; UUIDs come back from pyodbc/API in mixed case
+    if attribute == "DynamicUiId":
+        return str(value).lower().encode()
+    # Numbers get a prefix no UTF-8 text has, so 5 (or 5.0) finds id 5 as it does in
+    # DocLinkData, but "5" doesn't
+    if isinstance(value, int) or (isinstance(value, float) and value.is_integer()):
+        return _NUMBER_KEY + str(int(value)).encode()
+    return str(value).encode()
+
+
+def _field_values(record: Any) -> tuple:
+    return tuple(getattr(record, field.name) for field in fields(record))
+
+
+def _type_name(record_type: type) -> str:
+    # Subclasses like LazyDistributionStampField are stored as their dataclass
+    for base in record_type.__mro__:
+        if "__dataclass_fields__" in vars(base):
+            record_type = base
+            break
+    return f"{record_type.__module__}:{record_type.__qualname__}"
+
+
+def _load_type(type_name: str) -> type:
+    module_name, class_name = type_name.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _nested_fields(records: list) -> dict[str, str]:
+    """Finds list fields holding dataclasses (e.g. DocumentTypeProperties)."""
+
+    nested: dict[str, str] = {}
+    for record in records:
+        for index, value in enumerate(_field_values(record)):
+            if isinstance(value, list) and value and is_dataclass(value[0]):
+                nested.setdefault(str(index), _type_name(type(value[0])))
+
+    return nested
+
+
+def _encode_record(record: Any, nested: dict[str, str]) -> bytes:
+    if is_dataclass(record):
+        values = list(_field_values(record))
+        # Nested records are stored as field tuples too, rather than pickled objects
+        for index in nested:
+            if values[int(index)]:
+                values[int(index)] = [_field_values(item) for item in values[int(index)]]
+        record = tuple(values)
+
+    return pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def encode_snapshot(data: DocLinkData) -> bytes:
+    """Encodes the loaded collections of data and their lookup indexes as one buffer.
+
+    Layout: magic, header length, JSON header, then per collection an offsets table
+    and the concatenated records (each a pickled field tuple, not a pickled object
+    graph), then per index an offsets table, sorted keys and record ordinals.
+    """
+
+    header: dict[str, dict] = {"collections": {}, "indexes": {}}
+    sections: list[bytes] = []
+    position = 0
+
+    def add_section(payload: bytes) -> int:
+        nonlocal position
+        start = position
+        sections.append(payload)
+        position += len(payload)
+        return start
+
+    def add_blobs(blobs: list[bytes]) -> tuple[int, int]:
+        offsets = [0]
+        for blob in blobs:
+            offsets.append(offsets[-1] + len(blob))
+        return (
+            add_section(b"".join(_OFFSET.pack(offset) for offset in offsets)),
+            add_section(b"".join(blobs)),
+        )
+
+    collections: dict[str, list] = {}
+    for name in SNAPSHOT_COLLECTIONS:
+        # Don't trigger a fetch for lazy collections nobody has used
+        if name == "workflow_next_activities" and not data.is_collection_loaded(name):
+            continue
+        records = getattr(data, name)
+        collections[name] = records
+        is_records = bool(records) and is_dataclass(records[0])
+        nested = _nested_fields(records) if is_records else {}
+        offsets_pos, data_pos = add_blobs(
+            [_encode_record(record, nested) for record in records]
+        )
+        header["collections"][name] = {
+            "type": _type_name(type(records[0])) if is_records else None,
+            "nested": nested,
+            "count": len(records),
+            "offsets": offsets_pos,
+            "data": data_pos,
+        }
+
+    for collection, attribute in SNAPSHOT_INDEXES:
+        records = collections.get(collection)
+        if not records:
+            continue
+        # Stable sort keeps the first record first among equal keys (first match wins)
+        entries = sorted(
+            (
+                (_index_key(attribute, getattr(record, attribute)), ordinal)
+                for ordinal, record in enumerate(records)
+            ),
+            key=lambda entry: entry[0],
+        )
+        keys_offsets_pos, keys_pos = add_blobs([entry[0] for entry in entries])
+        ordinals_pos = add_section(
+            b"".join(_OFFSET.pack(ordinal) for _, ordinal in entries)
+        )
+        header["indexes"][f"{collection}.{attribute}"] = {
+            "count": len(entries),
+            "offsets": keys_offsets_pos,
+            "keys": keys_pos,
+            "ordinals": ordinals_pos,
+        }
+
+    # Section positions are relative to the end of the header
+    header_bytes = json.dumps(header).encode()
+
+    return _HEADER.pack(MAGIC, len(header_bytes)) + header_bytes + b"".join(sections)
+
+
+def write_snapshot(data: DocLinkData, path: str) -> int:
+    """Writes a snapshot file for readers to mmap. Returns its size in bytes.
+
+    The file is written beside path and renamed into place, so a reader attaching
+    while a new snapshot is published sees either the old or the new one.
+    """
+
+    payload = encode_snapshot(data)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(payload)
+    os.replace(temp_path, path)
+    logging.info(f"Wrote {len(payload)} byte DocLink snapshot to {path}")
+
+    return len(payload)
+
+
+def publish_shared_memory(data: DocLinkData, name: str) -> shared_memory.SharedMemory:
+    """Copies a snapshot into a new named shared memory block.
+
+    The caller owns the block: keep it referenced while readers need it, then
+    close() and unlink() it.
+    """
+
+    payload = encode_snapshot(data)
+    block = shared_memory.SharedMemory(name=name, create=True, size=len(payload))
+    block.buf[: len(payload)] = payload
+    logging.info(f"Published {len(payload)} byte DocLink snapshot as {name}")
+
+    return block
+
+
+class SnapshotCollection:
+    """Read only sequence over one snapshot collection, decoding records on access."""
+
+    def __init__(
+        self, snapshot: "DocLinkDataSnapshot", name: str, section: dict, base: int
+    ) -> None:
+        self.name = name
+        self._snapshot = snapshot
+        self._count: int = section["count"]
+        self._offsets: int = base + section["offsets"]
+        self._data: int = base + section["data"]
+
+        self._type: type = _load_type(section["type"]) if section["type"] else None
+        self._nested: dict[int, type] = {
+            int(index): _load_type(type_name)
+            for index, type_name in section["nested"].items()
+        }
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, ordinal: int) -> Any:
+        if ordinal < 0:
+            ordinal += self._count
+        if not 0 <= ordinal < self._count:
+            raise IndexError(f"{self.name} snapshot index out of range")
+
+        buffer = self._snapshot._buffer
+        start = _OFFSET.unpack_from(buffer, self._offsets + ordinal * _OFFSET.size)[0]
+        end = _OFFSET.unpack_from(buffer, self._offsets + (ordinal + 1) * _OFFSET.size)[0]
+        values = pickle.loads(buffer[self._data + start : self._data + end])
+        if not self._type:
+            return values
+
+        if self._nested:
+            values = list(values)
+            for index, nested_type in self._nested.items():
+                if values[index]:
+                    values[index] = [nested_type(*item) for item in values[index]]
+
+        return self._type(*values)
+
+    def __iter__(self) -> Iterator[Any]:
+        for ordinal in range(self._count):
+            yield self[ordinal]
+
+
+class _SnapshotIndex:
+    """Sorted key index inside the snapshot buffer, searched in place."""
+
+    def __init__(self, snapshot: "DocLinkDataSnapshot", section: dict, base: int) -> None:
+        self._snapshot = snapshot
+        self._count: int = section["count"]
+        self._offsets: int = base + section["offsets"]
+        self._keys: int = base + section["keys"]
+        self._ordinals: int = base + section["ordinals"]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position: int) -> bytes:
+        # Lets bisect search the keys without decoding the whole index
+        buffer = self._snapshot._buffer
+        start = _OFFSET.unpack_from(buffer, self._offsets + position * _OFFSET.size)[0]
+        end = _OFFSET.unpack_from(buffer, self._offsets + (position + 1) * _OFFSET.size)[0]
+        return bytes(buffer[self._keys + start : self._keys + end])
+
+    def ordinal(self, position: int) -> int:
+        return _OFFSET.unpack_from(
+            self._snapshot._buffer, self._ordinals + position * _OFFSET.size
+        )[0]
+
+    def find(self, key: bytes) -> list[int]:
+        """Returns the ordinals of every record with key, in load order."""
+
+        position = bisect_left(self, key)
+        ordinals = []
+        while position < self._count and self[position] == key:
+            ordinals.append(self.ordinal(position))
+            position += 1
+
+        return ordinals
+
+
+@dataclass
+class _Lookup:
+    collection: str
+    attribute: str
+    error_code: str
+    error_msg: str
+
+
+class DocLinkDataSnapshot:
+    """Read only DocLinkData view over an mmap'd file or shared memory block.
+
+    Only the header is parsed on attach. Lookups bisect the stored key indexes and
+    decode just the matching records, so a worker never unpickles whole collections.
+    Returned records are fresh copies; changing them does not change the snapshot.
+    """
+
+    def __init__(self, buffer, closer=None) -> None:
+        self._buffer = buffer
+        self._closer = closer
+
+        magic, header_length = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise Exception("INVALID_SNAPSHOT", "Buffer is not a DocLink snapshot.")
+        base = _HEADER.size + header_length
+        header = json.loads(bytes(buffer[_HEADER.size : base]))
+
+        self._collections: dict[str, SnapshotCollection] = {
+            name: SnapshotCollection(self, name, section, base)
+            for name, section in header["collections"].items()
+        }
+        self._indexes: dict[str, _SnapshotIndex] = {
+            name: _SnapshotIndex(self, section, base)
+            for name, section in header["indexes"].items()
+        }
+
+    @classmethod
+    def open(cls, path: str) -> "DocLinkDataSnapshot":
+        """Attaches to a snapshot file written by write_snapshot."""
+
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return cls(mapped, mapped.close)
+
+    @classmethod
+    def attach(cls, name: str) -> "DocLinkDataSnapshot":
+        """Attaches to a shared memory block created by publish_shared_memory."""
+
+        try:
+            block = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before 3.13 every attach registers with the resource tracker, which
+            # would unlink the publisher's block when this process exits
+            from multiprocessing import resource_tracker
+
+            block = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(block._name, "shared_memory")
+
+        return cls(block.buf, block.close)
+
+    def close(self) -> None:
+        """Detaches from the buffer; the snapshot can't be used afterwards."""
+
+        self._collections.clear()
+        self._indexes.clear()
+        buffer, self._buffer = self._buffer, None
+        if self._closer:
+            del buffer
+            self._closer()
+
+    def __enter__(self) -> "DocLinkDataSnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def collection(self, name: str) -> SnapshotCollection:
+        if name not in self._collections:
+            raise Exception("INVALID_COLLECTION", f"Collection not in snapshot: {name}")
+        return self._collections[name]
+
+    @property
+    def properties(self) -> SnapshotCollection:
+        return self.collection("properties")
+
+    @property
+    def document_types(self) -> SnapshotCollection:
+        return self.collection("document_types")
+
+    @property
+    def workflows(self) -> SnapshotCollection:
+        return self.collection("workflows")
+
+    @property
+    def workflow_activities(self) -> SnapshotCollection:
+        return self.collection("workflow_activities")
+
+    @property
+    def workflow_next_activities(self) -> SnapshotCollection:
+        return self.collection("workflow_next_activities")
+
+    @property
+    def distribution_stamps(self) -> SnapshotCollection:
+        return self.collection("distribution_stamps")
+
+    @property
+    def distribution_stamp_fields(self) -> SnapshotCollection:
+        return self.collection("distribution_stamp_fields")
+
+    @property
+    def existing_ai_profiles(self) -> SnapshotCollection:
+        return self.collection("existing_ai_profiles")
+
+    @property
+    def existing_event_tasks(self) -> SnapshotCollection:
+        return self.collection("existing_event_tasks")
+
+    def _find_all(self, collection: str, attribute: str, key: bytes) -> list[Any]:
+        index = self._indexes.get(f"{collection}.{attribute}")
+        if index is None:
+            return []
+        records = self._collections[collection]
+        return [records[ordinal] for ordinal in index.find(key)]
+
+    def _get(self, lookup: _Lookup, value: Any, workflow_id: int = None) -> Any:
+        found = self._find_all(
+            lookup.collection,
+            lookup.attribute,
+            _index_key(lookup.attribute, value),
+        )
+        if workflow_id is not None:
+            found = [record for record in found if record.WorkflowID == workflow_id]
+        if not found:
+            raise Exception(lookup.error_code, lookup.error_msg.format(value))
+
+        return found[0]
+
+    def _workflow_filter(self, workflow_id: int, workflow_name: str) -> int | None:
+        if workflow_id is None and workflow_name is not None:
+            return self.get_workflow_by_name(workflow_name).WorkflowID
+        return workflow_id
+
+    def get_property_by_id(self, property_id: int) -> Property:
+        """Gets a property by its ID."""
+        return self._get(_PROPERTY_BY_ID, property_id)
+
+    def get_property_by_prompt(self, property_name: str) -> Property:
+        """Gets a property by its prompt."""
+        return self._get(_PROPERTY_BY_PROMPT, property_name)
+
+    def get_property_by_fprompt(self, property_name: str) -> Property:
+        """Gets a property by its formatted prompt."""
+        return self._get(_PROPERTY_BY_FPROMPT, property_name.strip())
+
+    def get_document_type_by_id(self, document_type_id: int) -> DocumentType:
+        """Gets a document type by its ID."""
+        return self._get(_DOCUMENT_TYPE_BY_ID, document_type_id)
+
+    def get_document_type_by_name(self, document_type_name: str) -> DocumentType:
+        """Gets a document type by its name."""
+        return self._get(_DOCUMENT_TYPE_BY_NAME, document_type_name)
+
+    def get_workflow_by_id(self, workflow_id: int) -> Workflow:
+        """Gets a workflow by its ID."""
+        return self._get(_WORKFLOW_BY_ID, workflow_id)
+
+    def get_workflow_by_name(self, workflow_name: str) -> Workflow:
+        """Gets a workflow by its name."""
+        return self._get(_WORKFLOW_BY_NAME, workflow_name)
+
+    def get_activities_by_wf_id(self, workflow_id: int) -> list[WorkflowActivity]:
+        """Gets the activities of a workflow."""
+        return self._find_all(
+            "workflow_activities",
+            "WorkflowID",
+            _index_key("WorkflowID", workflow_id),
+        )
+
+    def get_activities_by_wf_name(self, workflow_name: str) -> list[WorkflowActivity]:
+        """Gets the activities of a workflow by its name."""
+        return self.get_activities_by_wf_id(
+            self.get_workflow_by_name(workflow_name).WorkflowID
+        )
+
+    def get_workflow_activity_by_id(
+        self,
+        workflow_activity_id: int,
+        workflow_id: int = None,
+        workflow_name: str = None,
+    ) -> WorkflowActivity:
+        """Gets a workflow activity by its ID."""
+        return self._get(
+            _WORKFLOW_ACTIVITY_BY_ID,
+            workflow_activity_id,
+            self._workflow_filter(workflow_id, workflow_name),
+        )
+
+    def get_workflow_activity_by_name(
+        self,
+        workflow_activity_name: str,
+        workflow_id: int = None,
+        workflow_name: str = None,
+    ) -> WorkflowActivity:
+        """Gets a workflow activity by its name."""
+        return self._get(
+            _WORKFLOW_ACTIVITY_BY_NAME,
+            workflow_activity_name,
+            self._workflow_filter(workflow_id, workflow_name),
+        )
+
+    def get_distribution_stamp_by_id(
+        self, distribution_stamp_id: int
+    ) -> DistributionStamp:
+        """Gets a distribution stamp by its ID."""
+        return self._get(_DISTRIBUTION_STAMP_BY_ID, distribution_stamp_id)
+
+    def get_distribution_stamp_by_uuid_id(
+        self, distribution_stamp_uuid_id: UUID
+    ) -> DistributionStamp:
+        """Gets a distribution stamp by its UUID."""
+        return self._get(_DISTRIBUTION_STAMP_BY_UUID, distribution_stamp_uuid_id)
+
+    def get_distribution_stamp_by_name(
+        self, distribution_stamp_name: str
+    ) -> DistributionStamp:
+        """Gets a distribution stamp by its name."""
+        return self._get(_DISTRIBUTION_STAMP_BY_NAME, distribution_stamp_name)
+
+    def get_distribution_stamp_field_by_name(
+        self, distribution_stamp_field_name: str
+    ) -> DistributionStampField:
+        """Gets a distribution stamp field by its name."""
+        return self._get(_DISTRIBUTION_STAMP_FIELD_BY_NAME, distribution_stamp_field_name)
+
+    def get_distribution_stamp_field_by_caption(
+        self, distribution_stamp_field_name: str
+    ) -> DistributionStampField:
+        """Gets a distribution stamp field by its caption."""
+        return self._get(
+            _DISTRIBUTION_STAMP_FIELD_BY_CAPTION, distribution_stamp_field_name
+        )
+
+
+# Error codes and messages match the DocLinkData getters
+_PROPERTY_BY_ID = _Lookup(
+    "properties", "PropertyId", "INVALID_PROPERTY_ID", "Invalid property ID: {}"
+)
+_PROPERTY_BY_PROMPT = _Lookup(
+    "properties",
+    "UserPrompt",
+    "INVALID_PROPERTY_NAME",
+    "Invalid property name during prompt: {}",
+)
+_PROPERTY_BY_FPROMPT = _Lookup(
+    "properties",
+    "FormattedUserPrompt",
+    "INVALID_PROPERTY_NAME",
+    "Invalid property name during fprompt: {}",
+)
+_DOCUMENT_TYPE_BY_ID = _Lookup(
+    "document_types",
+    "DocumentTypeId",
+    "INVALID_DOCUMENT_TYPE_ID",
+    "Invalid document type ID: {}",
+)
+_DOCUMENT_TYPE_BY_NAME = _Lookup(
+    "document_types",
+    "Name",
+    "INVALID_DOCUMENT_TYPE_NAME",
+    "Invalid document type name: {}",
+)
+_WORKFLOW_BY_ID = _Lookup(
+    "workflows", "WorkflowID", "INVALID_WORKFLOW_ID", "Invalid workflow ID: {}"
+)
+_WORKFLOW_BY_NAME = _Lookup(
+    "workflows", "Title", "INVALID_WORKFLOW_NAME", "Invalid workflow name: {}"
+)
+_WORKFLOW_ACTIVITY_BY_ID = _Lookup(
+    "workflow_activities",
+    "WorkflowActivityID",
+    "INVALID_WORKFLOW_ACTIVITY_ID",
+    "Invalid workflow activity ID: {}",
+)
+_WORKFLOW_ACTIVITY_BY_NAME = _Lookup(
+    "workflow_activities",
+    "Title",
+    "INVALID_WORKFLOW_ACTIVITY_NAME",
+    "Invalid workflow activity name: {}",
+)
+_DISTRIBUTION_STAMP_BY_ID = _Lookup(
+    "distribution_stamps",
+    "DynamicUISecurityId",
+    "INVALID_DISTRIBUTION_STAMP_ID",
+    "Invalid distribution stamp ID: {}",
+)
+_DISTRIBUTION_STAMP_BY_UUID = _Lookup(
+    "distribution_stamps",
+    "DynamicUiId",
+    "INVALID_DISTRIBUTION_STAMP_ID",
+    "Invalid distribution stamp ID: {}",
+)
+_DISTRIBUTION_STAMP_BY_NAME = _Lookup(
+    "distribution_stamps",
+    "Name",
+    "INVALID_DISTRIBUTION_STAMP_NAME",
+    "Invalid distribution stamp name: {}",
+)
+_DISTRIBUTION_STAMP_FIELD_BY_NAME = _Lookup(
+    "distribution_stamp_fields",
+    "Name",
+    "INVALID_DISTRIBUTION_STAMP_FIELD_NAME",
+    "Invalid distribution stamp field name: {}",
+)
+_DISTRIBUTION_STAMP_FIELD_BY_CAPTION = _Lookup(
+    "distribution_stamp_fields",
+    "Caption",
+    "INVALID_DISTRIBUTION_STAMP__FIELD_CAPTION",
+    "Invalid distribution stamp field caption: {}",
+)
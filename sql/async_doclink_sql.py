@@ -0,0 +1,255 @@
+import asyncio
+import functools
+import logging
+import queue
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from .doclink_sql import DocLinkSQL, DocLinkSQLCredentials
+from .query_cache import QueryResultCache
+
+DEFAULT_POOL_SIZE: int = 4
+POOL_WAIT_INTERVAL: float = 0.5
+
+# Hold a connection across calls, which a pooled call can't do
+_NOT_FORWARDED: frozenset[str] = frozenset({"unit_of_work"})
+
+
+class DocLinkSQLPool:
+    """Thread safe pool of connected DocLinkSQL instances, opened on demand up to size."""
+
+    def __init__(
+        self, credentials: DocLinkSQLCredentials, size: int = DEFAULT_POOL_SIZE
+    ) -> None:
+        self.credentials = credentials
+        self.size = size
+
+        # One cache for every connection, so a write through any of them evicts for all
+        self.query_cache: QueryResultCache = QueryResultCache()
+
+        self._idle: queue.LifoQueue[DocLinkSQL] = queue.LifoQueue()
+        self._opened: list[DocLinkSQL] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self) -> DocLinkSQL:
+        """Returns an idle connection, opening one if the pool isn't full yet."""
+
+        while True:
+            if self._closed:
+                raise Exception("POOL_CLOSED", "DocLinkSQL pool is closed.")
+
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                if len(self._opened) < self.size:
+                    # Reserve the slot before connecting so concurrent acquires don't overshoot
+                    sql = DocLinkSQL(self.credentials)
+                    sql.query_cache = self.query_cache
+                    self._opened.append(sql)
+                    break
+
+            # Re-check periodically: a discarded connection frees a slot without
+            # putting anything back on the idle queue
+            try:
+                return self._idle.get(timeout=POOL_WAIT_INTERVAL)
+            except queue.Empty:
+                continue
+
+        try:
+            logging.debug(f"Opening pooled SQL connection {len(self._opened)}/{self.size}")
+            sql.connect()
+        except Exception:
+            with self._lock:
+                self._opened.remove(sql)
+            raise
+
+        return sql
+
+    def release(self, sql: DocLinkSQL) -> None:
+        if self._closed:
+            sql.disconnect()
+        else:
+            self._idle.put(sql)
+
+    def recycle(self, sql: DocLinkSQL) -> None:
+        """Returns a connection after a failed call, or discards it if it can't roll back."""
+
+        # A failed statement may leave an open transaction; clear it before reuse
+        try:
+            sql.sql_handler.rollback()
+        except Exception as error:
+            logging.warning(f"Rollback failed, dropping pooled connection: {error}")
+            self.discard(sql)
+            return
+
+        self.release(sql)
+
+    def discard(self, sql: DocLinkSQL) -> None:
+        """Drops a connection left in an unknown state (e.g. a cancelled query)."""
+
+        with self._lock:
+            if sql in self._opened:
+                self._opened.remove(sql)
+        try:
+            sql.disconnect()
+        except Exception as error:
+            logging.warning(f"Failed to close discarded SQL connection: {error}")
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().disconnect()
+            except queue.Empty:
+                break
+
+
+class _PooledCall:
+    """The connection one call has checked out, shared by the loop and its worker."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.sql: DocLinkSQL = None
+        self.abandoned = False
+
+    def check_in(self) -> bool:
+        """Detaches the connection before it goes back to the pool. Returns abandoned."""
+
+        with self.lock:
+            self.sql = None
+            return self.abandoned
+
+
+class AsyncDocLinkSQL:
+    """asyncio facade over DocLinkSQL, running each call on a pooled connection.
+
+    Every public DocLinkSQL method is available as a coroutine with the same
+    arguments plus an optional timeout (seconds):
+
+        async with AsyncDocLinkSQL(credentials) as sql:
+            properties, workflows = await asyncio.gather(
+                sql.get_properties(), sql.get_workflows(timeout=10)
+            )
+
+    Calls run concurrently on a dedicated executor sized to the pool. When a call
+    times out or is cancelled, the running statement is cancelled on the driver and
+    its connection is discarded instead of being returned to the pool.
+    """
+
+    def __init__(
+        self, credentials: DocLinkSQLCredentials, pool_size: int = DEFAULT_POOL_SIZE
+    ) -> None:
+        self.pool = DocLinkSQLPool(credentials, pool_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="doclink-sql"
+        )
+
+    def _run(
+        self,
+        method_name: str,
+        args: tuple,
+        kwargs: dict,
+        call: _PooledCall,
+    ) -> Any:
+        sql = self.pool.acquire()
+        with call.lock:
+            # Timed out or cancelled while waiting for a connection; don't run it late
+            abandoned = call.abandoned
+            if not abandoned:
+                call.sql = sql
+        if abandoned:
+            self.pool.release(sql)
+            raise Exception(
+                "CALL_ABANDONED", f"{method_name} timed out before it could start."
+            )
+
+        try:
+            result = getattr(sql, method_name)(*args, **kwargs)
+        except Exception:
+            # Detached first, so a late cancel can't reach the next borrower
+            if call.check_in():
+                self.pool.discard(sql)
+            else:
+                self.pool.recycle(sql)
+            raise
+
+        if call.check_in():
+            self.pool.discard(sql)
+        else:
+            self.pool.release(sql)
+
+        return result
+
+    async def call(
+        self, method_name: str, *args, timeout: float = None, **kwargs
+    ) -> Any:
+        """Runs DocLinkSQL.method_name on a pooled connection without blocking the loop."""
+
+        if (
+            method_name.startswith("_")
+            or method_name in _NOT_FORWARDED
+            or not callable(getattr(DocLinkSQL, method_name, None))
+        ):
+            raise Exception(
+                "INVALID_METHOD", f"DocLinkSQL has no method named {method_name}"
+            )
+
+        call = _PooledCall()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._executor,
+            self._run,
+            method_name,
+            args,
+            kwargs,
+            call,
+        )
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # Only a connection still checked out by this call is cancelled
+            with call.lock:
+                call.abandoned = True
+                if call.sql is not None:
+                    self._cancel_statement(call.sql)
+            raise
+
+    def _cancel_statement(self, sql: DocLinkSQL) -> None:
+        # SQLCancel is safe to call from another thread while the statement runs
+        cursor = getattr(sql.sql_handler, "cursor", None) if sql.sql_handler else None
+        if cursor is not None and hasattr(cursor, "cancel"):
+            try:
+                cursor.cancel()
+            except Exception as error:
+                logging.warning(f"Failed to cancel running statement: {error}")
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if (
+            name.startswith("_")
+            or name in _NOT_FORWARDED
+            or not callable(getattr(DocLinkSQL, name, None))
+        ):
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+
+        return functools.partial(self.call, name)
+
+    async def aclose(self) -> None:
+        """Closes idle connections; calls still running finish and then disconnect."""
+
+        self.pool.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self) -> "AsyncDocLinkSQL":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
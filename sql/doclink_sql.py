@@ -1,18 +1,40 @@
 import logging
 import json
 
-from typing import Optional, TYPE_CHECKING
+from contextlib import contextmanager
+from typing import Iterator, Optional, TYPE_CHECKING
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-from .sql_handler import SQLHandler
+from .monitor_poller import MonitorTablePoller
+from .query_cache import QueryResultCache
+from .sql_handler import SQLHandler, UnitOfWork
 from ..sql_queries import *
-from ..utilities import get_query_from_file, row_to_json
+from ..interning import ValueInterner
+from ..staging_ddl import (
+    STAGING_DETAIL_TABLE,
+    STAGING_HEADER_TABLE,
+    StagingDDL,
+    staging_migration_statements,
+    template_column_names,
+)
+from ..utilities import chunk_list, get_query_from_file, row_to_json
 
 import doclink_py.doclink_types as doclink_types
-from doclink_py.doclink_sprocs import SQLDAT_DIR, STAGING_FROM_PROP
+from doclink_py.doclink_types.documents import RISchedule
+from doclink_py.doclink_sprocs import (
+    AUDIT_WF_MOVE_SPROC,
+    DOC_EXPORT_AI_INDEX_SPROC,
+    DOC_EXPORT_FROM_PROP_SPROC,
+    MOVE_WF_DOC_SPROC,
+    SQLDAT_DIR,
+    STAGING_FROM_PROP,
+)
 
 SCHEMA_NAME = "dbo"
+MAX_INSERT_ROWS = 1000
+# Documents moved per server side batch; each chunk is its own transaction
+MAX_MOVE_ROWS = 5000
 
 
 @dataclass
@@ -25,6 +47,38 @@ class DocLinkSQLCredentials:
     password: str
 
 
+@dataclass
+class AIProvisionSpec:
+    """Dataclass describing one auto index to create and attach to a doc type."""
+
+    doc_type_id: int
+    ai_name: str
+    ai_script: str
+    return_properties: list[tuple[int, str]] = field(default_factory=list)
+    execution_context: int = 0
+
+
+@dataclass
+class AIProvisionResult:
+    """Dataclass storing the ids created for an AIProvisionSpec."""
+
+    doc_type_id: int
+    ai_name: str
+    ai_profile_id: int
+    sequence: int
+    doc_type_ai_profile_id: int = None
+
+
+@dataclass
+class WorkflowMoveResult:
+    """Dataclass storing the outcome of moving one document to a workflow activity."""
+
+    document_id: int
+    activity_id: int
+    succeeded: bool
+    error: str = None
+
+
 class DocLinkSQL:
     """Mid level class to handle SQL connections to DocLink."""
 
@@ -34,24 +88,63 @@ class DocLinkSQL:
         self.sql_handler: SQLHandler = None
         self.sqldat_dir: str = SQLDAT_DIR
 
+        # (cached rows, schedules by doc type id); only used while query_cache still
+        # holds those rows, so writes and rollbacks on any sharing connection drop it
+        self._ri_schedules: tuple[list, dict[int, RISchedule]] = None
+
+        # Shares repeated values across loaded rows; see interner.summary()
+        self.interner: ValueInterner = ValueInterner()
+
+        # Metadata reads; writes made through this instance (or any sharing the cache)
+        # evict dependent entries. Kept across reconnects to the same database.
+        # Changes made by other clients aren't seen until query_cache.clear()
+        self.query_cache: QueryResultCache = QueryResultCache()
+
+        # Seconds, 0 waits forever (pyodbc's default)
+        self.timeout: int = 0
+
     def connect(self, credentials: DocLinkSQLCredentials = None) -> None:
         if credentials:
             self.credentials = credentials
         elif not self.credentials:
             raise Exception("NO_CREDENTIALS", "No credentials provided for SQL Login.")
 
-        self.sql_handler = SQLHandler()
+        self.query_cache.bind(
+            (self.credentials.server_name, self.credentials.database_name)
+        )
+        self.sql_handler = SQLHandler(query_cache=self.query_cache)
         self.sql_handler.connect(
             self.credentials.server_name,
             self.credentials.database_name,
             self.credentials.username,
             self.credentials.password,
+            timeout=self.timeout,
         )
 
     def disconnect(self) -> None:
         if self.sql_handler:
             self.sql_handler.disconnect()
 
+    @contextmanager
+    def unit_of_work(self, batch: bool = False) -> Iterator[UnitOfWork]:
+        """Runs the calls in the block as one transaction, committed once on exit.
+
+        Any exception rolls back everything done in the block, so a failed
+        provisioning flow leaves no half configured doc types behind. With batch,
+        statements that return nothing are sent together in one round trip.
+
+            with sql.unit_of_work(batch=True):
+                sql.enable_ai_for_document_type(doc_type_id)
+                ai_profile_id = sql.create_auto_index(ai_name, ai_script)
+                sql.attach_auto_index_to_doc_type(doc_type_id, ai_profile_id)
+        """
+
+        if not self.sql_handler:
+            raise Exception("NO_CONN", "Not connected to SQL Server.")
+
+        with self.sql_handler.unit_of_work(batch) as unit:
+            yield unit
+
     def check_if_sproc_exists(self, sproc_name: str) -> int:
         """Checks if a sproc exists in the database. Returns number of times it exists"""
 
@@ -61,6 +154,24 @@ class DocLinkSQL:
 
         return len(response)
 
+    def existing_sprocs(self, sproc_names: list[str]) -> set[str]:
+        """Returns the given sprocs that exist in the database, in one query"""
+
+        if not sproc_names:
+            return set()
+
+        logging.debug(f"Checking which of {len(sproc_names)} sprocs exist...")
+        query = GET_EXISTING_SPROCS_QUERY.format(
+            SCHEMA=SCHEMA_NAME,
+            SPROC_NAMES=", ".join(
+                "N'" + name.replace("'", "''") + "'" for name in sproc_names
+            ),
+        )
+        found = {row[0].lower() for row in self.sql_handler.query_and_fetch_all(query)}
+
+        # SQL Server compares names case insensitively
+        return {name for name in sproc_names if name.lower() in found}
+
     def commit_sproc_from_file(
         self, sproc_name: str, action: Optional[str] = "CREATE"
     ) -> None:
@@ -79,9 +190,9 @@ class DocLinkSQL:
         logging.debug("Getting database properties...")
 
         query = GET_PROPERTIES
-        response = self.sql_handler.query_and_fetch_all(query)
+        response = self.sql_handler.query_and_fetch_all(query, cache=True)
 
-        properties = [doclink_types.propertys.Property(**row_to_json(row)) for row in response]
+        properties = [doclink_types.propertys.Property(**row_to_json(row, self.interner)) for row in response]
 
         return properties
 
@@ -91,10 +202,10 @@ class DocLinkSQL:
         logging.debug("Getting document types...")
 
         query = GET_DOCUMENT_TYPES
-        response = self.sql_handler.query_and_fetch_all(query)
+        response = self.sql_handler.query_and_fetch_all(query, cache=True)
 
         document_types = [
-                doclink_types.documents.DocumentType(**row_to_json(row)) for row in response
+                doclink_types.documents.DocumentType(**row_to_json(row, self.interner)) for row in response
         ]
 
         return document_types
@@ -114,10 +225,10 @@ class DocLinkSQL:
         properties_dict = {prop.PropertyId: prop for prop in properties}
 
         query = GET_DOCUMENT_TYPE_PROPERTY
-        response = self.sql_handler.query_and_fetch_all(query)
+        response = self.sql_handler.query_and_fetch_all(query, cache=True)
 
         document_type_propertys = [
-            doclink_types.documents.DocumentTypeProperty(**row_to_json(row)) for row in response
+            doclink_types.documents.DocumentTypeProperty(**row_to_json(row, self.interner)) for row in response
         ]
 
         for doc_type_prop in document_type_propertys:
@@ -161,15 +272,76 @@ class DocLinkSQL:
         )
         self.sql_handler.query_and_commit(query)
 
+    def migrate_staging_tables(
+        self, ddl: StagingDDL, droppable_columns: set[str] = frozenset()
+    ) -> list[str]:
+        """Brings the staging tables to the columns of ddl without rebuilding them.
+
+        Existing columns are read from a freshly loaded schema catalog and only the
+        needed ALTER TABLE ADD/ALTER COLUMN/DROP COLUMN statements are run, in one
+        transaction, so staged rows are kept. Only droppable_columns are ever
+        dropped, less the template's own columns and any identity column. If a
+        staging table is missing both are created from the template. Returns the
+        statements applied.
+        """
+
+        template = get_query_from_file(SQLDAT_DIR, f"{STAGING_FROM_PROP}.sqldat")
+        protected = template_column_names(template)
+
+        # Reload rather than trust the cache; the tables may have changed elsewhere
+        catalog = self.sql_handler.schema_catalog
+        catalog.load()
+        existing = {
+            STAGING_HEADER_TABLE: catalog.columns(STAGING_HEADER_TABLE) or [],
+            STAGING_DETAIL_TABLE: catalog.columns(STAGING_DETAIL_TABLE) or [],
+        }
+
+        for table in existing:
+            identity = catalog.identity_column(table)
+            if identity is not None:
+                protected.add(identity.lower())
+        droppable_columns = {
+            name for name in droppable_columns if name.lower() not in protected
+        }
+
+        if not all(existing.values()):
+            logging.warning("Staging tables missing, creating them from the template.")
+            self.drop_staging_tables()
+            self.create_staging_tables(ddl.header_columns, ddl.detail_columns)
+            return []
+
+        statements = staging_migration_statements(
+            STAGING_HEADER_TABLE,
+            ddl.header_schema,
+            existing[STAGING_HEADER_TABLE],
+            droppable_columns,
+        ) + staging_migration_statements(
+            STAGING_DETAIL_TABLE,
+            ddl.detail_schema,
+            existing[STAGING_DETAIL_TABLE],
+            droppable_columns,
+        )
+
+        if not statements:
+            logging.info("Staging tables already match the selected columns.")
+            return statements
+
+        logging.info(f"Migrating staging tables with {len(statements)} statements...")
+        with self.unit_of_work(batch=True):
+            for statement in statements:
+                self.sql_handler.query_and_execute(statement)
+
+        return statements
+
     def get_workflows(self) -> list[doclink_types.workflows.Workflow]:
         """Gets the workflows of the database."""
 
         logging.debug("Getting workflows...")
 
         query = GET_WORKFLOWS_QUERY
-        response = self.sql_handler.query_and_fetch_all(query)
+        response = self.sql_handler.query_and_fetch_all(query, cache=True)
 
-        workflows = [doclink_types.workflows.Workflow(**row_to_json(row)) for row in response]
+        workflows = [doclink_types.workflows.Workflow(**row_to_json(row, self.interner)) for row in response]
 
         return workflows
 
@@ -179,10 +351,10 @@ class DocLinkSQL:
         logging.debug("Getting workflow activities...")
 
         query = GET_WORKFLOW_ACTIVITIES_QUERY
-        response = self.sql_handler.query_and_fetch_all(query)
+        response = self.sql_handler.query_and_fetch_all(query, cache=True)
 
         workflow_activities = [
-            doclink_types.workflows.WorkflowActivity(**row_to_json(row)) for row in response
+            doclink_types.workflows.WorkflowActivity(**row_to_json(row, self.interner)) for row in response
         ]
 
         return workflow_activities
@@ -193,10 +365,10 @@ class DocLinkSQL:
         logging.debug("Getting workflow queues (catagories)...")
 
         query = GET_WORKFLOW_QUEUES_QUERY
-        response = self.sql_handler.query_and_fetch_all(query)
+        response = self.sql_handler.query_and_fetch_all(query, cache=True)
 
         workflow_queue = [
-            doclink_types.workflows.WorkflowQueue(**row_to_json(row)) for row in response
+            doclink_types.workflows.WorkflowQueue(**row_to_json(row, self.interner)) for row in response
         ]
 
         return workflow_queue
@@ -207,10 +379,10 @@ class DocLinkSQL:
         logging.debug("Getting workflow next activity...")
 
         query = GET_WORKFLOW_NEXT_ACTIVITY_QUERY
-        response = self.sql_handler.query_and_fetch_all(query)
+        response = self.sql_handler.query_and_fetch_all(query, cache=True)
 
         workflow_next_activity = [
-            doclink_types.workflows.WorkflowNextActivity(**row_to_json(row)) for row in response
+            doclink_types.workflows.WorkflowNextActivity(**row_to_json(row, self.interner)) for row in response
         ]
 
         return workflow_next_activity
@@ -221,10 +393,10 @@ class DocLinkSQL:
         logging.debug("Getting workflow placement...")
 
         query = GET_WORKFLOW_PLACEMENT_QUERY
-        response = self.sql_handler.query_and_fetch_all(query)
+        response = self.sql_handler.query_and_fetch_all(query, cache=True)
 
         workflow_placement = [
-            doclink_types.workflows.WorkflowPlacement(**row_to_json(row)) for row in response
+            doclink_types.workflows.WorkflowPlacement(**row_to_json(row, self.interner)) for row in response
         ]
 
         return workflow_placement
@@ -235,24 +407,35 @@ class DocLinkSQL:
         logging.debug("Getting dist stamps...")
 
         query = GET_DIST_STAMPS
-        response = self.sql_handler.query_and_fetch_all(query)
+        response = self.sql_handler.query_and_fetch_all(query, cache=True)
 
         dist_stamps = [
-            doclink_types.stamps.DistributionStamp(**row_to_json(row)) for row in response
+            doclink_types.stamps.DistributionStamp(**row_to_json(row, self.interner)) for row in response
         ]
 
         return dist_stamps
 
-    def get_dist_stamp_fields(self) -> list[doclink_types.stamps.DistributionStampField]:
-        """Gets the dist stamp fields of the database."""
+    def get_dist_stamp_fields(
+        self, lazy: bool = True
+    ) -> list[doclink_types.stamps.DistributionStampField]:
+        """Gets the dist stamp fields of the database. lazy=True decodes columns on use."""
 
         logging.debug("Getting dist stamp fields...")
 
         query = GET_DIST_STAMP_FIELDS
-        response = self.sql_handler.query_and_fetch_all(query)
+        response = self.sql_handler.query_and_fetch_all(query, cache=True)
+
+        if lazy:
+            if not response:
+                return []
+            return doclink_types.stamps.lazy_stamp_fields(
+                response,
+                [column[0] for column in response[0].cursor_description],
+                self.interner,
+            )
 
         dist_stamp_fields = [
-            doclink_types.stamps.DistributionStampField(**row_to_json(row)) for row in response
+            doclink_types.stamps.DistributionStampField(**row_to_json(row, self.interner)) for row in response
         ]
 
         return dist_stamp_fields
@@ -298,6 +481,24 @@ class DocLinkSQL:
         )
         self.sql_handler.query_and_commit(query)
 
+    def run_document_export(
+        self,
+        document_id: int,
+        success_activity_id: int,
+        failed_activity_id: int,
+        sproc_name: str = DOC_EXPORT_FROM_PROP_SPROC,
+    ) -> None:
+        """Runs the export sproc for one document, as its AI script would, and commits."""
+
+        query = RUN_DOC_EXPORT_QUERY.format(
+            SPROC_NAME=sproc_name,
+            DOCUMENT_ID=int(document_id),
+            SUCCESS_WF=int(success_activity_id),
+            FAILED_WF=int(failed_activity_id),
+        )
+        with self.unit_of_work():
+            self.sql_handler.query_and_fetch_last(query)
+
     def create_basic_sproc(self, sproc_name: str, action: str) -> None:
         """Creates basic sproc."""
 
@@ -467,9 +668,158 @@ class DocLinkSQL:
         )
         self.sql_handler.query_and_commit(query)
 
+    def lock_doc_type_ai_sequences(self, doc_type_ids: list[int]) -> dict[int, int]:
+        """Locks and returns the current auto index count for each document type."""
+
+        query = LOCK_AI_SEQUENCES_QUERY.format(
+            DOC_TYPE_IDS=", ".join(str(int(doc_type_id)) for doc_type_id in doc_type_ids)
+        )
+        response = self.sql_handler.query_and_fetch_all(query)
+
+        sequences = {doc_type_id: 0 for doc_type_id in doc_type_ids}
+        sequences.update({int(row[0]): row[1] for row in response})
+
+        return sequences
+
+    def bulk_provision_auto_indexes(
+        self, specs: list[AIProvisionSpec], enable_ai: bool = False
+    ) -> list[AIProvisionResult]:
+        """Creates and attaches many auto indexes in a single unit of work."""
+
+        logging.debug(f"Bulk provisioning {len(specs)} auto indexes...")
+
+        if not specs:
+            return []
+
+        ai_names = [spec.ai_name for spec in specs]
+        if len(set(ai_names)) != len(ai_names):
+            raise Exception(
+                "DUPLICATE_AI_NAME",
+                "AI profile names must be unique within a bulk provision.",
+            )
+
+        doc_type_ids = sorted({int(spec.doc_type_id) for spec in specs})
+
+        with self.unit_of_work():
+            sequences = self.lock_doc_type_ai_sequences(doc_type_ids)
+
+            ai_profile_ids: dict[str, int] = {}
+            for chunk in chunk_list(specs, MAX_INSERT_ROWS):
+                values = ",\n".join(
+                    BULK_ADD_AI_VALUES.format(
+                        AI_NAME=spec.ai_name, AI_SCRIPT=spec.ai_script
+                    )
+                    for spec in chunk
+                )
+                response = self.sql_handler.query_and_fetch_all(
+                    BULK_ADD_AI_QUERY.format(VALUES=values)
+                )
+                ai_profile_ids.update({row[1]: int(row[0]) for row in response})
+
+            results: list[AIProvisionResult] = []
+            for spec in specs:
+                doc_type_id = int(spec.doc_type_id)
+                sequences[doc_type_id] += 1
+                results.append(
+                    AIProvisionResult(
+                        doc_type_id=doc_type_id,
+                        ai_name=spec.ai_name,
+                        ai_profile_id=ai_profile_ids[spec.ai_name],
+                        sequence=sequences[doc_type_id],
+                    )
+                )
+
+            results_by_profile_id = {result.ai_profile_id: result for result in results}
+            for chunk in chunk_list(list(zip(specs, results)), MAX_INSERT_ROWS):
+                values = ",\n".join(
+                    BULK_ADD_DOC_TYPE_AI_VALUES.format(
+                        DOC_TYPE_ID=result.doc_type_id,
+                        SEQ_COUNT=result.sequence,
+                        AI_PROFILE_ID=result.ai_profile_id,
+                        EXECUTION_CONTEXT=spec.execution_context,
+                    )
+                    for spec, result in chunk
+                )
+                response = self.sql_handler.query_and_fetch_all(
+                    BULK_ADD_DOC_TYPE_AI_QUERY.format(VALUES=values)
+                )
+                for row in response:
+                    results_by_profile_id[int(row[1])].doc_type_ai_profile_id = int(row[0])
+
+            return_props = [
+                (result.ai_profile_id, prop_id, column_name)
+                for spec, result in zip(specs, results)
+                for prop_id, column_name in spec.return_properties
+            ]
+            for chunk in chunk_list(return_props, MAX_INSERT_ROWS):
+                values = ",\n".join(
+                    BULK_ADD_RETURN_PROP_TO_AI_VALUES.format(
+                        AI_PROFILE_ID=ai_profile_id,
+                        PROP_ID=prop_id,
+                        COLUMN_NAME=column_name,
+                    )
+                    for ai_profile_id, prop_id, column_name in chunk
+                )
+                self.sql_handler.query_and_execute(
+                    BULK_ADD_RETURN_PROP_TO_AI_QUERY.format(VALUES=values)
+                )
+
+            if enable_ai:
+                self.sql_handler.query_and_execute(
+                    BULK_ENABLE_AI_QUERY.format(
+                        DOC_TYPE_IDS=", ".join(str(int(d)) for d in doc_type_ids)
+                    )
+                )
+
+        return results
+
+    def get_ri_schedules(self, refresh: bool = False) -> dict[int, RISchedule]:
+        """Gets every RI schedule keyed by document type id.
+
+        Kept in query_cache until RISchedules is written or refresh is passed.
+        """
+
+        if refresh:
+            self.query_cache.invalidate_tables({"RISchedules"})
+
+        logging.debug("Getting RI schedules...")
+
+        query = GET_RI_SCHEDULES_QUERY
+        response = self.sql_handler.query_and_fetch_all(query, cache=True)
+
+        return self._ri_schedules_from(response)
+
+    def _ri_schedules_from(self, response: list) -> dict[int, RISchedule]:
+        if self._ri_schedules is not None and self._ri_schedules[0] is response:
+            return self._ri_schedules[1]
+
+        ri_schedules = [
+            RISchedule(**row_to_json(row, self.interner)) for row in response
+        ]
+        schedules = {
+            int(ri_schedule.ParentId): ri_schedule for ri_schedule in ri_schedules
+        }
+        self._ri_schedules = (response, schedules)
+
+        return schedules
+
+    def _cached_ri_schedules(self) -> dict[int, RISchedule] | None:
+        """The schedules get_ri_schedules loaded, or None if invalidated since."""
+
+        response = self.query_cache.get(GET_RI_SCHEDULES_QUERY)
+        if response is None:
+            self._ri_schedules = None
+            return None
+
+        return self._ri_schedules_from(response)
+
     def doc_ri_schedule_exists(self, doc_type_id: int) -> bool:
         """Checks if the doc ri schedule exists for the given document type."""
 
+        ri_schedules = self._cached_ri_schedules()
+        if ri_schedules is not None:
+            return int(doc_type_id) in ri_schedules
+
         query = GET_RI_SCHEDULE_QUERY.format(DOC_TYPE_ID=doc_type_id)
         result = self.sql_handler.query_and_fetch_one(query)
 
@@ -478,6 +828,14 @@ class DocLinkSQL:
     def get_doc_ri_schedule_attributes(self, doc_type_id: int) -> tuple[int, int]:
         """Gets the schedule interval and schedule interval type by doc id."""
 
+        ri_schedules = self._cached_ri_schedules()
+        ri_schedule = (
+            ri_schedules.get(int(doc_type_id)) if ri_schedules is not None else None
+        )
+        if ri_schedule is not None:
+            return ri_schedule.attributes
+
+        # Not cached (or no schedule yet); ask the database as the uncached path always has
         query = GET_RI_SCHEDULE_QUERY.format(DOC_TYPE_ID=doc_type_id)
         result = self.sql_handler.query_and_fetch_one(query)
 
@@ -513,13 +871,120 @@ class DocLinkSQL:
         )
         self.sql_handler.query_and_commit(query)
 
+    def upsert_doc_ri_schedules(self, schedules: dict[int, tuple[int, int]]) -> None:
+        """Creates or updates RI schedules, keyed by doc type id, in one batch."""
+
+        logging.debug(f"Upserting {len(schedules)} RI schedules...")
+
+        if not schedules:
+            return
+
+        rows = [
+            UPSERT_RI_SCHEDULE_VALUES.format(
+                DOC_TYPE_ID=int(doc_type_id),
+                PROCESSING_INTERVAL=int(processing_interval),
+                PROCESSING_INTERVAL_TYPE=int(processing_interval_type),
+            )
+            for doc_type_id, (
+                processing_interval,
+                processing_interval_type,
+            ) in schedules.items()
+        ]
+
+        try:
+            for chunk in chunk_list(rows, MAX_INSERT_ROWS):
+                query = UPSERT_RI_SCHEDULES_QUERY.format(VALUES=",\n".join(chunk))
+                self.sql_handler.query_and_execute(query)
+            self.sql_handler.commit()
+        except Exception:
+            logging.error("RI schedule upsert failed. Rolling back.")
+            self.sql_handler.rollback()
+            raise
+
+    def bulk_move_workflow_documents(
+        self,
+        moves: list[tuple[int, int]],
+        audit: bool = True,
+        chunk_size: int = MAX_MOVE_ROWS,
+    ) -> list[WorkflowMoveResult]:
+        """Moves many documents, given as (DocumentID, WorkflowActivityID) pairs.
+
+        Each chunk is loaded into a temp table in one round trip and moved server
+        side by Custom_MoveWorkFlowDocument (and audited by Custom_AuditWFMove),
+        then committed. A document the sproc rejects is reported as failed without
+        affecting the rest of its chunk; a chunk that fails as a whole is rolled
+        back and all of its documents are reported failed. Results are in input order.
+        """
+
+        logging.debug(f"Bulk moving {len(moves)} workflow documents...")
+
+        audit_exec = (
+            AUDIT_WF_MOVE_EXEC.format(AUDIT_SPROC=AUDIT_WF_MOVE_SPROC) if audit else ""
+        )
+        run_query = RUN_WF_MOVES_QUERY.format(
+            MOVE_SPROC=MOVE_WF_DOC_SPROC, AUDIT=audit_exec
+        )
+
+        results: list[WorkflowMoveResult] = []
+        for chunk in chunk_list(
+            [(int(document_id), int(activity_id)) for document_id, activity_id in moves],
+            chunk_size,
+        ):
+            try:
+                with self.unit_of_work():
+                    self.sql_handler.query_and_execute(CREATE_WF_MOVES_TABLE_QUERY)
+                    self.sql_handler.execute_many(INSERT_WF_MOVES_QUERY, chunk)
+                    response = self.sql_handler.query_and_fetch_last(run_query)
+            except Exception as error:
+                # Inside a caller's unit of work the whole block has to roll back
+                if self.sql_handler.unit is not None:
+                    raise
+                logging.error(f"Workflow move chunk of {len(chunk)} failed: {error}")
+                results += [
+                    WorkflowMoveResult(document_id, activity_id, False, str(error))
+                    for document_id, activity_id in chunk
+                ]
+                continue
+
+            results += [
+                WorkflowMoveResult(int(row[0]), int(row[1]), bool(row[2]), row[3])
+                for row in response
+            ]
+
+        failed = sum(1 for result in results if not result.succeeded)
+        if failed:
+            logging.warning(f"{failed} of {len(results)} workflow moves failed.")
+
+        return results
+
+    def run_ai_index_sproc(
+        self, document_ids: list[int], sproc_name: str = DOC_EXPORT_AI_INDEX_SPROC
+    ) -> dict[int, str]:
+        """Runs the AI index sproc for each document in one transaction.
+
+        Returns {DocumentID: error message} for the documents the sproc rejected;
+        the others are committed. Raises (after rolling back) if the batch fails as a whole.
+        """
+
+        with self.unit_of_work():
+            self.sql_handler.query_and_execute(CREATE_AI_REINDEX_TABLE_QUERY)
+            self.sql_handler.execute_many(
+                INSERT_AI_REINDEX_QUERY,
+                [(int(document_id),) for document_id in document_ids],
+            )
+            response = self.sql_handler.query_and_fetch_last(
+                RUN_AI_REINDEX_QUERY.format(SPROC_NAME=sproc_name)
+            )
+
+        return {int(row[0]): row[1] for row in response}
+
     def get_ai_profiles(self):
         """Gets the ai profiles of the database."""
 
         logging.debug("Getting ai profiles...")
 
         query = GET_AI_PROFILE_NAMES
-        response = self.sql_handler.query_and_fetch_all(query)
+        response = self.sql_handler.query_and_fetch_all(query, cache=True)
 
         return [ai_profile[0] for ai_profile in response]
 
@@ -529,10 +994,19 @@ class DocLinkSQL:
         logging.debug("Getting event task names...")
 
         query = GET_EVENT_TASK_NAMES
-        response = self.sql_handler.query_and_fetch_all(query)
+        response = self.sql_handler.query_and_fetch_all(query, cache=True)
 
         return [event_task[0] for event_task in response]
 
+    def monitor_poller(self, **kwargs) -> MonitorTablePoller:
+        """Returns a poller for new rows in the export staging (monitor) table.
+
+        See MonitorTablePoller for the options (table, watermark_column,
+        checkpoint_path, chunk_size, intervals).
+        """
+
+        return MonitorTablePoller(self, **kwargs)
+
     def run_query(self, query):
         self.sql_handler.query_and_commit(query)
 
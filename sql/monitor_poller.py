@@ -0,0 +1,319 @@
+import datetime
+import logging
+import threading
+import time
+
+from typing import Any, Callable, Iterator, TYPE_CHECKING
+
+from .schema_catalog import ColumnInfo
+from ..sql_queries import (
+    GET_MAX_WATERMARK_QUERY,
+    POLL_TABLE_QUERY,
+    POLL_WINDOW_QUERY,
+    WATERMARK_FILTER,
+)
+from ..staging_ddl import STAGING_HEADER_TABLE
+from ..utilities import read_checkpoint, row_to_json, write_checkpoint
+
+if TYPE_CHECKING:
+    from .doclink_sql import DocLinkSQL
+
+FALLBACK_WATERMARK_COLUMN = "Modified"
+
+DEFAULT_CHUNK_SIZE: int = 1000
+DEFAULT_MIN_INTERVAL: float = 1.0
+DEFAULT_MAX_INTERVAL: float = 60.0
+DEFAULT_BACKOFF: float = 2.0
+
+
+def watermark_literal(value: Any, column: ColumnInfo = None) -> str:
+    """Returns value as a T-SQL literal for comparing against the watermark column.
+
+    Datetimes are cast to column's own type (datetime2(7) if it isn't given). A
+    wider literal would compare the column converted up, so a datetime row would
+    sort after its own watermark and be delivered again.
+    """
+
+    if isinstance(value, bool) or value is None:
+        raise Exception("INVALID_WATERMARK", f"Unsupported watermark value: {value!r}")
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, datetime.datetime):
+        return _datetime_literal(value, column)
+
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _datetime_literal(value: datetime.datetime, column: ColumnInfo | None) -> str:
+    data_type = column.data_type.lower() if column is not None else "datetime2"
+    if data_type == "datetime":
+        # A datetime literal takes at most three fractional digits
+        return f"CAST('{value.isoformat(timespec='milliseconds')}' AS datetime)"
+    if data_type == "smalldatetime":
+        return f"CAST('{value.isoformat(timespec='seconds')}' AS smalldatetime)"
+    if data_type == "date":
+        return f"CAST('{value.date().isoformat()}' AS date)"
+
+    precision = 7
+    if column is not None and column.datetime_precision is not None:
+        precision = int(column.datetime_precision)
+    if data_type != "datetimeoffset":
+        data_type = "datetime2"
+
+    return (
+        f"CAST('{value.isoformat(timespec='microseconds')}' AS {data_type}({precision}))"
+    )
+
+
+class MonitorTablePoller:
+    """Polls a table for rows past a high-water mark, a chunk at a time.
+
+    The watermark column defaults to the table's identity column, or Modified if
+    it has none. With checkpoint_path the watermark survives restarts; it is saved
+    only after a chunk has been handed over.
+
+    A row whose transaction commits after a higher watermark value was read would
+    be skipped, so delivery is best effort under concurrent writers. Passing
+    safety_window (an int for identity columns, a timedelta for datetimes)
+    re-reads that far below the watermark on every poll and delivers any rows
+    not seen yet, de-duplicated by key_column (the watermark column by default;
+    set it if that isn't unique). Rows committing within the window are then
+    delivered at least once.
+
+    Polling waits min_interval after a partial chunk, backing off by backoff up to
+    max_interval while the table stays idle, and polls again straight away while
+    full chunks keep coming:
+
+        poller = sql.monitor_poller(checkpoint_path="export_monitor.json")
+        for rows in poller.stream(stop_event):
+            handle(rows)
+    """
+
+    def __init__(
+        self,
+        sql: "DocLinkSQL",
+        table: str = STAGING_HEADER_TABLE,
+        watermark_column: str = None,
+        checkpoint_path: str = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        backoff: float = DEFAULT_BACKOFF,
+        from_latest: bool = False,
+        safety_window: Any = None,
+        key_column: str = None,
+    ) -> None:
+        self.sql = sql
+        self.table = table
+        self.watermark_column = watermark_column
+        self.checkpoint_path = checkpoint_path
+        self.chunk_size = chunk_size
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.from_latest = from_latest
+        self.safety_window = safety_window
+        self.key_column = key_column
+
+        self.watermark: Any = None
+        # Catalog entry of the watermark column, so literals are cast to its type
+        self._watermark_info: ColumnInfo = None
+        self.interval: float = min_interval
+        self.rows_delivered: int = 0
+
+        # Keys delivered inside the safety window, with their watermark values
+        self._recent: dict[Any, Any] = {}
+
+        self._started = False
+
+    def _resolve_watermark_column(self) -> str:
+        catalog = self.sql.sql_handler.schema_catalog
+        columns = catalog.columns(self.table)
+        if columns is None:
+            raise Exception("TABLE_NOT_FOUND", f"No dbo table named {self.table}.")
+
+        identity = catalog.identity_column(self.table)
+        if identity is not None:
+            return identity
+
+        if FALLBACK_WATERMARK_COLUMN not in {column.name for column in columns}:
+            raise Exception(
+                "NO_WATERMARK_COLUMN",
+                f"{self.table} has no identity or {FALLBACK_WATERMARK_COLUMN} column; "
+                "pass watermark_column.",
+            )
+
+        return FALLBACK_WATERMARK_COLUMN
+
+    def _load_checkpoint(self) -> bool:
+        state = read_checkpoint(self.checkpoint_path) if self.checkpoint_path else None
+        if state is None:
+            return False
+
+        if state.get("table") != self.table or state.get("column") != self.watermark_column:
+            logging.warning(
+                f"Ignoring checkpoint {self.checkpoint_path} written for "
+                f"{state.get('table')}.{state.get('column')}"
+            )
+            return False
+
+        value = state.get("watermark")
+        if state.get("type") == "datetime" and value is not None:
+            value = datetime.datetime.fromisoformat(value)
+        self.watermark = value
+
+        return True
+
+    def save_checkpoint(self) -> None:
+        if not self.checkpoint_path or self.watermark is None:
+            return
+
+        is_datetime = isinstance(self.watermark, datetime.datetime)
+        write_checkpoint(
+            self.checkpoint_path,
+            {
+                "table": self.table,
+                "column": self.watermark_column,
+                "type": "datetime" if is_datetime else type(self.watermark).__name__,
+                "watermark": (
+                    self.watermark.isoformat() if is_datetime else self.watermark
+                ),
+            },
+        )
+
+    def start(self) -> None:
+        """Resolves the watermark column and starting point; called by the first poll."""
+
+        if self._started:
+            return
+
+        if self.watermark_column is None:
+            self.watermark_column = self._resolve_watermark_column()
+        if self.key_column is None:
+            self.key_column = self.watermark_column
+        self._watermark_info = self.sql.sql_handler.schema_catalog.column(
+            self.table, self.watermark_column
+        )
+
+        if not self._load_checkpoint() and self.from_latest:
+            row = self.sql.sql_handler.query_and_fetch_one(
+                GET_MAX_WATERMARK_QUERY.format(
+                    COLUMN=self.watermark_column, TABLE=self.table
+                )
+            )
+            self.watermark = row[0] if row else None
+
+        logging.info(
+            f"Polling {self.table} by {self.watermark_column} from {self.watermark!r}"
+        )
+        self._started = True
+
+    def poll(self) -> list[dict]:
+        """Fetches the next chunk of rows past the watermark and advances it in memory."""
+
+        self.start()
+
+        row_filter = (
+            "1 = 1"
+            if self.watermark is None
+            else WATERMARK_FILTER.format(
+                COLUMN=self.watermark_column,
+                VALUE=watermark_literal(self.watermark, self._watermark_info),
+            )
+        )
+        response = self.sql.sql_handler.query_and_fetch_all(
+            POLL_TABLE_QUERY.format(
+                CHUNK_SIZE=int(self.chunk_size),
+                TABLE=self.table,
+                FILTER=row_filter,
+                COLUMN=self.watermark_column,
+            )
+        )
+
+        rows = [row_to_json(row) for row in response]
+        if self.safety_window is None:
+            if rows:
+                self.watermark = rows[-1][self.watermark_column]
+            return rows
+
+        late = self._poll_window() if self.watermark is not None else []
+        if rows:
+            self.watermark = rows[-1][self.watermark_column]
+
+        return self._unseen(late + rows)
+
+    def _poll_window(self) -> list[dict]:
+        response = self.sql.sql_handler.query_and_fetch_all(
+            POLL_WINDOW_QUERY.format(
+                TABLE=self.table,
+                COLUMN=self.watermark_column,
+                LOW=watermark_literal(
+                    self.watermark - self.safety_window, self._watermark_info
+                ),
+                VALUE=watermark_literal(self.watermark, self._watermark_info),
+            )
+        )
+
+        return [row_to_json(row) for row in response]
+
+    def _unseen(self, rows: list[dict]) -> list[dict]:
+        unseen = []
+        for row in rows:
+            key = row[self.key_column]
+            if key not in self._recent:
+                self._recent[key] = row[self.watermark_column]
+                unseen.append(row)
+
+        # Keys below the window can't be read again
+        if self.watermark is not None:
+            low = self.watermark - self.safety_window
+            self._recent = {
+                key: value for key, value in self._recent.items() if value > low
+            }
+        if len(unseen) < len(rows):
+            logging.debug(f"Skipped {len(rows) - len(unseen)} rows already delivered")
+
+        return unseen
+
+    def _next_interval(self, rows: list[dict]) -> float:
+        if rows:
+            self.interval = self.min_interval
+            # A full chunk means more rows are probably waiting
+            return 0.0 if len(rows) >= self.chunk_size else self.min_interval
+
+        wait_seconds = self.interval
+        self.interval = min(self.max_interval, self.interval * self.backoff)
+
+        return wait_seconds
+
+    def stream(self, stop: threading.Event = None) -> Iterator[list[dict]]:
+        """Yields each non empty chunk until stop is set, checkpointing once it's consumed."""
+
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            rows = self.poll()
+            if rows:
+                yield rows
+                self.rows_delivered += len(rows)
+                self.save_checkpoint()
+
+            wait_seconds = self._next_interval(rows)
+            if wait_seconds:
+                logging.debug(f"{self.table} idle, next poll in {wait_seconds:.1f}s")
+                stop.wait(wait_seconds)
+
+    def run(
+        self, callback: Callable[[list[dict]], None], stop: threading.Event = None
+    ) -> int:
+        """Calls callback with each chunk until stop is set. Returns the rows delivered."""
+
+        start = time.perf_counter()
+        for rows in self.stream(stop):
+            callback(rows)
+
+        logging.info(
+            f"Delivered {self.rows_delivered} {self.table} rows in "
+            f"{time.perf_counter() - start:.1f}s"
+        )
+
+        return self.rows_delivered
@@ -0,0 +1,203 @@
+import logging
+import re
+import threading
+
+from collections import OrderedDict
+from typing import Any
+
+DEFAULT_MAX_ENTRIES: int = 256
+
+_TABLE = r"(?:\[?\w+\]?\.)?\[?(\w+)\]?"
+_READ_TABLES = re.compile(rf"\b(?:FROM|JOIN)\s+{_TABLE}", re.IGNORECASE)
+_WRITTEN_TABLES = re.compile(
+    rf"\b(?:INSERT\s+(?:INTO\s+)?|UPDATE\s+|DELETE\s+(?:FROM\s+)?|MERGE\s+(?:INTO\s+)?"
+    rf"|TRUNCATE\s+TABLE\s+|(?:CREATE|ALTER|DROP)\s+TABLE\s+){_TABLE}",
+    re.IGNORECASE,
+)
+# Statements whose effects can't be read from the text (sprocs, dynamic SQL); the
+# sp_help* catalog procs only read
+_OPAQUE_WRITE = re.compile(
+    r"\bEXEC(?:UTE)?\b(?!\s+(?:\w+\.)?sp_help\w*)|\bsp_executesql\b", re.IGNORECASE
+)
+
+# Values like AI scripts ('exec ...') must not be read as statements
+_LITERALS_AND_COMMENTS = re.compile(r"N?'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def _statement_text(query: str) -> str:
+    return _LITERALS_AND_COMMENTS.sub("''", query)
+
+
+def read_tables(query: str) -> frozenset[str]:
+    """Returns the lower cased names of the tables a statement reads."""
+    return frozenset(
+        name.lower() for name in _READ_TABLES.findall(_statement_text(query))
+    )
+
+
+def written_tables(query: str) -> frozenset[str] | None:
+    """Returns the tables a statement writes, or None if that can't be determined."""
+
+    text = _statement_text(query)
+    if _OPAQUE_WRITE.search(text):
+        return None
+    return frozenset(name.lower() for name in _WRITTEN_TABLES.findall(text))
+
+
+class QueryResultCache:
+    """Bounded LRU cache of fetched rows keyed by statement and parameters.
+
+    Each entry records the tables its statement reads. A write only evicts the
+    entries that read one of the written tables; a write that can't be parsed
+    (e.g. EXEC of a sproc) clears the whole cache.
+
+    Every invalidation also bumps a per table generation. A reader takes
+    generation() before running its statement and passes it to put(), so rows
+    read before a concurrent invalidation are dropped instead of cached.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, tuple], tuple[list, frozenset[str]]] = (
+            OrderedDict()
+        )
+        self._keys_by_table: dict[str, set[tuple[str, tuple]]] = {}
+        self._lock = threading.Lock()
+
+        # Bumped by invalidate_tables() per table, and by clear() for every table
+        self._table_generations: dict[str, int] = {}
+        self._clear_generation: int = 0
+
+        # Database the cached rows came from; see bind()
+        self.source: tuple = None
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.invalidations: int = 0
+        self.stale_puts: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, query: str, params: tuple = ()) -> list | None:
+        """Returns the cached rows for the statement, or None on a miss."""
+
+        key = (query, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return entry[0]
+
+    def _generation_of(self, tables: frozenset[str]) -> tuple:
+        return self._clear_generation, tuple(
+            self._table_generations.get(table, 0) for table in sorted(tables)
+        )
+
+    def generation(self, query: str) -> tuple:
+        """Returns the current generation of the tables query reads, for put()."""
+
+        tables = read_tables(query)
+        with self._lock:
+            return self._generation_of(tables)
+
+    def put(
+        self, query: str, rows: list, params: tuple = (), generation: tuple = None
+    ) -> None:
+        """Caches rows, unless generation is given and a table read has changed since."""
+
+        key = (query, params)
+        tables = read_tables(query)
+        with self._lock:
+            if generation is not None and generation != self._generation_of(tables):
+                self.stale_puts += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (rows, tables)
+            for table in tables:
+                self._keys_by_table.setdefault(table, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: tuple[str, tuple]) -> None:
+        _, tables = self._entries.pop(key)
+        for table in tables:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_table[table]
+
+    def invalidate_tables(self, tables: frozenset[str] | set[str]) -> int:
+        """Evicts every entry that reads one of tables. Returns how many were evicted."""
+
+        with self._lock:
+            keys = set()
+            for table in tables:
+                table = table.lower()
+                generation = self._table_generations.get(table, 0)
+                self._table_generations[table] = generation + 1
+                keys |= self._keys_by_table.get(table, set())
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+
+        if keys:
+            logging.debug(f"Query cache: {len(keys)} entries invalidated by {sorted(tables)}")
+
+        return len(keys)
+
+    def invalidate_for(self, query: str) -> frozenset[str] | None:
+        """Evicts the entries a statement could have made stale.
+
+        Returns the tables written, or None if the whole cache was cleared.
+        """
+
+        tables = written_tables(query)
+        if tables is None:
+            self.clear()
+        elif tables:
+            self.invalidate_tables(tables)
+
+        return tables
+
+    def bind(self, source: tuple) -> bool:
+        """Clears the cache if its rows came from a different source (server, database).
+
+        Returns True if the source changed.
+        """
+
+        if source == self.source:
+            return False
+
+        if self.source is not None:
+            logging.debug(f"Query cache: cleared switching to {source}")
+        self.clear()
+        self.source = source
+
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear_generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._keys_by_table.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_puts": self.stale_puts,
+        }
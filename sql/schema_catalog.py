@@ -0,0 +1,132 @@
+import logging
+import re
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from ..sql_queries import GET_SCHEMA_CATALOG_QUERY
+
+if TYPE_CHECKING:
+    from .sql_handler import SQLHandler
+
+_TABLE_NAME = re.compile(r"^(?:\[?(\w+)\]?\.)?\[?(\w+)\]?$")
+# Temp tables (#name) don't match, so they never invalidate the catalog
+_DDL = re.compile(
+    r"\b(?:CREATE|ALTER|DROP)\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:\[?\w+\]?\.)?\[?\w+",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class ColumnInfo:
+    """Dataclass to store one column of a table, as listed by INFORMATION_SCHEMA.COLUMNS."""
+
+    table: str
+    name: str
+    ordinal: int
+    data_type: str
+    max_length: int | None
+    precision: int | None
+    scale: int | None
+    nullable: bool
+    identity: bool
+    # Fractional second digits of date/time types
+    datetime_precision: int | None = None
+
+
+def table_key(table: str) -> str | None:
+    """Returns the lower cased bare name of "[dbo].[Table]", "dbo.Table" or "Table".
+
+    None for names the catalog can't hold: other schemas, temp tables and the like.
+    """
+
+    match = _TABLE_NAME.match(table.strip())
+    if match is None:
+        return None
+
+    schema, name = match.groups()
+    if schema is not None and schema.lower() != "dbo":
+        return None
+
+    return name.lower()
+
+
+class SchemaCatalog:
+    """Column names, ordinals and types of every dbo table, loaded in one query.
+
+    Owned by an SQLHandler, so it lives as long as its connection. DDL run through
+    that handler invalidates it; call invalidate() after schema changes made
+    elsewhere.
+    """
+
+    def __init__(self, sql_handler: "SQLHandler") -> None:
+        self.sql_handler = sql_handler
+        self._tables: dict[str, list[ColumnInfo]] = None
+
+    def load(self) -> None:
+        logging.debug("Loading schema catalog...")
+
+        tables: dict[str, list[ColumnInfo]] = {}
+        for row in self.sql_handler.query_and_fetch_all(GET_SCHEMA_CATALOG_QUERY):
+            column = ColumnInfo(
+                table=row[0],
+                name=row[1],
+                ordinal=int(row[2]),
+                data_type=row[3],
+                max_length=row[4],
+                precision=row[5],
+                scale=row[6],
+                nullable=row[7] == "YES",
+                identity=bool(row[8]),
+                datetime_precision=row[9],
+            )
+            tables.setdefault(column.table.lower(), []).append(column)
+
+        self._tables = tables
+        logging.debug(f"Schema catalog loaded {len(tables)} tables.")
+
+    @property
+    def loaded(self) -> bool:
+        return self._tables is not None
+
+    def invalidate(self) -> None:
+        self._tables = None
+
+    def invalidate_for(self, query: str) -> None:
+        """Invalidates the catalog if query changes a table's columns."""
+
+        if self._tables is not None and _DDL.search(query):
+            self.invalidate()
+
+    def columns(self, table: str) -> list[ColumnInfo] | None:
+        """Returns the columns of table in ordinal order, or None if it isn't a dbo table."""
+
+        key = table_key(table)
+        if key is None:
+            return None
+
+        if self._tables is None:
+            self.load()
+        return self._tables.get(key)
+
+    def column_indexes(self, table: str) -> dict[str, int] | None:
+        """Returns {column name: index in SELECT *}, or None if table isn't known."""
+
+        columns = self.columns(table)
+        if columns is None:
+            return None
+        return {column.name: index for index, column in enumerate(columns)}
+
+    def column(self, table: str, name: str) -> ColumnInfo | None:
+        """Returns the named column of table, matched case insensitively."""
+
+        for column in self.columns(table) or []:
+            if column.name.lower() == name.lower():
+                return column
+        return None
+
+    def identity_column(self, table: str) -> str | None:
+        for column in self.columns(table) or []:
+            if column.identity:
+                return column.name
+        return None
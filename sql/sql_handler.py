@@ -1,11 +1,37 @@
-import pyodbc
 import json
 import logging
+import re
 
-from typing import Any, Callable
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, TYPE_CHECKING
 
+from ..metrics import DEFAULT_METRICS, MetricsRegistry, fingerprint_query
+from .query_cache import QueryResultCache
+from .schema_catalog import SchemaCatalog
 from ..utilities import record_transaction
 
+# pyodbc is imported on connect so the package loads without the ODBC driver installed
+if TYPE_CHECKING:
+    import pyodbc
+
+
+# Must be the first statement of their batch, so they're never queued with others
+_BATCH_ALONE = re.compile(
+    r"\b(?:CREATE|ALTER)\s+(?:OR\s+ALTER\s+)?(?:PROC|PROCEDURE|VIEW|FUNCTION|TRIGGER)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class UnitOfWork:
+    """Dataclass tracking the open transaction of an SQLHandler.unit_of_work block."""
+
+    batch: bool = False
+    pending: list[str] = field(default_factory=list)
+    statements: int = 0
+    round_trips: int = 0
+
 
 def requires_connection(func: Callable[..., Any]) -> Callable[..., Any]:
     """Decorator to check if the SQL connection is valid."""
@@ -24,11 +50,52 @@ def requires_connection(func: Callable[..., Any]) -> Callable[..., Any]:
 class SQLHandler:
     """Low level class to handle SQL connections."""
 
-    def __init__(self) -> None:
-        self.connection: pyodbc.Connection = None
-        self.cursor: pyodbc.Cursor = None
+    def __init__(
+        self, metrics: MetricsRegistry = None, query_cache: QueryResultCache = None
+    ) -> None:
+        self.connection: "pyodbc.Connection" = None
+        self.cursor: "pyodbc.Cursor" = None
+
+        self.metrics: MetricsRegistry = metrics or DEFAULT_METRICS
+
+        # Optional; when set, every statement run here invalidates the entries it could change
+        self.query_cache: QueryResultCache = query_cache
+        # Tables written since the last commit (None: unknown), evicted again on
+        # commit as a shared cache may have been refilled with the committed rows
+        self._uncommitted_writes: set[str] | None = set()
+
+        # Set while inside unit_of_work(); commits are deferred until it exits
+        self.unit: UnitOfWork = None
+
+        # Column layout of every dbo table, loaded on first use for this connection
+        self.schema_catalog: SchemaCatalog = SchemaCatalog(self)
+
+    def _invalidate_cache(self, query: str) -> None:
+        if self.query_cache is not None:
+            written = self.query_cache.invalidate_for(query)
+            if written is None:
+                self._uncommitted_writes = None
+            elif written and self._uncommitted_writes is not None:
+                self._uncommitted_writes |= written
+        self.schema_catalog.invalidate_for(query)
+
+    def _invalidate_committed(self) -> None:
+        """Evicts again whatever the transaction just committed wrote."""
+
+        written, self._uncommitted_writes = self._uncommitted_writes, set()
+        if self.query_cache is None:
+            return
+        if written is None:
+            self.query_cache.clear()
+        elif written:
+            self.query_cache.invalidate_tables(written)
+
+    def connect(
+        self, server_name, database_name, username, password, timeout: int = 0
+    ) -> None:
+        """Connects to SQL Server. A non zero timeout (seconds) bounds login and each query."""
+        import pyodbc
 
-    def connect(self, server_name, database_name, username, password) -> None:
         # Connect to SQL Server
         logging.info("Connecting to SQL Server...")
         self.connection = pyodbc.connect(
@@ -36,8 +103,10 @@ class SQLHandler:
             "SERVER=" + server_name + ";" +
             "DATABASE=" + database_name + ";" +
             "UID=" + username + ";" +
-            "PWD=" + password + ";"
+            "PWD=" + password + ";",
+            timeout=timeout,
         )
+        self.connection.timeout = timeout
         logging.debug("Connected to SQL Server.")
 
         self.cursor = self.connection.cursor()
@@ -49,39 +118,197 @@ class SQLHandler:
             self.connection.close()
         logging.debug("Disconnected from SQL Server.")
 
+    @requires_connection
+    @contextmanager
+    def unit_of_work(self, batch: bool = False) -> Iterator[UnitOfWork]:
+        """Runs the block as one transaction: commits once on exit, rolls back on error.
+
+        With batch, statements that return nothing are queued and sent together
+        as one batch when a result is next needed or the block exits. A nested
+        block joins the outer one.
+        """
+
+        if self.unit is not None:
+            yield self.unit
+            return
+
+        unit = self.unit = UnitOfWork(batch)
+        try:
+            yield unit
+            self.flush()
+        except BaseException:
+            self.unit = None
+            logging.error("Unit of work failed. Rolling back.")
+            try:
+                self.rollback()
+            except Exception as error:
+                logging.warning(f"Rollback failed: {error}")
+            raise
+
+        self.unit = None
+        self.commit()
+        logging.debug(
+            f"Unit of work committed {unit.statements} statements "
+            f"in {unit.round_trips} round trips"
+        )
+
+    def _defer(self, query: str) -> bool:
+        """Queues query if a batched unit of work is open. Returns whether it was queued."""
+
+        if self.unit is None:
+            return False
+
+        self.unit.statements += 1
+        if not self.unit.batch:
+            self.unit.round_trips += 1
+            return False
+
+        if _BATCH_ALONE.search(query):
+            self.flush()
+            self.unit.round_trips += 1
+            return False
+
+        self.unit.pending.append(query.strip().rstrip(";"))
+        # Evict now so cached reads made before the flush don't see stale rows
+        self._invalidate_cache(query)
+        return True
+
+    @requires_connection
+    def flush(self) -> None:
+        """Sends the statements queued by a batched unit of work, without committing."""
+
+        if self.unit is None or not self.unit.pending:
+            return
+
+        query = ";\n".join(self.unit.pending) + ";"
+        self.unit.pending = []
+        self.unit.round_trips += 1
+        with self.metrics.track("sql", fingerprint_query(query)):
+            self.cursor.execute(query)
+        self._invalidate_cache(query)
+
     @requires_connection
     def get_identity(self) -> int:
-        self.cursor.execute("SELECT SCOPE_IDENTITY()")
-        result = self.cursor.fetchone()
+        self.flush()
+        with self.metrics.track("sql", "SELECT SCOPE_IDENTITY()") as sample:
+            self.cursor.execute("SELECT SCOPE_IDENTITY()")
+            result = self.cursor.fetchone()
+            sample.rows = 1
         record_transaction("SELECT SCOPE_IDENTITY()")
         record_transaction(f"Result: {result[0]}")
         return result[0]
 
     @requires_connection
     def query_and_commit(self, query: str) -> None:
+        """Runs query and commits, unless a unit of work is open (see unit_of_work)."""
+
+        record_transaction(query)
+        if self._defer(query):
+            return
+
+        with self.metrics.track("sql", fingerprint_query(query)):
+            self.cursor.execute(query)
+            if self.unit is None:
+                self.connection.commit()
+        self._invalidate_cache(query)
+        if self.unit is None:
+            self._invalidate_committed()
+
+    @requires_connection
+    def query_and_fetch_all(self, query: str, cache: bool = False) -> list["pyodbc.Row"]:
+        """Runs query and returns all rows. With cache, repeated reads are served from query_cache."""
+
+        generation = None
+        if cache and self.query_cache is not None:
+            data = self.query_cache.get(query)
+            if data is not None:
+                return data
+            # Taken before the read, so a write invalidating meanwhile rejects the put
+            generation = self.query_cache.generation(query)
+
+        self.flush()
+        with self.metrics.track("sql", fingerprint_query(query)) as sample:
+            self.cursor.execute(query)
+            data = self.cursor.fetchall()
+            sample.rows = len(data)
         record_transaction(query)
-        self.cursor.execute(query)
-        self.connection.commit()
+        record_transaction(f"Results:\n{json.dumps(data, default=str, indent=2)}")
+
+        # Writes with OUTPUT clauses come through here too
+        self._invalidate_cache(query)
+        if cache and self.query_cache is not None:
+            self.query_cache.put(query, data, generation=generation)
+
+        return data
 
     @requires_connection
-    def query_and_fetch_all(self, query: str) -> list[pyodbc.Row]:
-        self.cursor.execute(query)
-        data = self.cursor.fetchall()
+    def query_and_fetch_one(self, query: str) -> "pyodbc.Row":
+        self.flush()
+        with self.metrics.track("sql", fingerprint_query(query)) as sample:
+            self.cursor.execute(query)
+            data = self.cursor.fetchone()
+            sample.rows = int(data is not None)
         record_transaction(query)
         record_transaction(f"Results:\n{json.dumps(data, default=str, indent=2)}")
+        self._invalidate_cache(query)
         return data
 
     @requires_connection
-    def query_and_fetch_one(self, query: str) -> pyodbc.Row:
-        self.cursor.execute(query)
-        data = self.cursor.fetchone()
+    def query_and_fetch_last(self, query: str) -> list["pyodbc.Row"]:
+        """Runs a multi statement batch, draining every result set, and returns the last one.
+
+        Sprocs called by the batch may return their own result sets; they are read
+        and dropped so the batch runs to completion.
+        """
+
+        self.flush()
+        data = []
+        with self.metrics.track("sql", fingerprint_query(query)) as sample:
+            self.cursor.execute(query)
+            while True:
+                if self.cursor.description is not None:
+                    data = self.cursor.fetchall()
+                if not self.cursor.nextset():
+                    break
+            sample.rows = len(data)
         record_transaction(query)
         record_transaction(f"Results:\n{json.dumps(data, default=str, indent=2)}")
+        self._invalidate_cache(query)
         return data
 
+    @requires_connection
+    def execute_many(self, query: str, rows: list[tuple]) -> None:
+        """Runs a parameterized statement for every row in one round trip, without committing."""
+
+        self.flush()
+        if self.unit is not None:
+            self.unit.statements += 1
+            self.unit.round_trips += 1
+
+        record_transaction(f"{query} ({len(rows)} rows)")
+        with self.metrics.track("sql", fingerprint_query(query)) as sample:
+            # Sends the parameter array at once instead of one execute per row
+            self.cursor.fast_executemany = True
+            try:
+                self.cursor.executemany(query, rows)
+            finally:
+                self.cursor.fast_executemany = False
+            sample.rows = len(rows)
+        self._invalidate_cache(query)
+
     @requires_connection
     def columns_for_table(self, table: str) -> dict[str, int]:
-        self.cursor.execute(f"SELECT TOP(1) * FROM {table}")
+        """Maps the column names of table to their index in SELECT *."""
+
+        columns = self.schema_catalog.column_indexes(table)
+        if columns is not None:
+            return columns
+
+        # Not a dbo table (e.g. a temp table or another schema); read it off a query
+        query = f"SELECT TOP(1) * FROM {table}"
+        self.flush()
+        with self.metrics.track("sql", fingerprint_query(query)):
+            self.cursor.execute(query)
 
         # Create a dictionary mapping column names to indices
         columns: dict = {
@@ -94,4 +321,35 @@ class SQLHandler:
     @requires_connection
     def query_and_execute(self, query: str) -> None:
         record_transaction(query)
-        self.cursor.execute(query)
+        if self._defer(query):
+            return
+
+        with self.metrics.track("sql", fingerprint_query(query)):
+            self.cursor.execute(query)
+        self._invalidate_cache(query)
+
+    @requires_connection
+    def commit(self) -> None:
+        if self.unit is not None:
+            # The open unit of work commits when it exits
+            self.flush()
+            return
+
+        record_transaction("COMMIT")
+        with self.metrics.track("sql", "COMMIT"):
+            self.connection.commit()
+        self._invalidate_committed()
+
+    @requires_connection
+    def rollback(self) -> None:
+        if self.unit is not None:
+            self.unit.pending = []
+
+        record_transaction("ROLLBACK")
+        with self.metrics.track("sql", "ROLLBACK"):
+            self.connection.rollback()
+        # Rows read inside the transaction may no longer exist
+        self._uncommitted_writes = set()
+        if self.query_cache is not None:
+            self.query_cache.clear()
+        self.schema_catalog.invalidate()
@@ -53,6 +53,35 @@ VALUES
 0 , 0 );
 """
 
+GET_RI_SCHEDULES_QUERY = """
+SELECT ParentId, ScheduleType, ProcessingInterval, ProcessingIntervalType
+FROM [dbo].[RISchedules];
+"""
+
+# {VALUES} is a list of ( DOC_TYPE_ID , PROCESSING_INTERVAL , PROCESSING_INTERVAL_TYPE ) rows
+UPSERT_RI_SCHEDULES_QUERY = """
+MERGE [dbo].[RISchedules] WITH (HOLDLOCK) AS target
+USING (VALUES {VALUES}) AS source (ParentId, ProcessingInterval, ProcessingIntervalType)
+ON target.ParentId = source.ParentId
+WHEN MATCHED THEN
+    UPDATE Set
+        Modified = GETDATE(),
+        ScheduleType = 2,
+        ProcessingInterval = source.ProcessingInterval,
+        ProcessingIntervalType = source.ProcessingIntervalType
+WHEN NOT MATCHED BY TARGET THEN
+    INSERT ( Created , Modified , ParentId , ModifiedBy , TimeToRun , LastTimeRun , 
+    DeferDays , DaysInQueue , ReportFailures , UpdateRIQueue , ScheduleType , 
+    ProcessingInterval , ProcessingIntervalType , ProcessNow , 
+    PriorityProcessNewDocs , PriorityProcessDelay)
+    VALUES ( GETDATE() , GETDATE() , source.ParentId , -1 , NULL , NULL ,
+    0 , 3 , 0 , NULL , 2 ,
+    source.ProcessingInterval , source.ProcessingIntervalType , 0 , 
+    0 , 0 );
+"""
+
+UPSERT_RI_SCHEDULE_VALUES = "( {DOC_TYPE_ID} , {PROCESSING_INTERVAL} , {PROCESSING_INTERVAL_TYPE} )"
+
 DELETE_RI_SCHEDULE_QUERY = """
 DELETE FROM [dbo].[RISchedules] WHERE ParentId = {DOC_TYPE_ID};
 """
@@ -317,3 +346,155 @@ DELETE FROM [dbo].[AIProfiles] where AIProfileID = {EXPORT_AI_ID};
 GET_WORKFLOW_QUEUES_QUERY = "SELECT * FROM [dbo].[WorkflowQueues]"
 GET_WORKFLOW_NEXT_ACTIVITY_QUERY = "SELECT * FROM [dbo].[WorkflowNextActivity]"
 GET_WORKFLOW_PLACEMENT_QUERY = "SELECT * FROM [dbo].[WorkflowPlacements]"
+
+# Bulk AI provisioning. Row values are joined into {VALUES}; SQL Server caps a
+# table value constructor at 1000 rows so callers chunk accordingly.
+LOCK_AI_SEQUENCES_QUERY = """
+SELECT ParentId, COUNT(*) FROM DocTypeAIProfiles WITH (UPDLOCK, HOLDLOCK)
+WHERE ParentId IN ({DOC_TYPE_IDS})
+GROUP BY ParentId;
+"""
+
+# OUTPUT without INTO is rejected on tables with enabled triggers, so the new ids
+# go through a table variable
+BULK_ADD_AI_QUERY = """
+SET NOCOUNT ON; 
+DECLARE @Inserted TABLE ( AIProfileID int , ProfileName nvarchar(max) );
+INSERT into AIProfiles ( Created , Modified , ModifiedBy , ProfileName , DataSourceID , SourceTable , QueryText , SingleTable , PropsInNotReq) 
+OUTPUT INSERTED.$IDENTITY, INSERTED.ProfileName INTO @Inserted
+VALUES {VALUES};
+SELECT AIProfileID , ProfileName FROM @Inserted;
+"""
+
+BULK_ADD_AI_VALUES = "( GETDATE() , GETDATE() , -1 , '{AI_NAME}' , 10000 , NULL , '{AI_SCRIPT}', 0 , 1 )"
+
+BULK_ADD_DOC_TYPE_AI_QUERY = """
+SET NOCOUNT ON; 
+DECLARE @Inserted TABLE ( DocTypeAIProfileID int , AIProfileID int );
+INSERT INTO [dbo].[DocTypeAIProfiles]([Created],[Modified],[ParentId],[ModifiedBy],[FolderID],[Sequence],[AIProfileID]
+    ,[ExitOnSuccess],[ExecutionContext],[SkipOnDocTypeProperty],[SkipOnDocTypePropID])
+OUTPUT INSERTED.$IDENTITY, INSERTED.AIProfileID INTO @Inserted
+VALUES {VALUES};
+SELECT DocTypeAIProfileID , AIProfileID FROM @Inserted;
+"""
+
+BULK_ADD_DOC_TYPE_AI_VALUES = "(GETDATE(),GETDATE(),{DOC_TYPE_ID},-1,-1,{SEQ_COUNT},{AI_PROFILE_ID},0,{EXECUTION_CONTEXT},0,NULL)"
+
+BULK_ADD_RETURN_PROP_TO_AI_QUERY = """
+SET NOCOUNT ON; 
+INSERT into AIOutputProperties ( Created , Modified , ParentId , ModifiedBy , Sequence , PropertyID , SourceColName , ScriptText , ReplaceExistingValues) 
+VALUES {VALUES};
+"""
+
+BULK_ADD_RETURN_PROP_TO_AI_VALUES = "(GETDATE(), GETDATE(), {AI_PROFILE_ID} , -1 , 0 , {PROP_ID}, '{COLUMN_NAME}' , NULL , NULL )"
+
+BULK_ENABLE_AI_QUERY = """
+UPDATE [dbo].[DocumentTypes]
+Set
+    Modified = GETDATE(),
+    AIEnabled = 1
+WHERE DocumentTypeId IN ({DOC_TYPE_IDS});
+"""
+
+# Bulk workflow moves. Rows are loaded into a session temp table with fast_executemany,
+# then the move (and audit) sprocs run server side over the whole chunk in one batch.
+# Each row runs under a savepoint so one failed document doesn't undo the others.
+CREATE_WF_MOVES_TABLE_QUERY = """
+IF OBJECT_ID('tempdb..#WorkflowMoves') IS NOT NULL DROP TABLE #WorkflowMoves;
+CREATE TABLE #WorkflowMoves (
+    RowId int IDENTITY(1,1) PRIMARY KEY,
+    DocumentID int NOT NULL,
+    WorkflowActivityID int NOT NULL,
+    Succeeded bit NULL,
+    ErrorMessage nvarchar(4000) NULL
+);
+"""
+
+INSERT_WF_MOVES_QUERY = "INSERT INTO #WorkflowMoves (DocumentID, WorkflowActivityID) VALUES (?, ?)"
+
+RUN_WF_MOVES_QUERY = """
+SET NOCOUNT ON;
+DECLARE @RowId int = 0, @DocumentID int, @WorkflowActivityID int;
+WHILE 1 = 1
+BEGIN
+    SELECT TOP (1) @RowId = RowId, @DocumentID = DocumentID, @WorkflowActivityID = WorkflowActivityID
+    FROM #WorkflowMoves WHERE RowId > @RowId ORDER BY RowId;
+    IF @@ROWCOUNT = 0 BREAK;
+
+    SAVE TRANSACTION WorkflowMove;
+    BEGIN TRY
+        EXEC [dbo].[{MOVE_SPROC}] @DocumentID, @WorkflowActivityID;
+        {AUDIT}
+        UPDATE #WorkflowMoves SET Succeeded = 1 WHERE RowId = @RowId;
+    END TRY
+    BEGIN CATCH
+        IF XACT_STATE() = -1 THROW;
+        IF XACT_STATE() = 1 ROLLBACK TRANSACTION WorkflowMove;
+        UPDATE #WorkflowMoves SET Succeeded = 0, ErrorMessage = ERROR_MESSAGE() WHERE RowId = @RowId;
+    END CATCH
+END
+SELECT DocumentID, WorkflowActivityID, Succeeded, ErrorMessage FROM #WorkflowMoves ORDER BY RowId;
+DROP TABLE #WorkflowMoves;
+"""
+
+AUDIT_WF_MOVE_EXEC = "EXEC [dbo].[{AUDIT_SPROC}] @DocumentID, @WorkflowActivityID;"
+
+# Same arguments the export AI script passes (see EXPORT_SPROC_SCRIPT)
+RUN_DOC_EXPORT_QUERY = "EXEC [dbo].[{SPROC_NAME}] '{DOCUMENT_ID}', '{SUCCESS_WF}', '{FAILED_WF}'"
+
+# Monitor table polling. {FILTER} is "1 = 1" before the first row has been seen;
+# WITH TIES keeps every row sharing the last watermark value in the same chunk
+GET_MAX_WATERMARK_QUERY = "SELECT MAX([{COLUMN}]) FROM [dbo].[{TABLE}]"
+POLL_TABLE_QUERY = "SELECT TOP ({CHUNK_SIZE}) WITH TIES * FROM [dbo].[{TABLE}] WHERE {FILTER} ORDER BY [{COLUMN}]"
+WATERMARK_FILTER = "[{COLUMN}] > {VALUE}"
+POLL_WINDOW_QUERY = "SELECT * FROM [dbo].[{TABLE}] WHERE [{COLUMN}] > {LOW} AND [{COLUMN}] <= {VALUE} ORDER BY [{COLUMN}]"
+
+# Bulk AI re-index, same temp table approach as the workflow mover
+CREATE_AI_REINDEX_TABLE_QUERY = """
+IF OBJECT_ID('tempdb..#AIReindex') IS NOT NULL DROP TABLE #AIReindex;
+CREATE TABLE #AIReindex (
+    RowId int IDENTITY(1,1) PRIMARY KEY,
+    DocumentID int NOT NULL,
+    Succeeded bit NULL,
+    ErrorMessage nvarchar(4000) NULL
+);
+"""
+
+INSERT_AI_REINDEX_QUERY = "INSERT INTO #AIReindex (DocumentID) VALUES (?)"
+
+RUN_AI_REINDEX_QUERY = """
+SET NOCOUNT ON;
+DECLARE @RowId int = 0, @DocumentID int;
+WHILE 1 = 1
+BEGIN
+    SELECT TOP (1) @RowId = RowId, @DocumentID = DocumentID
+    FROM #AIReindex WHERE RowId > @RowId ORDER BY RowId;
+    IF @@ROWCOUNT = 0 BREAK;
+
+    SAVE TRANSACTION AIReindex;
+    BEGIN TRY
+        EXEC [dbo].[{SPROC_NAME}] @DocId = @DocumentID;
+        UPDATE #AIReindex SET Succeeded = 1 WHERE RowId = @RowId;
+    END TRY
+    BEGIN CATCH
+        IF XACT_STATE() = -1 THROW;
+        IF XACT_STATE() = 1 ROLLBACK TRANSACTION AIReindex;
+        UPDATE #AIReindex SET Succeeded = 0, ErrorMessage = ERROR_MESSAGE() WHERE RowId = @RowId;
+    END CATCH
+END
+SELECT DocumentID, ErrorMessage FROM #AIReindex WHERE Succeeded = 0 ORDER BY RowId;
+DROP TABLE #AIReindex;
+"""
+
+GET_EXISTING_SPROCS_QUERY = "SELECT name FROM sys.procedures WHERE schema_id = SCHEMA_ID('{SCHEMA}') AND name IN ({SPROC_NAMES})"
+
+# Every dbo column in one round trip, for the schema catalog
+GET_SCHEMA_CATALOG_QUERY = """
+SELECT c.TABLE_NAME, c.COLUMN_NAME, c.ORDINAL_POSITION, c.DATA_TYPE, c.CHARACTER_MAXIMUM_LENGTH,
+    c.NUMERIC_PRECISION, c.NUMERIC_SCALE, c.IS_NULLABLE,
+    COLUMNPROPERTY(OBJECT_ID(QUOTENAME(c.TABLE_SCHEMA) + '.' + QUOTENAME(c.TABLE_NAME)), c.COLUMN_NAME, 'IsIdentity'),
+    c.DATETIME_PRECISION
+FROM INFORMATION_SCHEMA.COLUMNS c
+WHERE c.TABLE_SCHEMA = 'dbo'
+ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION;
+"""
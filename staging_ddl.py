@@ -0,0 +1,260 @@
+import re
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from doclink_py.doclink_types.propertys import Property
+from doclink_py.doclink_types.stamps import DistributionStampField
+
+if TYPE_CHECKING:
+    from doclink_py.sql.schema_catalog import ColumnInfo
+
+STAGING_HEADER_TABLE = "Custom_StagingTable_Header"
+STAGING_DETAIL_TABLE = "Custom_StagingTable_Details"
+
+# Fragments keep their leading comma; the staging templates and pivot lists expect it
+COLUMN_SEPARATOR: str = "\r\n\t"
+
+# "[decimal](18, 2) NULL" -> ("decimal", "18", "2")
+_DATA_TYPE = re.compile(r"\[(\w+)\](?:\((\d+)(?:,\s*(\d+))?\))?")
+_NULLABILITY = re.compile(r"\s+(?:NOT\s+)?NULL\s*$", re.IGNORECASE)
+
+# A column definition line of the staging template, e.g. "[DocumentID] [int] NOT NULL,"
+_TEMPLATE_COLUMN = re.compile(r"^\s*,?\s*\[(\w+)\]\s+\[?\w", re.MULTILINE)
+_TEMPLATE_PLACEHOLDER = re.compile(r"\{\w+\}")
+
+
+@dataclass(frozen=True)
+class ColumnFragments:
+    """Dataclass to store the precomputed DDL fragments of one staging column."""
+
+    prompt_type: str | None
+    prompt: str
+    id: str
+    column: str
+    data_type: str | None
+
+
+@dataclass(frozen=True)
+class StagingDDL:
+    """Dataclass to store the compiled column lists for the staging tables and export sproc.
+
+    A list is None if a selected column has no value for it (an unsupported
+    DataType); see require_column_list.
+    """
+
+    header_columns: str | None
+    detail_columns: str | None
+    header_prompts: str
+    detail_prompts: str
+    header_ids: str | None
+    detail_ids: str | None
+    # (column name, FormattedDataType) pairs, for diffing against the live tables
+    header_schema: tuple[tuple[str, str], ...] = ()
+    detail_schema: tuple[tuple[str, str], ...] = ()
+
+
+class StagingDDLCompiler:
+    """Emits staging table column lists from fragments computed once per item.
+
+    Columns are looked up by name in a dict instead of scanning the source list,
+    and compiled results are memoized by the selected header/detail columns.
+    """
+
+    def __init__(
+        self,
+        fragments: dict[str, ColumnFragments],
+        missing_error: tuple[str, str],
+    ) -> None:
+        self.fragments = fragments
+        self._missing_error = missing_error
+        self._compiled: dict[tuple[tuple[str, ...], tuple[str, ...]], StagingDDL] = {}
+
+    @classmethod
+    def from_properties(cls, properties: list[Property]) -> "StagingDDLCompiler":
+        """Keys columns by FormattedUserPrompt, the first matching property wins."""
+
+        fragments: dict[str, ColumnFragments] = {}
+        for prop in properties:
+            prompt = prop.FormattedUserPrompt
+            if prompt in fragments:
+                continue
+            data_type = _try_data_type(prop)
+            fragments[prompt] = ColumnFragments(
+                f",[{prompt}] {data_type}" if data_type else None,
+                f",[{prompt}]",
+                f",[{prop.PropertyId}]",
+                prompt,
+                data_type,
+            )
+
+        return cls(
+            fragments,
+            ("INVALID_PROPERTY_NAME", "Invalid property name during fprompt: {NAME}"),
+        )
+
+    @classmethod
+    def from_distribution_stamp_fields(
+        cls, distribution_stamp_fields: list[DistributionStampField]
+    ) -> "StagingDDLCompiler":
+        """Keys columns by Caption, the first matching stamp field wins."""
+
+        fragments: dict[str, ColumnFragments] = {}
+        for dist_stamp_field in distribution_stamp_fields:
+            if dist_stamp_field.Caption in fragments:
+                continue
+            prompt = dist_stamp_field.UserPrompt
+            try:
+                select_statement = dist_stamp_field.SelectStatement
+            except Exception:
+                select_statement = None
+            data_type = _try_data_type(dist_stamp_field)
+            fragments[dist_stamp_field.Caption] = ColumnFragments(
+                f",[{prompt}] {data_type}" if data_type else None,
+                f",[{prompt}]",
+                select_statement,
+                prompt,
+                data_type,
+            )
+
+        return cls(
+            fragments,
+            (
+                "INVALID_DISTRIBUTION_STAMP__FIELD_CAPTION",
+                "Invalid distribution stamp field caption: {NAME}",
+            ),
+        )
+
+    def _fragments(self, column: str, strip: bool) -> ColumnFragments:
+        name = column.strip() if strip else column
+        fragments = self.fragments.get(name)
+        if fragments is None:
+            error_code, error_msg = self._missing_error
+            raise Exception(error_code, error_msg.format(NAME=name))
+
+        return fragments
+
+    def compile(
+        self, header_columns: list[str], detail_columns: list[str], strip: bool = True
+    ) -> StagingDDL:
+        """Returns every column list for the selection in one pass, memoized."""
+
+        cache_key = (tuple(header_columns), tuple(detail_columns))
+        if cache_key in self._compiled:
+            return self._compiled[cache_key]
+
+        header = [self._fragments(column, strip) for column in header_columns]
+        detail = [self._fragments(column, strip) for column in detail_columns]
+
+        ddl = StagingDDL(
+            header_columns=_join(f.prompt_type for f in header),
+            detail_columns=_join(f.prompt_type for f in detail),
+            header_prompts=_join(f.prompt for f in header),
+            detail_prompts=_join(f.prompt for f in detail),
+            header_ids=_join(f.id for f in header),
+            detail_ids=_join(f.id for f in detail),
+            header_schema=tuple((f.column, f.data_type) for f in header),
+            detail_schema=tuple((f.column, f.data_type) for f in detail),
+        )
+        self._compiled[cache_key] = ddl
+
+        return ddl
+
+    def column_names(self) -> set[str]:
+        """Every staging column name the source items can produce."""
+        return {fragments.column for fragments in self.fragments.values()}
+
+
+def _join(values) -> str | None:
+    values = list(values)
+    if None in values:
+        return None
+    return COLUMN_SEPARATOR.join(values)
+
+
+def require_column_list(column_list: str | None) -> str:
+    """Returns a compiled column list, raising if a selected column had an unsupported DataType."""
+
+    if column_list is None:
+        raise Exception("INVALID_DATA_TYPE", "Invalid data type in match statement.")
+    return column_list
+
+
+def _try_data_type(item: Property | DistributionStampField) -> str | None:
+    # Unsupported data types only fail if the column is actually selected
+    try:
+        return item.FormattedDataType
+    except Exception:
+        return None
+
+
+def template_column_names(template: str) -> set[str]:
+    """Lower cased names of the fixed columns the staging template defines."""
+
+    text = _TEMPLATE_PLACEHOLDER.sub("", template)
+    return {name.lower() for name in _TEMPLATE_COLUMN.findall(text)}
+
+
+def _with_nullability(data_type: str, nullable: bool) -> str:
+    # ALTER COLUMN resets nullability when it's left out; keep the column's own
+    return _NULLABILITY.sub("", data_type) + (" NULL" if nullable else " NOT NULL")
+
+
+def column_type_matches(data_type: str, existing: "ColumnInfo") -> bool:
+    """Returns True if an existing column already has data_type.
+
+    Only the type, length, precision and scale are compared; nullability is left
+    to the existing table.
+    """
+
+    match = _DATA_TYPE.match(data_type)
+    if match is None or match.group(1).lower() != str(existing.data_type).lower():
+        return False
+
+    type_name, first, second = match.groups()
+    if first is None:
+        return True
+    if type_name.lower() in ("varchar", "nvarchar", "char", "nchar"):
+        return existing.max_length == int(first)
+
+    return existing.precision == int(first) and (
+        second is None or existing.scale == int(second)
+    )
+
+
+def staging_migration_statements(
+    table: str,
+    desired: tuple[tuple[str, str], ...],
+    existing: list["ColumnInfo"],
+    droppable: set[str] = frozenset(),
+) -> list[str]:
+    """Returns the ALTER TABLE statements that bring table from existing to desired.
+
+    existing holds the table's columns from the schema catalog. Columns that aren't
+    desired are only dropped if they're in droppable (the columns this library
+    manages), so the fixed columns of the staging template are never touched.
+    Altered columns keep their existing NULL/NOT NULL. Names are compared case
+    insensitively, as SQL Server does.
+    """
+
+    existing_by_name = {column.name.lower(): column for column in existing}
+    desired_names = {name.lower() for name, _ in desired}
+    statements = []
+
+    for name, data_type in desired:
+        column = existing_by_name.get(name.lower())
+        if column is None:
+            statements.append(f"ALTER TABLE [dbo].[{table}] ADD [{name}] {data_type};")
+        elif not column_type_matches(data_type, column):
+            data_type = _with_nullability(data_type, column.nullable)
+            statements.append(
+                f"ALTER TABLE [dbo].[{table}] ALTER COLUMN [{name}] {data_type};"
+            )
+
+    droppable_names = {name.lower() for name in droppable}
+    for column in existing:
+        name = column.name
+        if name.lower() in droppable_names and name.lower() not in desired_names:
+            statements.append(f"ALTER TABLE [dbo].[{table}] DROP COLUMN [{name}];")
+
+    return statements
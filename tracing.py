@@ -0,0 +1,116 @@
+import logging
+import time
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .metrics import RoundTripSample
+
+# Traces are scoped per context so concurrent operations don't see each others round trips.
+# Worker threads only report into a trace when started with contextvars.copy_context().
+_ACTIVE_TRACES: ContextVar[tuple["RoundTripReport", ...]] = ContextVar(
+    "_ACTIVE_TRACES", default=()
+)
+
+
+@dataclass
+class RoundTripReport:
+    """Dataclass to store every round trip caused by one traced operation."""
+
+    name: str
+    repeat_threshold: int = 2
+    round_trips: list["RoundTripSample"] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return len(self.round_trips)
+
+    @property
+    def errors(self) -> int:
+        return sum(1 for round_trip in self.round_trips if round_trip.error)
+
+    def fingerprint_counts(self) -> dict[tuple[str, str], int]:
+        """Returns the number of round trips per (kind, fingerprint), most frequent first."""
+
+        counts = Counter((round_trip.kind, round_trip.key) for round_trip in self.round_trips)
+        return dict(counts.most_common())
+
+    def repeated(self, threshold: int = None) -> dict[tuple[str, str], int]:
+        """Returns the fingerprints issued at least threshold times (likely N+1 loops)."""
+
+        threshold = threshold or self.repeat_threshold
+        return {
+            key: count
+            for key, count in self.fingerprint_counts().items()
+            if count >= threshold
+        }
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.name}: {self.count} round trips, {self.errors} errors, {self.seconds:.3f}s"
+        ]
+        for (kind, key), count in self.fingerprint_counts().items():
+            flag = " [REPEATED]" if count >= self.repeat_threshold else ""
+            lines.append(f"  {count:>5} x {kind}: {key[:200]}{flag}")
+
+        return "\n".join(lines)
+
+    def assert_max_round_trips(self, limit: int) -> None:
+        """Raises if the operation made more than limit round trips."""
+
+        if self.count > limit:
+            raise Exception(
+                "ROUND_TRIP_BUDGET_EXCEEDED",
+                f"{self.count} round trips exceeds budget of {limit}\n{self.summary()}",
+            )
+
+    def assert_no_repeats(
+        self, threshold: int = None, allowed: list[str] = None
+    ) -> None:
+        """Raises if any fingerprint not in allowed was issued threshold or more times."""
+
+        allowed = allowed or []
+        repeated = {
+            (kind, key): count
+            for (kind, key), count in self.repeated(threshold).items()
+            if key not in allowed
+        }
+        if repeated:
+            raise Exception(
+                "REPEATED_ROUND_TRIPS",
+                f"{len(repeated)} repeated statement(s) found\n{self.summary()}",
+            )
+
+
+@contextmanager
+def trace_round_trips(name: str, repeat_threshold: int = 2) -> Iterator[RoundTripReport]:
+    """Collects every SQL/HTTP round trip made inside the with block into a report."""
+
+    report = RoundTripReport(name, repeat_threshold)
+    token = _ACTIVE_TRACES.set(_ACTIVE_TRACES.get() + (report,))
+    start = time.perf_counter()
+    try:
+        yield report
+    finally:
+        report.seconds = time.perf_counter() - start
+        _ACTIVE_TRACES.reset(token)
+
+        repeated = report.repeated()
+        if repeated:
+            logging.info(
+                f"{name} repeated {len(repeated)} statement(s); "
+                f"{report.count} round trips in total"
+            )
+        logging.debug(report.summary())
+
+
+def record_round_trip(sample: "RoundTripSample") -> None:
+    """Adds a finished round trip to every active trace in the current context."""
+
+    for report in _ACTIVE_TRACES.get():
+        report.round_trips.append(sample)
@@ -1,8 +1,14 @@
 import os
+import re
+import json
 import logging
 
-from typing import Callable, Any
-import chardet
+from enum import Enum
+from functools import lru_cache
+from typing import Callable, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from doclink_py.interning import ValueInterner
 
 LINE_NUM_ANALOGS = [
     "line number",
@@ -39,6 +45,37 @@ BATCH_ANALOGS = [
     "batch id",
 ]
 
+# Analogs are matched with all whitespace removed, so spacing variants ("line  no",
+# "batchn umber", "voucher\tno") share one entry
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _compact(text: str) -> str:
+    return _WHITESPACE.sub("", text.lower())
+
+
+LINE_NUM_KEYS = frozenset(_compact(analog) for analog in LINE_NUM_ANALOGS)
+FORBIDDEN_COLUMN_KEYS = frozenset(_compact(name) for name in FORBIDDEN_COLUMN_NAMES)
+VOUCHER_KEYS = frozenset(_compact(analog) for analog in VOUCHER_ANALOGS)
+BATCH_KEYS = frozenset(_compact(analog) for analog in BATCH_ANALOGS)
+
+COLUMN_CLASS_CACHE_SIZE: int = 8192
+
+
+class ColumnClass(Enum):
+    """Enum to store how a staging table column name is classified."""
+
+    LINE_NUMBER = 1
+    FORBIDDEN = 2
+    VOUCHER = 3
+    BATCH = 4
+    OTHER = 5
+
+
+AUTO_INCLUDED_CLASSES = frozenset(
+    [ColumnClass.FORBIDDEN, ColumnClass.VOUCHER, ColumnClass.BATCH]
+)
+
 
 def requires_connection(func: Callable[..., Any]) -> Callable[..., Any]:
     def wrapper(instance: Any, *args: Any, **kwargs: Any) -> Any:
@@ -53,6 +90,8 @@ def requires_connection(func: Callable[..., Any]) -> Callable[..., Any]:
 
 
 def get_query_from_file(path: str, file_name: str) -> str:
+    import chardet
+
     logging.debug("Getting query from file " + str(file_name))
 
     query = ""
@@ -85,42 +124,90 @@ def record_transaction(query: str) -> None:
         f.write(query + "\n\n")
 
 
-def row_to_json(row):
+def row_to_json(row, interner: "ValueInterner" = None):
     """Convert a row to a JSON object"""
-    return {column[0]: row[i] for i, column in enumerate(row.cursor_description)}
+    description = row.cursor_description
+    if interner is not None:
+        row = interner.intern_row(row)
+    return {column[0]: row[i] for i, column in enumerate(description)}
 
 
-def api_row_to_json(row, column_info):
+def api_row_to_json(row, column_info, interner: "ValueInterner" = None):
     """Convert a row to a JSON object"""
+    if interner is not None:
+        row = interner.intern_row(row)
     return {column_info[i]["Name"]: row[i] for i, _ in enumerate(row)}
 
 
+def chunk_list(items: list, size: int) -> list[list]:
+    """Splits a list into consecutive chunks of at most size items."""
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def read_checkpoint(path: str) -> dict | None:
+    """Reads a JSON checkpoint written by write_checkpoint; None if there isn't one."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_checkpoint(path: str, state: dict) -> None:
+    """Writes state as JSON beside path and renames it into place (never half written)."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(state, f, default=str)
+    os.replace(temp_path, path)
+
+
+@lru_cache(maxsize=COLUMN_CLASS_CACHE_SIZE)
+def classify_column(text: str) -> ColumnClass:
+    """Returns the class of a column name. Results are cached per distinct name."""
+
+    key = _compact(text)
+    if key in LINE_NUM_KEYS:
+        return ColumnClass.LINE_NUMBER
+    if key in FORBIDDEN_COLUMN_KEYS:
+        return ColumnClass.FORBIDDEN
+    if key in VOUCHER_KEYS:
+        return ColumnClass.VOUCHER
+    if key in BATCH_KEYS:
+        return ColumnClass.BATCH
+
+    return ColumnClass.OTHER
+
+
+def classify_columns(names: list[str]) -> dict[str, ColumnClass]:
+    """Classifies a whole column list in one call, keyed by the original name."""
+    return {name: classify_column(name) for name in names}
+
+
+def auto_included_columns(names: list[str]) -> list[str]:
+    """Returns the names that should be auto included, in their original order."""
+    return [name for name in names if classify_column(name) in AUTO_INCLUDED_CLASSES]
+
+
 def is_line_number(text: str) -> bool:
     """Returns True if the given text is a line number analog."""
-    return text.lower() in LINE_NUM_ANALOGS
+    return classify_column(text) is ColumnClass.LINE_NUMBER
 
 
 def is_forbidden_column_name(text: str) -> bool:
     """Returns True if the given text is a forbidden column name."""
-    return text.lower() in FORBIDDEN_COLUMN_NAMES
+    return classify_column(text) is ColumnClass.FORBIDDEN
 
 
 def is_voucher_analog(text: str) -> bool:
     """Returns True if the given text is a voucher analog."""
-    return text.lower() in VOUCHER_ANALOGS
+    return classify_column(text) is ColumnClass.VOUCHER
 
 
 def is_batch_analog(text: str) -> bool:
     """Returns True if the given text is a batch analog."""
-    return text.lower() in BATCH_ANALOGS
+    return classify_column(text) is ColumnClass.BATCH
 
 
 def is_auto_included(text: str) -> bool:
     """Returns True if the given text should be auto included."""
-    text = text.lower()
-    return (
-        # is_line_number(text)
-        is_forbidden_column_name(text)
-        or is_voucher_analog(text)
-        or is_batch_analog(text)
-    )
+    # Line numbers are deliberately not auto included
+    return classify_column(text) in AUTO_INCLUDED_CLASSES
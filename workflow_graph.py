@@ -0,0 +1,161 @@
+from collections import deque
+from uuid import UUID
+
+from doclink_py.doclink_types.workflows import WorkflowActivity, WorkflowNextActivity
+
+
+def _key(activity_key: UUID | str) -> str:
+    # pyodbc and the API return uniqueidentifiers as str in varying case
+    return str(activity_key).lower()
+
+
+class WorkflowGraph:
+    """Compiled routing graph over WorkflowActivities and WorkflowNextActivity rows."""
+
+    def __init__(
+        self,
+        workflow_activities: list[WorkflowActivity],
+        workflow_next_activities: list[WorkflowNextActivity],
+    ) -> None:
+        self.activities: dict[int, WorkflowActivity] = {
+            activity.WorkflowActivityID: activity for activity in workflow_activities
+        }
+        self.activity_ids_by_key: dict[str, int] = {
+            _key(activity.WorkflowActivityKey): activity.WorkflowActivityID
+            for activity in workflow_activities
+        }
+
+        self.adjacency: dict[int, list[int]] = {
+            activity_id: [] for activity_id in self.activities
+        }
+        self.default_next: dict[int, int] = {}
+        for next_activity in workflow_next_activities:
+            target_id = self.activity_ids_by_key.get(
+                _key(next_activity.NextWorkflowActivityKey)
+            )
+            source_id = next_activity.WorkflowActivityID
+            if target_id is None or source_id not in self.adjacency:
+                continue
+
+            if target_id not in self.adjacency[source_id]:
+                self.adjacency[source_id].append(target_id)
+            if next_activity.DefaultNextActivity:
+                self.default_next[source_id] = target_id
+
+        self.activity_ids_by_workflow: dict[int, list[int]] = {}
+        for activity in sorted(workflow_activities, key=lambda a: (a.WorkflowID, a.Seq)):
+            self.activity_ids_by_workflow.setdefault(activity.WorkflowID, []).append(
+                activity.WorkflowActivityID
+            )
+
+        # Transitive closure, computed per workflow up front (workflows are small)
+        self.reachable: dict[int, frozenset[int]] = {}
+        for activity_ids in self.activity_ids_by_workflow.values():
+            for activity_id in activity_ids:
+                self.reachable[activity_id] = frozenset(self._walk(activity_id))
+
+        self._path_cache: dict[tuple[int, int], list[int] | None] = {}
+
+    def _walk(self, start_id: int) -> set[int]:
+        seen: set[int] = set()
+        queue = deque(self.adjacency.get(start_id, []))
+        while queue:
+            activity_id = queue.popleft()
+            if activity_id in seen:
+                continue
+            seen.add(activity_id)
+            queue.extend(self.adjacency.get(activity_id, []))
+
+        return seen
+
+    def _check_activity(self, activity_id: int) -> None:
+        if activity_id not in self.activities:
+            raise Exception(
+                "INVALID_WORKFLOW_ACTIVITY_ID",
+                f"Invalid workflow activity ID: {activity_id}",
+            )
+
+    def next_activities(self, activity_id: int) -> list[WorkflowActivity]:
+        """Returns the activities a document can be routed to from activity_id."""
+
+        self._check_activity(activity_id)
+        return [self.activities[next_id] for next_id in self.adjacency[activity_id]]
+
+    def default_next_activity(self, activity_id: int) -> WorkflowActivity | None:
+        """Returns the default next activity, or None if there isn't one."""
+
+        self._check_activity(activity_id)
+        next_id = self.default_next.get(activity_id)
+        return self.activities[next_id] if next_id is not None else None
+
+    def default_route(self, activity_id: int) -> list[WorkflowActivity]:
+        """Follows default routes from activity_id until an end or a loop is reached."""
+
+        self._check_activity(activity_id)
+        route = [activity_id]
+        while (next_id := self.default_next.get(route[-1])) is not None:
+            if next_id in route:
+                break
+            route.append(next_id)
+
+        return [self.activities[route_id] for route_id in route]
+
+    def is_reachable(self, from_activity_id: int, to_activity_id: int) -> bool:
+        """Returns whether to_activity_id can be reached from from_activity_id.
+
+        An activity always reaches itself, matching shortest_path's one stop route.
+        """
+
+        self._check_activity(from_activity_id)
+        self._check_activity(to_activity_id)
+        if from_activity_id == to_activity_id:
+            return True
+        return to_activity_id in self.reachable.get(from_activity_id, frozenset())
+
+    def is_chain_reachable(self, *activity_ids: int) -> bool:
+        """Returns whether each activity can be reached from the one before it."""
+
+        return all(
+            self.is_reachable(from_id, to_id)
+            for from_id, to_id in zip(activity_ids, activity_ids[1:])
+        )
+
+    def shortest_path(
+        self, from_activity_id: int, to_activity_id: int
+    ) -> list[WorkflowActivity] | None:
+        """Returns the fewest hop route between two activities, or None if unreachable."""
+
+        self._check_activity(from_activity_id)
+        self._check_activity(to_activity_id)
+
+        cache_key = (from_activity_id, to_activity_id)
+        if cache_key not in self._path_cache:
+            self._path_cache[cache_key] = self._shortest_path_ids(
+                from_activity_id, to_activity_id
+            )
+
+        path = self._path_cache[cache_key]
+        return [self.activities[path_id] for path_id in path] if path else None
+
+    def _shortest_path_ids(self, from_id: int, to_id: int) -> list[int] | None:
+        if from_id == to_id:
+            return [from_id]
+        if not self.is_reachable(from_id, to_id):
+            return None
+
+        previous: dict[int, int] = {from_id: None}
+        queue = deque([from_id])
+        while queue:
+            activity_id = queue.popleft()
+            for next_id in self.adjacency[activity_id]:
+                if next_id in previous:
+                    continue
+                previous[next_id] = activity_id
+                if next_id == to_id:
+                    path = [to_id]
+                    while previous[path[-1]] is not None:
+                        path.append(previous[path[-1]])
+                    return path[::-1]
+                queue.append(next_id)
+
+        return None